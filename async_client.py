@@ -0,0 +1,483 @@
+"""
+Асинхронный клиент NuGet API на asyncio (только стандартная библиотека)
+"""
+
+import asyncio
+import json
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple
+
+from dependency_graph import DependencyGraph, GraphObserver, NodeKey
+from errors import NuGetError
+from instrumentation import Instrumentation
+from http_pool import (DEFAULT_ACCEPT_ENCODING, ContentDecoder, HTTPResponse, HTTPStatusError, TransferStats,
+                       default_ssl_context)
+from nuget_version import NuGetVersion, sort_versions
+from rate_limit import RateLimiter, RetryPolicy, retry_delay
+from resolver import Edge, TransitiveResolver
+from service_index import SERVICE_INDEX_CACHE, ServiceIndex
+from single_flight import AsyncSingleFlight
+from sources import PackageSource
+
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 5
+_READ_CHUNK = 64 * 1024
+
+HostKey = Tuple[str, str, int]
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class ProtocolError(OSError):
+    """Некорректный HTTP ответ; как и http.client.BadStatusLine в потоковом пуле,
+    повторяется по RetryPolicy"""
+
+
+def _parse_int(value: str, base: int, what: str) -> int:
+    """Неотрицательное число из строки ответа; ProtocolError, если это не число"""
+    try:
+        number = int(value, base)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise ProtocolError(f"Некорректный HTTP ответ: {what} {value!r}")
+    return number
+
+
+class AsyncConnectionPool:
+    """Keep-alive соединения поверх asyncio streams; число одновременных
+    запросов ограничено семафором, частота и повторы - как в ConnectionPool"""
+
+    def __init__(self, concurrency: int = 64, timeout: float = 30.0,
+                 accept_encoding: Optional[str] = DEFAULT_ACCEPT_ENCODING,
+                 transfer_stats: Optional[TransferStats] = None,
+                 rate_limiter: Optional[RateLimiter] = None, retry_policy: Optional[RetryPolicy] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        self.timeout = timeout
+        self.accept_encoding = accept_encoding
+        self.transfer_stats = transfer_stats or TransferStats()
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        # DNS, TCP и TLS выполняет asyncio.open_connection - они замеряются вместе как http.connect
+        self.instrumentation = instrumentation or Instrumentation(enabled=False)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._idle: Dict[HostKey, List[Connection]] = {}
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    async def request(self, url: str, headers: Optional[Dict[str, str]] = None) -> HTTPResponse:
+        """GET запрос с обработкой перенаправлений и повторами"""
+        headers = dict(headers or {})
+        if self.accept_encoding:
+            headers.setdefault('Accept-Encoding', self.accept_encoding)
+        attempt = redirects = 0
+        while True:
+            key = self._host_key(url)
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(key)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(self._request_once(url, headers), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                delay = retry_delay(self.rate_limiter, self.retry_policy, key, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            self.transfer_stats.record(response.wire_bytes, len(response.body))
+            if response.status in _REDIRECT_CODES and 'location' in response.headers:
+                redirects += 1
+                if redirects > _MAX_REDIRECTS:
+                    raise HTTPStatusError(url, 310, "Слишком много перенаправлений")
+                url = urllib.parse.urljoin(url, response.headers['location'])
+                continue
+            if response.status >= 400:
+                delay = retry_delay(self.rate_limiter, self.retry_policy, key, attempt,
+                                    response.status, response.headers)
+                if delay is None:
+                    raise HTTPStatusError(url, response.status, response.reason, response.headers)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            if self.rate_limiter is not None:
+                self.rate_limiter.on_success(key)
+            return response
+
+    @staticmethod
+    def _host_key(url: str) -> HostKey:
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise ValueError(f"Неподдерживаемая схема URL: {scheme}")
+        return scheme, (parsed.hostname or '').lower(), parsed.port or (443 if scheme == 'https' else 80)
+
+    async def _open(self, key: HostKey) -> Connection:
+        scheme, host, port = key
+        self.connections_created += 1
+        with self.instrumentation.span('http.connect'):
+            return await asyncio.open_connection(host, port, ssl=default_ssl_context() if scheme == 'https' else None)
+
+    async def _request_once(self, url: str, headers: Dict[str, str]) -> HTTPResponse:
+        parsed = urllib.parse.urlsplit(url)
+        key = self._host_key(url)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+
+        lines = [f"GET {path} HTTP/1.1", f"Host: {parsed.netloc}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        payload = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        idle = self._idle.get(key)
+        if idle:
+            connection = idle.pop()
+            self.connections_reused += 1
+            try:
+                return await self._exchange(key, connection, url, payload)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Сервер закрыл соединение, пока оно простаивало в пуле
+                pass
+        return await self._exchange(key, await self._open(key), url, payload)
+
+    async def _exchange(self, key: HostKey, connection: Connection, url: str, payload: bytes) -> HTTPResponse:
+        reader, writer = connection
+        started = time.perf_counter()
+        try:
+            writer.write(payload)
+            await writer.drain()
+
+            status_line = await reader.readuntil(b'\r\n')
+            _, status_text, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+            status = _parse_int(status_text, 10, 'код статуса')
+            response_headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readuntil(b'\r\n')
+                if line == b'\r\n':
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                response_headers[name.strip().lower()] = value.strip()
+            headers_read = time.perf_counter()
+            self.instrumentation.record('http.ttfb', headers_read - started)
+
+            keep_alive = response_headers.get('connection', '').lower() != 'close'
+            # Сжатое тело распаковывается по мере чтения
+            decoder = ContentDecoder(response_headers.get('content-encoding'))
+            if status in (204, 304) or status < 200:
+                # Ответы без тела независимо от заголовков
+                pass
+            elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+                await self._read_chunked(reader, decoder)
+            elif 'content-length' in response_headers:
+                remaining = _parse_int(response_headers['content-length'], 10, 'Content-Length')
+                while remaining:
+                    chunk = await reader.read(min(remaining, _READ_CHUNK))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b'', remaining)
+                    decoder.feed(chunk)
+                    remaining -= len(chunk)
+            else:
+                while chunk := await reader.read(_READ_CHUNK):
+                    decoder.feed(chunk)
+                keep_alive = False
+            body = decoder.finish()
+            self.instrumentation.record('http.body', time.perf_counter() - headers_read, decoder.wire_bytes)
+        except BaseException:
+            writer.close()
+            raise
+
+        if keep_alive:
+            self._idle.setdefault(key, []).append(connection)
+        else:
+            writer.close()
+        return HTTPResponse(url, status, reason, response_headers, body, decoder.wire_bytes)
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader, decoder: ContentDecoder):
+        while True:
+            size_line = await reader.readuntil(b'\r\n')
+            size = _parse_int(size_line.split(b';', 1)[0].decode('latin-1').strip(), 16, 'размер блока')
+            if size == 0:
+                # Пропускаем trailer-заголовки
+                while await reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                return
+            decoder.feed(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'created': self.connections_created, 'reused': self.connections_reused}
+
+
+class AsyncNuGetClient:
+    """Корутинные аналоги _get_service_index, _get_package_data и
+    _try_alternative_registration_url; разбор документов выполняет visualizer"""
+
+    def __init__(self, visualizer, concurrency: int = 64, timeout: float = 30.0):
+        self.visualizer = visualizer
+        self.concurrency = concurrency
+        self.timeout = timeout
+        # Свой пул на каждый источник: медленный фид не занимает слоты остальных
+        self.pools: Dict[PackageSource, AsyncConnectionPool] = {}
+        # Счетчики общие с потоковым single-flight visualizer
+        self.single_flight = AsyncSingleFlight(visualizer.single_flight.stats)
+
+    async def __aenter__(self) -> 'AsyncNuGetClient':
+        # Пул создается внутри работающего цикла событий; учет трафика и ограничение частоты общие с синхронным пулом
+        http_pool = self.visualizer.http_pool
+        for source in self.visualizer.sources:
+            self.pools[source] = AsyncConnectionPool(
+                self.concurrency, self.timeout, http_pool.accept_encoding, http_pool.transfer_stats,
+                http_pool.rate_limiter, http_pool.retry_policy, http_pool.instrumentation)
+        return self
+
+    async def __aexit__(self, *exc):
+        for pool in self.pools.values():
+            await pool.close()
+
+    async def get_json_from_url(self, url: str) -> Dict[str, Any]:
+        # Для span асинхронного кода время включает ожидание других корутин
+        with self.visualizer.instrumentation.span('json.fetch'):
+            return await self.single_flight.do(url, lambda: self._load_json(url))
+
+    async def _load_json(self, url: str) -> Dict[str, Any]:
+        cache = self.visualizer.http_cache
+        instrumentation = self.visualizer.instrumentation
+        try:
+            with instrumentation.span('http.request') as span:
+                entry = None
+                body = None
+                if cache is not None:
+                    body = cache.get_fresh(url)
+                    entry = cache.lookup(url)
+
+                if body is None:
+                    headers = {
+                        'User-Agent': 'DependencyVisualizer/1.0',
+                        'Accept': 'application/json'
+                    }
+                    pool = self.pools[self.visualizer.sources.current()]
+                    conditional = dict(headers, **cache.conditional_headers(entry)) if cache is not None else headers
+                    response = await pool.request(url, headers=conditional)
+                    body = response.body
+                    if cache is not None:
+                        body = cache.handle_response(url, entry, response.status, response.headers, body)
+                        if body is None:
+                            # Тело из кэша пропало после отправки валидаторов - повторяем обычным запросом
+                            response = await pool.request(url, headers=headers)
+                            body = cache.handle_response(url, None, response.status, response.headers,
+                                                         response.body)
+                            if body is None:
+                                raise NuGetError(f"Ответ 304 на безусловный запрос к {url}")
+                span.bytes = len(body)
+
+            with instrumentation.span('json.parse') as span:
+                span.bytes = len(body)
+                return json.loads(body.decode('utf-8'))
+        except HTTPStatusError as e:
+            raise NuGetError(f"HTTP ошибка {e.code}: {e.reason} для URL {url}")
+        except json.JSONDecodeError as e:
+            raise NuGetError(f"Ошибка парсинга JSON из {url}: {e}")
+        except asyncio.TimeoutError:
+            raise NuGetError(f"Превышено время ожидания ответа от {url}")
+        except OSError as e:
+            raise NuGetError(f"Ошибка подключения: {e} для URL {url}")
+
+    async def get_service_index(self) -> Dict[str, Any]:
+        try:
+            return await self.get_json_from_url(self.visualizer.sources.current().url)
+        except Exception as e:
+            raise NuGetError(f"Ошибка получения индекса сервисов: {e}")
+
+    async def get_cached_service_index(self) -> ServiceIndex:
+        """Индекс сервисов текущего источника; одновременные корутины ждут одну загрузку"""
+        repository_url = self.visualizer.sources.current().url
+        service_index = SERVICE_INDEX_CACHE.peek(repository_url, self.visualizer.config['service_index_ttl'])
+        if service_index is not None:
+            return service_index
+        return await self.single_flight.do(f"service-index {repository_url}",
+                                           lambda: self._load_service_index(repository_url))
+
+    async def _load_service_index(self, repository_url: str) -> ServiceIndex:
+        service_index = SERVICE_INDEX_CACHE.peek(repository_url, self.visualizer.config['service_index_ttl'])
+        if service_index is None:
+            service_index = SERVICE_INDEX_CACHE.put(repository_url, await self.get_service_index())
+        return service_index
+
+    async def get_registration_base_url(self) -> str:
+        service_index = await self.get_cached_service_index()
+        return self.visualizer._find_service_url(service_index, 'RegistrationsBaseUrl/3.6.0')
+
+    async def get_package_data(self, registration_base_url: str, package_name: str, version: str) -> Dict[str, Any]:
+        registration_url = self.visualizer._get_package_registration_url(registration_base_url, package_name, version)
+        registration_data = await self.get_json_from_url(registration_url)
+        catalog_url = self.visualizer._catalog_entry_url(registration_data)
+        if catalog_url is not None:
+            return await self.get_json_from_url(catalog_url)
+        return self.visualizer._catalog_entry_from_registration(registration_data, package_name, version)
+
+    async def try_alternative_registration_url(self, registration_base_url: str, package_name: str,
+                                               version: str) -> Dict[str, Any]:
+        alt_url = self.visualizer._get_package_index_url(registration_base_url, package_name)
+        try:
+            index_data = await self.get_json_from_url(alt_url)
+            pages = index_data.get('items', [])
+            page = self.visualizer._locate_page(pages, version)
+            if page is not None and 'items' not in page:
+                # Загружаем только страницу, которая может содержать версию
+                page_data = await self.get_json_from_url(page['@id'])
+                index_data = dict(index_data, items=[page_data if item is page else item for item in pages])
+            return self.visualizer._find_version_in_index(index_data, package_name, version)
+        except Exception as e:
+            raise NuGetError(f"Альтернативный метод также не сработал: {e}")
+
+    async def fetch_package_data(self, registration_base_url: Optional[str], package_name: str,
+                                 version: str) -> Dict[str, Any]:
+        store = self.visualizer.metadata_store
+        if store is not None:
+            stored = store.package_data(package_name, version)
+            if stored is not None:
+                return stored
+
+        sources = self.visualizer.sources
+
+        async def lookup(source: PackageSource) -> Dict[str, Any]:
+            base_url = registration_base_url if source is sources.primary else None
+            return await self.fetch_from_source(base_url, package_name, version)
+
+        package_data = await sources.first_async(lookup)
+        if store is not None:
+            store.put_package_data(package_data)
+        return package_data
+
+    async def fetch_from_source(self, registration_base_url: Optional[str], package_name: str,
+                                version: str) -> Dict[str, Any]:
+        registration_base_url = registration_base_url or await self.get_registration_base_url()
+        try:
+            return await self.get_package_data(registration_base_url, package_name, version)
+        except NuGetError:
+            return await self.try_alternative_registration_url(registration_base_url, package_name, version)
+
+    async def get_package_versions(self, package_name: str) -> List[NuGetVersion]:
+        """Корутинный аналог DependencyVisualizer._get_package_versions"""
+        key = package_name.lower()
+        cached = self.visualizer._versions_cache.get(key)
+        if cached is not None:
+            return cached
+
+        store = self.visualizer.metadata_store
+        raw_versions = store.versions(package_name) if store is not None else None
+        if raw_versions is not None:
+            versions = sort_versions(raw_versions)
+            with self.visualizer._versions_lock:
+                self.visualizer._versions_cache[key] = versions
+            return versions
+
+        raw_versions = await self.visualizer.sources.first_async(
+            lambda source: self.fetch_package_versions(package_name))
+        if store is not None:
+            store.put_versions(package_name, raw_versions)
+
+        versions = sort_versions(raw_versions)
+        with self.visualizer._versions_lock:
+            self.visualizer._versions_cache[key] = versions
+        return versions
+
+    async def fetch_package_versions(self, package_name: str) -> List[str]:
+        """Список версий пакета из текущего источника"""
+        service_index = await self.get_cached_service_index()
+        package_base_url = service_index.find('PackageBaseAddress/3.0.0')
+        if package_base_url:
+            data = await self.get_json_from_url(
+                self.visualizer._get_flat_container_url(package_base_url, package_name))
+            return data.get('versions', [])
+        else:
+            registration_base_url = self.visualizer._find_service_url(service_index, 'RegistrationsBaseUrl/3.6.0')
+            index_data = await self.get_json_from_url(
+                self.visualizer._get_package_index_url(registration_base_url, package_name))
+            # Документ может быть общим с другими корутинами - страницы подставляются в копию
+            pages = []
+            for page in index_data.get('items', []):
+                if 'items' not in page and page.get('@id'):
+                    page = await self.get_json_from_url(page['@id'])
+                pages.append(page)
+            index_data = dict(index_data, items=pages)
+            return self.visualizer._versions_from_registration_index(index_data)
+
+    async def select_version(self, package_id: str, version_range: str) -> Optional[str]:
+        try:
+            versions = await self.get_package_versions(package_id)
+        except Exception:
+            versions = []
+        return TransitiveResolver.choose_version(version_range, versions)
+
+    async def _fetch_dependencies(self, registration_base_url: Optional[str], graph: DependencyGraph,
+                                  key: NodeKey) -> List[Edge]:
+        node = graph.nodes[key]
+        package_data = await self.fetch_package_data(registration_base_url, node['id'], node['version'])
+        dependencies = self.visualizer._prune_dependencies(self.visualizer._extract_dependencies(package_data))
+        versions = await asyncio.gather(
+            *(self.select_version(dependency['id'], dependency['version_range']) for dependency in dependencies))
+        return list(zip(dependencies, versions))
+
+    async def resolve(self, package_name: str, version: str,
+                      observer: Optional[GraphObserver] = None) -> DependencyGraph:
+        return await self.resolve_many([(package_name, version)], observer)
+
+    async def resolve_many(self, roots: List[Tuple[str, str]],
+                           observer: Optional[GraphObserver] = None) -> DependencyGraph:
+        """Транзитивный обход: весь фронт уровня запрашивается одновременно,
+        ограничение параллелизма задает семафор пула; как и в TransitiveResolver.resolve_many,
+        корней может быть несколько"""
+        resolver = TransitiveResolver(self.visualizer)
+        # Как и в TransitiveResolver, URL регистрации определяется при первом промахе хранилища
+        registration_base_url = None
+        graph = DependencyGraph(*roots[0], observer)
+        for package_name, version in roots[1:]:
+            graph.add_root(package_name, version)
+        visited = set(graph.roots)
+        frontier = list(graph.roots)
+        depth = 0
+
+        while frontier:
+            print(f"Уровень {depth}: запрос {len(frontier)} пакетов (asyncio)")
+            results = await asyncio.gather(
+                *(self._fetch_dependencies(registration_base_url, graph, key) for key in frontier),
+                return_exceptions=True
+            )
+            frontier = resolver.expand_level(graph, frontier, results, visited)
+            depth += 1
+
+        return graph
+
+
+async def fetch_package_data(visualizer, package_name: str, version: str) -> Dict[str, Any]:
+    """Получение catalogEntry одного пакета асинхронным клиентом"""
+    async with AsyncNuGetClient(visualizer, visualizer.config['async_concurrency'],
+                                visualizer.config['http_timeout']) as client:
+        return await client.fetch_package_data(None, package_name, version)
+
+
+async def resolve_graph(visualizer, package_name: str, version: str,
+                        observer: Optional[GraphObserver] = None) -> DependencyGraph:
+    """Построение транзитивного графа асинхронным клиентом"""
+    async with AsyncNuGetClient(visualizer, visualizer.config['async_concurrency'],
+                                visualizer.config['http_timeout']) as client:
+        return await client.resolve(package_name, version, observer)
+
+
+async def resolve_roots(visualizer, roots: List[Tuple[str, str]],
+                        observer: Optional[GraphObserver] = None) -> DependencyGraph:
+    """Общий граф нескольких корней асинхронным клиентом"""
+    async with AsyncNuGetClient(visualizer, visualizer.config['async_concurrency'],
+                                visualizer.config['http_timeout']) as client:
+        return await client.resolve_many(roots, observer)
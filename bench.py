@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Замеры производительности на локальном имитаторе NuGet
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Any, Dict, Iterable, List, Optional
+
+import layout
+import synthetic_feed
+from csr_graph import CSRGraph
+from dependency_graph import DependencyEdge
+from instrumentation import Instrumentation
+from main import DependencyVisualizer
+from mock_nuget import MockNuGetServer, registration_documents, simple_feed
+from nuget_version import parse_range, parse_version
+from render import DotWriter, SvgBackend
+from service_index import SERVICE_INDEX_CACHE
+
+
+def make_visualizer(server: MockNuGetServer, workdir: str, **overrides) -> DependencyVisualizer:
+    """DependencyVisualizer с временным конфигом, настроенным на локальный сервер"""
+    config = {
+        "package_name": "Root.Package",
+        "repository_url": server.url('/v3/index.json'),
+        "package_version": "1.0.0",
+    }
+    config.update(overrides)
+    config_path = os.path.join(workdir, f"config_{time.monotonic_ns()}.json")
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        return DependencyVisualizer(config_path)
+
+
+def fan_out_feed(width: int) -> Dict[str, Any]:
+    """Корень с width прямыми зависимостями, у каждой из которых по одной общей зависимости"""
+    packages = {'Root.Package': {'1.0.0': [(f'Pkg{i}', '[1.0.0, )') for i in range(width)]}}
+    for i in range(width):
+        packages[f'Pkg{i}'] = {'1.0.0': [('Shared', '[1.0.0, )')]}
+    packages['Shared'] = {'1.0.0': []}
+    return simple_feed(packages)
+
+
+def bench_backends(width: int = 200, latency: float = 0.005) -> Dict[str, Dict[str, float]]:
+    """Сравнение threaded и async клиентов на транзитивном обходе"""
+    results = {}
+    for backend in ('threaded', 'async'):
+        # Для каждого клиента свой сервер, чтобы замеры не влияли друг на друга
+        with tempfile.TemporaryDirectory() as workdir, MockNuGetServer(fan_out_feed(width), latency) as server:
+            visualizer = make_visualizer(server, workdir, http_backend=backend, transitive=True,
+                                         max_workers=16, async_concurrency=16, http_pool_size=16)
+            started = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                graph = visualizer.resolve_graph()
+            elapsed = time.perf_counter() - started
+            visualizer.http_pool.close()
+            results[backend] = {
+                'seconds': round(elapsed, 4),
+                'nodes': graph.node_count,
+                'requests': server.requests,
+            }
+    return results
+
+
+def bench_feeds(shapes: Optional[Iterable[str]] = None, latency: float = 0.0) -> Dict[str, Dict[str, Any]]:
+    """get_dependencies и транзитивный обход обоими клиентами на синтетических фидах разной формы"""
+    results: Dict[str, Dict[str, Any]] = {}
+    for shape in shapes or synthetic_feed.SHAPES:
+        feed = synthetic_feed.shape_feed(shape)
+        results[shape] = {}
+        for backend in ('threaded', 'async'):
+            # http_cache_dir='' - каждый замер начинается с пустого кэша
+            with tempfile.TemporaryDirectory() as workdir, MockNuGetServer(feed, latency) as server:
+                options = dict(http_backend=backend, http_cache_dir='', max_workers=16, async_concurrency=16,
+                               http_pool_size=16)
+                visualizer = make_visualizer(server, workdir, **options)
+                started = time.perf_counter()
+                with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                    direct = visualizer.get_dependencies()
+                direct_seconds = time.perf_counter() - started
+                direct_requests = server.requests
+                visualizer.http_pool.close()
+
+                visualizer = make_visualizer(server, workdir, transitive=True, **options)
+                started = time.perf_counter()
+                with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                    graph = visualizer.resolve_graph()
+                resolve_seconds = time.perf_counter() - started
+                visualizer.http_pool.close()
+                results[shape][backend] = {
+                    'direct_seconds': round(direct_seconds, 4),
+                    'direct_requests': direct_requests,
+                    'direct_dependencies': len(direct),
+                    'resolve_seconds': round(resolve_seconds, 4),
+                    'resolve_requests': server.requests - direct_requests,
+                    'nodes': graph.node_count,
+                    'edges': graph.edge_count,
+                }
+    return results
+
+
+def reset_process_caches():
+    """Кэши уровня модулей: у отдельного процесса их нет, поэтому перед каждым
+    замером, изображающим новый запуск, они очищаются"""
+    SERVICE_INDEX_CACHE.clear()
+    parse_version.cache_clear()
+    parse_range.cache_clear()
+
+
+def bench_batch(roots: int = 50, shared: int = 40, latency: float = 0.002) -> Dict[str, Dict[str, float]]:
+    """Пакетный режим против отдельных запусков: roots корней с общими shared зависимостями"""
+    packages = {f'App{i}': {'1.0.0': [(f'Lib{j}', '[1.0.0, )') for j in range(i % 5, shared, 2)]}
+                for i in range(roots)}
+    packages.update({f'Lib{j}': {'1.0.0': [('Core', '[1.0.0, )')]} for j in range(shared)})
+    packages['Core'] = {'1.0.0': []}
+    feed = simple_feed(packages)
+    names = [(f'App{i}', '1.0.0') for i in range(roots)]
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir, MockNuGetServer(feed, latency) as server:
+        started = time.perf_counter()
+        for package_name, version in names:
+            # Отдельный процесс на корень: свой пул, кэши и индекс сервисов
+            reset_process_caches()
+            visualizer = make_visualizer(server, workdir, package_name=package_name, package_version=version,
+                                         transitive=True, http_cache_dir='')
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                visualizer.resolve_graph()
+            visualizer.sources.close()
+        results['separate'] = {'seconds': round(time.perf_counter() - started, 4), 'requests': server.requests}
+
+        reset_process_caches()
+        before = server.requests
+        visualizer = make_visualizer(server, workdir, http_cache_dir='')
+        started = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            visualizer.resolve_roots(names)
+        visualizer.sources.close()
+        results['batch'] = {'seconds': round(time.perf_counter() - started, 4), 'requests': server.requests - before}
+    return results
+
+
+def bench_index_memory(versions: int = 50000) -> Dict[str, Dict[str, float]]:
+    """Пиковая память поиска версии в индексе регистрации: json.loads всего документа
+    против потокового разбора, для версии в начале и в конце индекса"""
+    all_versions = [f'1.0.{i}' for i in range(versions)]
+    feed = simple_feed({'Root.Package': {'1.0.0': []}})
+    feed.update(registration_documents('Big', all_versions))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir, MockNuGetServer(feed, compress=False) as server:
+        page_bytes = len(server._httpd.bodies['/v3/registration/big/index.json'])
+        for streaming in (False, True):
+            visualizer = make_visualizer(server, workdir, stream_registration_index=streaming)
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                base = visualizer._get_registration_base_url()
+                for position, version in (('first', all_versions[0]), ('last', all_versions[-1])):
+                    tracemalloc.start()
+                    started = time.perf_counter()
+                    visualizer._try_alternative_registration_url(base, 'Big', version)
+                    elapsed = time.perf_counter() - started
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    results[f"{'stream' if streaming else 'full'}/{position}"] = {
+                        'seconds': round(elapsed, 4),
+                        'peak_mb': round(peak / 1024 / 1024, 2),
+                        'page_mb': round(page_bytes / 1024 / 1024, 2),
+                    }
+            visualizer.http_pool.close()
+    return results
+
+
+def bench_edge_memory(edges: int = 1000000) -> Dict[str, Dict[str, float]]:
+    """Память на хранение зависимостей: словари против DependencyEdge.
+
+    Строки создаются заново для каждого ребра, как после json.loads: у каждого
+    документа свои копии одинаковых id, диапазонов и фреймворков."""
+    frameworks = ['net45', 'net6.0', 'netstandard2.0', '.NETFramework4.7.2']
+
+    def raw_edges():
+        for i in range(edges):
+            yield (''.join(('Package.', str(i % 5000))), ''.join(('[', str(i % 300), '.0.0, )')),
+                   ''.join((frameworks[i % len(frameworks)], '')))
+
+    def as_dict(dep_id, dep_range, framework):
+        return {'id': dep_id, 'version_range': dep_range, 'target_framework': framework}
+
+    results = {}
+    for name, factory in (('dict', as_dict), ('slots', DependencyEdge)):
+        tracemalloc.start()
+        started = time.perf_counter()
+        records = [factory(*raw) for raw in raw_edges()]
+        elapsed = time.perf_counter() - started
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            'seconds': round(elapsed, 3),
+            'mb': round(current / 1024 / 1024, 1),
+            'bytes_per_edge': round(current / len(records), 1),
+        }
+        del records
+    return results
+
+
+def bench_render(nodes: int = 50000, fan_out: int = 3) -> Dict[str, float]:
+    """Потоковая запись DOT и встроенный SVG для графа с nodes * fan_out ребрами:
+    пиковая память должна зависеть от числа узлов, а не ребер"""
+    with tempfile.TemporaryDirectory() as workdir:
+        dot_path = os.path.join(workdir, 'graph.dot')
+        svg_path = os.path.join(workdir, 'graph.svg')
+        tracemalloc.start()
+        started = time.perf_counter()
+        with DotWriter(dot_path) as writer:
+            writer.on_node(('root', '1.0.0'), 'Root', '1.0.0')
+            for i in range(1, nodes):
+                writer.on_node((f'package.{i}', '1.0.0'), f'Package.{i}', '1.0.0')
+            for i in range(1, nodes):
+                parent = ('root', '1.0.0') if i < 100 else (f'package.{i // 100}', '1.0.0')
+                writer.on_edge(parent, (f'package.{i}', '1.0.0'), None)
+                for extra in range(1, fan_out):
+                    writer.on_edge((f'package.{i}', '1.0.0'), (f'package.{(i * 7 + extra) % (nodes - 1) + 1}', '1.0.0'),
+                                   None)
+        dot_seconds = time.perf_counter() - started
+        _, dot_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        SvgBackend().render(dot_path, svg_path, 'svg')
+        svg_seconds = time.perf_counter() - started
+        _, svg_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'edges': writer.edge_count,
+            'dot_seconds': round(dot_seconds, 3),
+            'dot_peak_mb': round(dot_peak / 1024 / 1024, 1),
+            'dot_mb': round(os.path.getsize(dot_path) / 1024 / 1024, 1),
+            'svg_seconds': round(svg_seconds, 3),
+            'svg_peak_mb': round(svg_peak / 1024 / 1024, 1),
+            'svg_mb': round(os.path.getsize(svg_path) / 1024 / 1024, 1),
+        }
+
+
+def synthetic_graph(nodes: int, seed: int = 1, depth: int = 12) -> CSRGraph:
+    """Граф, похожий на разрешенные зависимости: пакеты разбиты на depth уровней,
+    у каждого 1-3 родителя (чаще с соседнего уровня выше), редкие ребра назад образуют циклы"""
+    rng = random.Random(seed)
+    names = [(f'Package.{i}', '1.0.0') for i in range(nodes)]
+    # Уровень L - пакеты [starts[L], starts[L + 1]); уровень 0 - корень, ширина растет с глубиной
+    starts = [0] + [1 + (nodes - 1) * level * level // (depth * depth) for level in range(depth + 1)]
+    edges = []
+    for level in range(1, depth + 1):
+        for child in range(starts[level], starts[level + 1]):
+            for _ in range(rng.randint(1, 3)):
+                if rng.random() < 0.7:
+                    parent = rng.randrange(starts[level - 1], starts[level])
+                else:
+                    parent = rng.randrange(starts[level])
+                edges.append((names[parent], names[child], None))
+            if rng.random() < 0.01:
+                edges.append((names[child], names[rng.randrange(child)], None))
+    return CSRGraph.from_edges(names, edges)
+
+
+def bench_layout(sizes=(1000, 10000, 50000)) -> Dict[str, Dict[str, float]]:
+    """Время послойной раскладки (чистый Python и numpy) и число пересечений до и после проходов"""
+    results = {}
+    for nodes in sizes:
+        graph = synthetic_graph(nodes)
+        for use_numpy in (False, True):
+            if use_numpy and layout.numpy is None:
+                continue
+            started = time.perf_counter()
+            result = layout.LayeredLayout(graph, use_numpy=use_numpy)
+            elapsed = time.perf_counter() - started
+            results[f"{nodes}/{'numpy' if use_numpy else 'python'}"] = {
+                'edges': graph.edge_count,
+                'layers': len(result.layers),
+                'seconds': round(elapsed, 3),
+                'crossings': layout.crossings(result),
+                'initial_crossings': layout.crossings(layout.LayeredLayout(graph, sweeps=0, use_numpy=use_numpy)),
+            }
+    return results
+
+
+def bench_instrumentation(spans: int = 1000000) -> Dict[str, float]:
+    """Цена одного span: пустой цикл, выключенные и включенные замеры (наносекунды)"""
+    results = {}
+    for mode, instrumentation in (('baseline', None), ('disabled', Instrumentation(enabled=False)),
+                                  ('enabled', Instrumentation())):
+        started = time.perf_counter()
+        if instrumentation is None:
+            for _ in range(spans):
+                pass
+        else:
+            for _ in range(spans):
+                with instrumentation.span('bench'):
+                    pass
+        results[mode] = round((time.perf_counter() - started) / spans * 1e9, 1)
+    return results
+
+
+SUITES = ('backends', 'feeds', 'batch', 'index_memory', 'edge_memory', 'render', 'layout', 'instrumentation')
+
+
+def environment() -> Dict[str, Any]:
+    """Коммит и интерпретатор, на которых получены результаты"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'platform': platform.platform()}
+
+
+def compare_results(old: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.1, path: str = '') -> List[str]:
+    """Замеры времени (ключи *seconds), изменившиеся больше чем на threshold"""
+    lines = []
+    for key, value in new.items():
+        name = f'{path}.{key}' if path else key
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            lines.extend(compare_results(previous, value, threshold, name))
+        elif key.endswith('seconds') and isinstance(previous, (int, float)) and previous > 0:
+            change = value / previous - 1
+            if abs(change) > threshold:
+                verdict = 'медленнее' if change > 0 else 'быстрее'
+                lines.append(f"{name}: {previous:.4f} -> {value:.4f} c ({abs(change):.0%} {verdict})")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности на локальном имитаторе NuGet")
+    parser.add_argument('width', nargs='?', type=int, default=200, help="ширина фида для сравнения клиентов")
+    parser.add_argument('--only', action='append', choices=SUITES, help="выполнить только указанные замеры")
+    parser.add_argument('--json', metavar='FILE', help="сохранить результаты в JSON")
+    parser.add_argument('--compare', metavar='FILE', help="сравнить с результатами из JSON предыдущего запуска")
+    args = parser.parse_args()
+    suites = args.only or SUITES
+    results: Dict[str, Any] = {}
+
+    if 'backends' in suites:
+        print(f"=== threaded vs async: {args.width} пакетов в ширину ===")
+        results['backends'] = bench_backends(args.width)
+        for backend, result in results['backends'].items():
+            print(f"{backend:10} {result['seconds']:8.3f} c  узлов: {result['nodes']:5d}  "
+                  f"запросов: {result['requests']}")
+
+    if 'feeds' in suites:
+        print("\n=== Синтетические фиды: прямые зависимости / транзитивный граф ===")
+        results['feeds'] = bench_feeds()
+        for shape, backends in results['feeds'].items():
+            for backend, result in backends.items():
+                print(f"{shape:16} {backend:9} {result['direct_seconds']:7.3f} c ({result['direct_requests']:4d} запр.)"
+                      f"  {result['resolve_seconds']:7.3f} c ({result['resolve_requests']:5d} запр.)"
+                      f"  узлов: {result['nodes']:4d}  ребер: {result['edges']:5d}")
+
+    if 'batch' in suites:
+        print("\n=== 50 корней: отдельные запуски / пакетный режим ===")
+        results['batch'] = bench_batch()
+        for mode, result in results['batch'].items():
+            print(f"{mode:10} {result['seconds']:8.3f} c  запросов: {result['requests']}")
+
+    if 'index_memory' in suites:
+        print("\n=== Поиск версии в индексе регистрации на 50000 версий ===")
+        results['index_memory'] = bench_index_memory()
+        for mode, result in results['index_memory'].items():
+            print(f"{mode:12} {result['seconds']:8.3f} c  пик памяти: {result['peak_mb']:7.2f} МБ"
+                  f"  (страница {result['page_mb']} МБ)")
+
+    if 'edge_memory' in suites:
+        print("\n=== Хранение 1000000 зависимостей ===")
+        results['edge_memory'] = bench_edge_memory()
+        for mode, result in results['edge_memory'].items():
+            print(f"{mode:12} {result['seconds']:8.3f} c  память: {result['mb']:7.1f} МБ"
+                  f"  ({result['bytes_per_edge']} байт на ребро)")
+
+    if 'render' in suites:
+        result = results['render'] = bench_render()
+        print(f"\n=== DOT и SVG для {result['edges']} ребер ===")
+        print(f"DOT {result['dot_seconds']:8.3f} c  пик памяти: {result['dot_peak_mb']:6.1f} МБ"
+              f"  файл {result['dot_mb']} МБ")
+        print(f"SVG {result['svg_seconds']:8.3f} c  пик памяти: {result['svg_peak_mb']:6.1f} МБ"
+              f"  файл {result['svg_mb']} МБ")
+
+    if 'layout' in suites:
+        print("\n=== Послойная раскладка ===")
+        results['layout'] = bench_layout()
+        for mode, result in results['layout'].items():
+            print(f"{mode:14} {result['seconds']:8.3f} c  ребер: {result['edges']:6d}  слоев: {result['layers']:4d}  "
+                  f"пересечений: {result['initial_crossings']} -> {result['crossings']}")
+
+    if 'instrumentation' in suites:
+        result = results['instrumentation'] = bench_instrumentation()
+        print("\n=== Цена одного span, нс ===")
+        print(f"пустой цикл {result['baseline']}  выключено {result['disabled']}  включено {result['enabled']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"\nРезультаты сохранены в {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        print(f"\n=== Сравнение с {args.compare} (коммит {previous['environment'].get('commit')}) ===")
+        changes = compare_results(previous['results'], results)
+        print('\n'.join(changes) if changes else "Изменений больше 10% нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Инкрементальная синхронизация с каталогом NuGet (Catalog/3.0.0)
+
+Каталог - журнал всех публикаций, изменений и удалений пакетов, упорядоченный
+по commitTimeStamp. Курсор хранит время последнего обработанного коммита;
+при синхронизации загружаются только страницы каталога новее курсора, и
+обновляются только упомянутые в них пакеты.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from errors import ConfigError, NuGetError
+from metadata_store import version_key
+
+_TIMESTAMP_RE = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d+))?(?:Z|\+00:00)?$')
+
+# Изменение пакета: (время коммита, id, версия, удалена ли версия)
+Change = Tuple[str, str, str, bool]
+
+
+def timestamp_key(text: str) -> str:
+    """Сравнимая строка для commitTimeStamp: дробная часть дополняется до 7 знаков
+    ('2023-01-01T00:00:00.5Z' и '2023-01-01T00:00:00.5000000Z' совпадают)"""
+    match = _TIMESTAMP_RE.match(text or '')
+    if match is None:
+        raise NuGetError(f"Некорректный commitTimeStamp каталога: '{text}'")
+    return f"{match.group(1)}.{(match.group(2) or '')[:7]:0<7}"
+
+
+class CatalogSync:
+    """Применение новых коммитов каталога к хранилищу метаданных и HTTP кэшу"""
+
+    def __init__(self, visualizer, cursor_path: str, max_workers: int = 8):
+        self.visualizer = visualizer
+        self.cursor_path = cursor_path
+        self.max_workers = max_workers
+
+    @property
+    def repository_url(self) -> str:
+        """Каталог читается только у основного источника - курсор относится к нему"""
+        return self.visualizer.sources.primary.url
+
+    def load_cursor(self) -> Optional[str]:
+        """Сохраненный курсор для основного источника (в формате timestamp_key)"""
+        try:
+            with open(self.cursor_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('repository_url') != self.repository_url:
+            return None
+        return timestamp_key(data.get('commitTimeStamp', ''))
+
+    def save_cursor(self, commit_timestamp: str):
+        data = {'repository_url': self.repository_url, 'commitTimeStamp': commit_timestamp}
+        temp_path = f"{self.cursor_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_path, self.cursor_path)
+
+    def collect_changes(self, pages: List[Dict[str, Any]], cursor: str, latest: str) -> List[Change]:
+        """Последнее изменение каждой версии пакета в коммитах из интервала (cursor, latest]"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            documents = list(executor.map(lambda page: self.visualizer._get_json_from_url(page['@id']), pages))
+
+        changes: Dict[Tuple[str, str], Change] = {}
+        for document in documents:
+            for item in document.get('items', []):
+                package_id = item.get('nuget:id')
+                version = item.get('nuget:version')
+                if not package_id or not version:
+                    continue
+                committed = timestamp_key(item.get('commitTimeStamp', ''))
+                # Коммиты новее индекса каталога будут обработаны при следующей синхронизации
+                if not cursor < committed <= latest:
+                    continue
+                key = (package_id.lower(), version_key(version))
+                if key not in changes or changes[key][0] < committed:
+                    changes[key] = (committed, package_id, version, item.get('@type') == 'nuget:PackageDelete')
+        return list(changes.values())
+
+    def _invalidate_cache(self, service_index, package_ids: List[str]) -> int:
+        """Удаление из HTTP кэша документов регистрации и списков версий измененных пакетов"""
+        cache = self.visualizer.http_cache
+        if cache is None:
+            return 0
+        bases = [url for service_type, url in service_index.services.items()
+                 if service_type.startswith('RegistrationsBaseUrl') or service_type.startswith('PackageBaseAddress')]
+        prefixes = [f"{base}{package_id.lower()}/" for base in bases for package_id in package_ids]
+        return cache.invalidate_prefixes(prefixes)
+
+    def run(self) -> Dict[str, int]:
+        """Одна синхронизация; возвращает статистику"""
+        visualizer = self.visualizer
+        if visualizer.metadata_store is None and visualizer.http_cache is None:
+            raise ConfigError("Для синхронизации с каталогом нужен metadata_store_path или http_cache_dir")
+
+        service_index = visualizer._get_cached_service_index()
+        catalog = visualizer._get_json_from_url(visualizer._find_service_url(service_index, 'Catalog/3.0.0'))
+        latest_timestamp = catalog.get('commitTimeStamp', '')
+        latest = timestamp_key(latest_timestamp)
+        stats = {'pages': 0, 'changes': 0, 'packages': 0, 'cache_entries': 0}
+
+        cursor = self.load_cursor()
+        if cursor is None:
+            # Весь каталог слишком велик: локальные данные считаются актуальными на текущий момент
+            print(f"Курсор каталога не найден, начальная точка: {latest_timestamp}")
+            if visualizer.metadata_store is not None:
+                visualizer.metadata_store.mark_catalog_commit(latest)
+            self.save_cursor(latest_timestamp)
+            return stats
+
+        pages = [page for page in catalog.get('items', [])
+                 if timestamp_key(page.get('commitTimeStamp', '')) > cursor]
+        print(f"Страниц каталога новее курсора: {len(pages)}")
+        changes = self.collect_changes(pages, cursor, latest)
+        stats['pages'] = len(pages)
+        stats['changes'] = len(changes)
+
+        if visualizer.metadata_store is not None:
+            stats['packages'] = visualizer.metadata_store.apply_catalog_changes(
+                (package_id, version, deleted) for _, package_id, version, deleted in changes)
+            visualizer.metadata_store.refresh_versions(since=cursor, until=latest)
+        package_ids = sorted({package_id for _, package_id, _, _ in changes})
+        stats['cache_entries'] = self._invalidate_cache(service_index, package_ids)
+        with visualizer._versions_lock:
+            for package_id in package_ids:
+                visualizer._versions_cache.pop(package_id.lower(), None)
+
+        self.save_cursor(latest_timestamp)
+        return stats
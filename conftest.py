@@ -0,0 +1,45 @@
+"""
+Общие фикстуры тестов
+"""
+
+import json
+
+import pytest
+
+from main import DependencyVisualizer
+from service_index import SERVICE_INDEX_CACHE
+
+
+@pytest.fixture(autouse=True)
+def clear_service_index_cache():
+    """Кэш индекса сервисов общий для процесса - изолируем тесты друг от друга"""
+    SERVICE_INDEX_CACHE.clear()
+    yield
+    SERVICE_INDEX_CACHE.clear()
+
+
+@pytest.fixture
+def make_visualizer(tmp_path):
+    """Фабрика DependencyVisualizer, настроенного на локальный сервер"""
+    created = []
+
+    def factory(server, **overrides):
+        config = {
+            "package_name": "Root.Package",
+            "repository_url": server.url('/v3/index.json'),
+            "package_version": "1.0.0",
+        }
+        config.update(overrides)
+        config_path = tmp_path / f"config_{len(created)}.json"
+        config_path.write_text(json.dumps(config), encoding='utf-8')
+        visualizer = DependencyVisualizer(str(config_path))
+        created.append(visualizer)
+        return visualizer
+
+    yield factory
+    for visualizer in created:
+        visualizer.sources.close()
+        if visualizer.snapshot is not None:
+            visualizer.snapshot.close()
+        if visualizer.metadata_store is not None:
+            visualizer.metadata_store.close()
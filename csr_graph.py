@@ -0,0 +1,153 @@
+"""
+Неизменяемый граф зависимостей в формате CSR (compressed sparse row)
+
+Узлы пронумерованы целыми числами, смежность хранится в плоских массивах
+array('i'): для узла i его соседи - targets[offsets[i]:offsets[i + 1]].
+Прямая и обратная смежность строятся один раз, после чего запросы
+"от чего зависит X" и "кто зависит от X" стоят O(степени узла).
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dependency_graph import DependencyEdge, DependencyGraph, NodeKey, node_key
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Ребро до заморозки: ((id, версия) родителя, (id, версия) потомка, зависимость из _extract_dependencies)
+RawEdge = Tuple[Tuple[str, str], Tuple[str, str], DependencyEdge]
+
+
+def _counting_sort(count: int, keys: array, values: array) -> Tuple[array, array, array]:
+    """Группировка values по keys: (offsets, values по группам, исходные позиции)"""
+    offsets = array('i', [0]) * (count + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    cursor = array('i', offsets[:count])
+    grouped = array('i', [0]) * len(values)
+    positions = array('i', [0]) * len(values)
+    for position, (key, value) in enumerate(zip(keys, values)):
+        slot = cursor[key]
+        grouped[slot] = value
+        positions[slot] = position
+        cursor[key] = slot + 1
+    return offsets, grouped, positions
+
+
+class CSRGraph:
+    """Замороженный граф с прямой и обратной смежностью"""
+
+    def __init__(self, keys: List[NodeKey], names: List[Tuple[str, str]], sources: array, targets: array,
+                 dependencies: List[DependencyEdge], root: int = 0):
+        self.keys = keys
+        # Исходное написание (id, версия) для вывода
+        self.names = names
+        self.root = root
+        self._index: Dict[NodeKey, int] = {key: i for i, key in enumerate(keys)}
+
+        count = len(keys)
+        self.offsets, self.targets, order = _counting_sort(count, sources, targets)
+        self.dependencies = [dependencies[position] for position in order]
+        self.reverse_offsets, self.reverse_sources, _ = _counting_sort(count, targets, sources)
+
+    @classmethod
+    def from_edges(cls, names: Iterable[Tuple[str, str]], edges: Iterable[RawEdge]) -> 'CSRGraph':
+        """Построение из списка узлов (id, версия) и ребер; первый узел - корень"""
+        keys: List[NodeKey] = []
+        node_names: List[Tuple[str, str]] = []
+        index: Dict[NodeKey, int] = {}
+
+        def add(package_id: str, version: str) -> int:
+            key = node_key(package_id, version)
+            if key not in index:
+                index[key] = len(keys)
+                keys.append(key)
+                node_names.append((package_id, version))
+            return index[key]
+
+        for package_id, version in names:
+            add(package_id, version)
+
+        sources = array('i')
+        targets = array('i')
+        dependencies: List[DependencyEdge] = []
+        for parent, child, dependency in edges:
+            sources.append(add(*parent))
+            targets.append(add(*child))
+            dependencies.append(dependency)
+        return cls(keys, node_names, sources, targets, dependencies)
+
+    @classmethod
+    def from_graph(cls, graph: DependencyGraph) -> 'CSRGraph':
+        """Заморозка DependencyGraph; узлы нумеруются в порядке обхода в ширину,
+        чтобы соседи по обходу лежали рядом в массивах"""
+        order = [key for key, _ in graph.walk()]
+        reached = set(order)
+        order.extend(key for key in graph.nodes if key not in reached)
+        names = [(graph.nodes[key]['id'], graph.nodes[key]['version']) for key in order]
+
+        name_of = dict(zip(order, names))
+        edges = ((name_of[parent], name_of[child], dependency)
+                 for parent in order for child, dependency in graph.edges[parent])
+        return cls.from_edges(names, edges)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.keys)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def index_of(self, package_id: str, version: str) -> Optional[int]:
+        return self._index.get(node_key(package_id, version))
+
+    def successors(self, node: int) -> array:
+        """Пакеты, от которых зависит node"""
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def predecessors(self, node: int) -> array:
+        """Пакеты, которые зависят от node"""
+        return self.reverse_sources[self.reverse_offsets[node]:self.reverse_offsets[node + 1]]
+
+    def dependencies_of(self, node: int) -> List[DependencyEdge]:
+        """Записи зависимостей node в порядке successors(node)"""
+        return self.dependencies[self.offsets[node]:self.offsets[node + 1]]
+
+    def out_degree(self, node: int) -> int:
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def in_degree(self, node: int) -> int:
+        return self.reverse_offsets[node + 1] - self.reverse_offsets[node]
+
+    def _bfs(self, start: int, offsets: array, neighbors: array) -> List[int]:
+        seen = bytearray(len(self.keys))
+        seen[start] = 1
+        queue = [start]
+        for node in queue:
+            for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                if not seen[neighbor]:
+                    seen[neighbor] = 1
+                    queue.append(neighbor)
+        return queue[1:]
+
+    def reachable_from(self, node: int) -> List[int]:
+        """Все транзитивные зависимости node (без самого node) в порядке обхода в ширину"""
+        return self._bfs(node, self.offsets, self.targets)
+
+    def dependents_of(self, node: int) -> List[int]:
+        """Все пакеты, транзитивно зависящие от node"""
+        return self._bfs(node, self.reverse_offsets, self.reverse_sources)
+
+    def as_numpy(self) -> Dict[str, 'numpy.ndarray']:
+        """Массивы смежности как numpy.ndarray без копирования; требует установленный numpy"""
+        if numpy is None:
+            raise ImportError("Для as_numpy() требуется пакет numpy")
+        return {name: numpy.frombuffer(getattr(self, name), dtype=numpy.int32)
+                for name in ('offsets', 'targets', 'reverse_offsets', 'reverse_sources')}
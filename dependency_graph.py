@@ -0,0 +1,156 @@
+"""
+Граф зависимостей пакетов в памяти
+"""
+
+import sys
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Ключ узла: (id пакета в нижнем регистре, версия)
+NodeKey = Tuple[str, str]
+
+
+class DependencyEdge:
+    """Зависимость пакета: компактная замена словаря {'id', 'version_range', 'target_framework'}.
+
+    Поддерживает чтение в стиле словаря (dep['id'], dep.get(...)), поэтому
+    код вывода и фильтрации работает с ней так же, как со словарем."""
+
+    __slots__ = ('id', 'version_range', 'target_framework')
+
+    _FIELDS = ('id', 'version_range', 'target_framework')
+
+    def __init__(self, package_id: str, version_range: str, target_framework: str):
+        # Одинаковые строки из разных документов хранятся одним объектом. Таблица sys.intern
+        # не держит строки: интернированная строка освобождается вместе с последней ссылкой
+        self.id = sys.intern(package_id)
+        self.version_range = sys.intern(version_range)
+        self.target_framework = sys.intern(target_framework)
+
+    def __getitem__(self, key: str) -> str:
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._FIELDS else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._FIELDS
+
+    def to_dict(self) -> Dict[str, str]:
+        return {'id': self.id, 'version_range': self.version_range, 'target_framework': self.target_framework}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, DependencyEdge):
+            return (self.id, self.version_range, self.target_framework) == \
+                   (other.id, other.version_range, other.target_framework)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.id, self.version_range, self.target_framework))
+
+    def __repr__(self) -> str:
+        return f"DependencyEdge({self.id!r}, {self.version_range!r}, {self.target_framework!r})"
+
+
+def node_key(package_id: str, version: str) -> NodeKey:
+    """Ключ узла графа; id пакетов NuGet регистронезависимы"""
+    return package_id.lower(), version
+
+
+class GraphObserver:
+    """Получатель изменений графа по мере его построения (например, потоковый вывод DOT)"""
+
+    def on_node(self, key: NodeKey, package_id: str, version: str):
+        pass
+
+    def on_edge(self, parent: NodeKey, child: NodeKey, dependency: DependencyEdge):
+        pass
+
+    def on_error(self, key: NodeKey, message: str):
+        pass
+
+
+class DependencyGraph:
+    """Ориентированный граф (пакет, версия) -> зависимости"""
+
+    def __init__(self, root_id: str, root_version: str, observer: Optional[GraphObserver] = None):
+        self.nodes: Dict[NodeKey, Dict[str, Optional[str]]] = {}
+        self.edges: Dict[NodeKey, List[Tuple[NodeKey, DependencyEdge]]] = {}
+        self.observer = observer
+        self.root = self.add_node(root_id, root_version)
+        # Корни пакетного режима; root - первый из них
+        self.roots: List[NodeKey] = [self.root]
+
+    def add_root(self, package_id: str, version: str) -> NodeKey:
+        """Еще один корень общего графа (пакетный режим)"""
+        key = self.add_node(package_id, version)
+        if key not in self.roots:
+            self.roots.append(key)
+        return key
+
+    def add_node(self, package_id: str, version: str) -> NodeKey:
+        key = node_key(package_id, version)
+        if key not in self.nodes:
+            self.nodes[key] = {'id': package_id, 'version': version, 'error': None}
+            self.edges[key] = []
+            if self.observer is not None:
+                self.observer.on_node(key, package_id, version)
+        return key
+
+    def add_edge(self, parent: NodeKey, child: NodeKey, dependency: DependencyEdge):
+        """Добавление ребра; dependency - запись из _extract_dependencies"""
+        self.edges[parent].append((child, dependency))
+        if self.observer is not None:
+            self.observer.on_edge(parent, child, dependency)
+
+    def mark_error(self, key: NodeKey, message: str):
+        self.nodes[key]['error'] = message
+        if self.observer is not None:
+            self.observer.on_error(key, message)
+
+    def dependencies_of(self, key: NodeKey) -> List[DependencyEdge]:
+        """Прямые зависимости узла в формате _extract_dependencies"""
+        return [dependency for _, dependency in self.edges.get(key, [])]
+
+    def children(self, key: NodeKey) -> List[NodeKey]:
+        return [child for child, _ in self.edges.get(key, [])]
+
+    def walk(self, start: Optional[NodeKey] = None) -> Iterator[Tuple[NodeKey, int]]:
+        """Обход в ширину от корня (или от start): (узел, глубина)"""
+        start = self.root if start is None else start
+        seen = {start}
+        queue = deque([(start, 0)])
+        while queue:
+            key, depth = queue.popleft()
+            yield key, depth
+            for child in self.children(key):
+                if child not in seen:
+                    seen.add(child)
+                    queue.append((child, depth + 1))
+
+    def subgraph(self, start: NodeKey) -> 'DependencyGraph':
+        """Часть графа, достижимая из start, с start в качестве корня"""
+        node = self.nodes[start]
+        graph = DependencyGraph(node['id'], node['version'])
+        for key, _ in self.walk(start):
+            graph.nodes[key] = dict(self.nodes[key])
+            graph.edges[key] = list(self.edges[key])
+        return graph
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(edges) for edges in self.edges.values())
+
+    def __contains__(self, key: NodeKey) -> bool:
+        return key in self.nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
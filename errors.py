@@ -0,0 +1,18 @@
+"""
+Исключения инструмента визуализации зависимостей
+"""
+
+
+class ConfigError(Exception):
+    """Исключение для ошибок конфигурации"""
+    pass
+
+
+class NuGetError(Exception):
+    """Исключение для ошибок работы с NuGet API"""
+    pass
+
+
+class RenderError(Exception):
+    """Исключение для ошибок построения изображения графа"""
+    pass
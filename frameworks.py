@@ -0,0 +1,128 @@
+"""
+Целевые платформы (TFM) NuGet: разбор, совместимость и выбор ближайшей группы зависимостей
+
+Пакет объявляет зависимости группами по платформам (dependencyGroups с
+targetFramework). Проект, собираемый под одну платформу, использует только
+одну группу - ближайшую совместимую, как ее выбирает NuGet (FrameworkReducer):
+сначала та же платформа с наибольшей версией не выше версии проекта,
+затем .NET Standard, затем группа без платформы.
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+NET_FRAMEWORK = '.NETFramework'
+NET_CORE = '.NETCoreApp'
+NET_STANDARD = '.NETStandard'
+
+_LONG_NAMES = {
+    '.netframework': NET_FRAMEWORK,
+    '.netcoreapp': NET_CORE,
+    '.netstandard': NET_STANDARD,
+    'net': NET_FRAMEWORK,
+    'netcoreapp': NET_CORE,
+    'netstandard': NET_STANDARD,
+}
+
+# Короткие имена: net462, net48, netstandard2.0, netcoreapp3.1, net8.0, net8.0-windows
+_SHORT_RE = re.compile(r'^(netcoreapp|netstandard|net)(\d[\d.]*)(?:-([a-z]+)[\d.]*)?$')
+# Полные имена: .NETFramework4.6.2, .NETStandard2.0, .NETCoreApp3.1, .NETFramework,Version=v4.6.2
+_LONG_RE = re.compile(r'^(\.netframework|\.netcoreapp|\.netstandard)\s*(?:,\s*version\s*=\s*)?v?(\d[\d.]*)$')
+
+# Наибольшая версия .NET Standard, которую поддерживает .NET Framework / .NET Core данной версии
+_NETSTANDARD_SUPPORT = {
+    NET_FRAMEWORK: [((4, 5), (1, 1)), ((4, 5, 1), (1, 2)), ((4, 6), (1, 3)), ((4, 6, 1), (2, 0))],
+    NET_CORE: [((1, 0), (1, 6)), ((2, 0), (2, 0)), ((3, 0), (2, 1))],
+}
+
+# Группы без платформы ("any") подходят всем проектам
+AGNOSTIC = frozenset({'', 'any', 'unknown', 'agnostic'})
+
+
+class Framework(NamedTuple):
+    identifier: str
+    version: Tuple[int, ...]
+    platform: str = ''
+
+    def __str__(self) -> str:
+        version = '.'.join(map(str, self.version))
+        return f"{self.identifier}{version}" + (f"-{self.platform}" if self.platform else "")
+
+
+def _version(text: str, short: bool) -> Tuple[int, ...]:
+    if '.' not in text and short:
+        # net462 -> 4.6.2
+        parts = tuple(int(digit) for digit in text)
+    else:
+        parts = tuple(int(part) for part in text.split('.') if part)
+    # 4.6.0 и 4.6 - одна версия
+    while len(parts) > 2 and parts[-1] == 0:
+        parts = parts[:-1]
+    return parts + (0,) * (2 - len(parts))
+
+
+def parse_framework(text: Optional[str]) -> Optional[Framework]:
+    """Разбор TFM; None - неизвестная платформа или группа без платформы"""
+    value = (text or '').strip().lower()
+    match = _LONG_RE.match(value)
+    if match:
+        return Framework(_LONG_NAMES[match.group(1)], _version(match.group(2), short=False))
+    match = _SHORT_RE.match(value)
+    if not match:
+        return None
+    name, version_text, platform = match.groups()
+    version = _version(version_text, short=name == 'net' and '.' not in version_text)
+    identifier = _LONG_NAMES[name]
+    # net5.0 и новее - продолжение .NET Core
+    if identifier == NET_FRAMEWORK and version >= (5, 0):
+        identifier = NET_CORE
+    return Framework(identifier, version, platform or '')
+
+
+def _netstandard_support(framework: Framework) -> Optional[Tuple[int, ...]]:
+    supported = None
+    for minimum, standard in _NETSTANDARD_SUPPORT.get(framework.identifier, []):
+        if framework.version >= minimum:
+            supported = standard
+    return supported
+
+
+def is_compatible(project: Framework, package: Framework) -> bool:
+    """Может ли проект под project использовать группу пакета под package"""
+    if package.platform and package.platform != project.platform:
+        return False
+    if package.identifier == project.identifier:
+        return package.version <= project.version
+    if package.identifier == NET_STANDARD:
+        supported = _netstandard_support(project)
+        return supported is not None and package.version <= supported
+    return False
+
+
+def _preference(project: Framework, package: Framework) -> Tuple[int, Tuple[int, ...], int]:
+    """Чем больше, тем ближе: та же платформа, затем .NET Standard; внутри - большая версия;
+    при равенстве - группа под конкретную платформу ОС (net8.0-windows для net8.0-windows)"""
+    family = 2 if package.identifier == project.identifier else 1
+    return family, package.version, 1 if package.platform else 0
+
+
+def nearest_group(project: Framework, groups: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Ближайшая совместимая группа dependencyGroups либо None, если совместимых нет"""
+    best = None
+    best_key = None
+    agnostic = None
+    for group in groups:
+        if not isinstance(group, dict):
+            continue
+        name = (group.get('targetFramework') or '').strip()
+        if name.lower() in AGNOSTIC:
+            if agnostic is None:
+                agnostic = group
+            continue
+        framework = parse_framework(name)
+        if framework is None or not is_compatible(project, framework):
+            continue
+        key = _preference(project, framework)
+        if best_key is None or key > best_key:
+            best, best_key = group, key
+    return best if best is not None else agnostic
@@ -0,0 +1,270 @@
+"""
+Дисковый кэш HTTP ответов с проверкой актуальности по ETag/Last-Modified
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, Iterable, Optional
+
+INDEX_FILE = 'index.json'
+OBJECTS_DIR = 'objects'
+
+# Страницы каталога (catalog0/page123.json): последняя дописывается новыми коммитами
+_CATALOG_PAGE_RE = re.compile(r'^page\d+\.json$')
+
+
+def is_immutable(url: str) -> bool:
+    """Документы конкретной версии пакета (лист регистрации, лист каталога) не меняются.
+
+    Индексы регистрации и каталога (index.json), их страницы (/page/..., pageN.json)
+    и индекс сервисов изменяются при публикации новых версий и требуют проверки актуальности."""
+    path = urllib.parse.urlsplit(url).path
+    name = path.rsplit('/', 1)[-1]
+    return (name.endswith('.json') and name != 'index.json' and '/page/' not in path
+            and not _CATALOG_PAGE_RE.match(name))
+
+
+class CacheEntry:
+    """Запись кэша: ссылка на тело ответа по хэшу содержимого и валидаторы"""
+
+    __slots__ = ('url', 'digest', 'size', 'etag', 'last_modified', 'atime')
+
+    def __init__(self, url: str, digest: str, size: int, etag: Optional[str] = None,
+                 last_modified: Optional[str] = None, atime: float = 0.0):
+        self.url = url
+        self.digest = digest
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.atime = atime
+
+    @property
+    def immutable(self) -> bool:
+        return is_immutable(self.url)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'digest': self.digest, 'size': self.size, 'etag': self.etag,
+                'last_modified': self.last_modified, 'atime': self.atime}
+
+
+class HTTPCache:
+    """Content-addressed кэш: тела ответов хранятся в objects/<sha256>,
+    соответствие URL -> тело и валидаторы - в index.json.
+    При превышении max_bytes вытесняются давно не использованные записи."""
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CacheEntry] = {}
+        # Число URL, ссылающихся на каждое тело, и суммарный размер уникальных тел
+        self._refs: Dict[str, int] = {}
+        self._bytes = 0
+        self._dirty = False
+        # Счетчики за время работы процесса
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.join(directory, OBJECTS_DIR), exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            # Отсутствующий или поврежденный индекс - начинаем с пустого кэша
+            return
+        for url, data in raw.get('entries', {}).items():
+            self._add(CacheEntry(url, data['digest'], data['size'], data.get('etag'),
+                                 data.get('last_modified'), data.get('atime', 0.0)))
+
+    def _add(self, entry: CacheEntry) -> Optional[str]:
+        """Добавление записи; возвращает хэш тела, ставшего ненужным после замены"""
+        orphan = self._remove(entry.url)
+        self._entries[entry.url] = entry
+        refs = self._refs.get(entry.digest, 0)
+        if refs == 0:
+            self._bytes += entry.size
+        self._refs[entry.digest] = refs + 1
+        return orphan if orphan != entry.digest else None
+
+    def _remove(self, url: str) -> Optional[str]:
+        """Удаление записи; возвращает хэш тела, если на него больше никто не ссылается"""
+        entry = self._entries.pop(url, None)
+        if entry is None:
+            return None
+        self._refs[entry.digest] -= 1
+        if self._refs[entry.digest] == 0:
+            del self._refs[entry.digest]
+            self._bytes -= entry.size
+            return entry.digest
+        return None
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, OBJECTS_DIR, digest[:2], digest)
+
+    @property
+    def total_bytes(self) -> int:
+        """Размер уникальных тел (одинаковые ответы хранятся один раз)"""
+        return self._bytes
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and not os.path.exists(self._object_path(entry.digest)):
+                self._remove(url)
+                return None
+            return entry
+
+    def read_body(self, entry: CacheEntry) -> Optional[bytes]:
+        try:
+            with open(self._object_path(entry.digest), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def conditional_headers(self, entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Заголовки условного запроса для проверки актуальности записи"""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def get_fresh(self, url: str) -> Optional[bytes]:
+        """Тело ответа, которое можно отдать без обращения к сети (только неизменяемые документы)"""
+        entry = self.lookup(url)
+        if entry is None or not entry.immutable:
+            return None
+        body = self.read_body(entry)
+        if body is not None:
+            self._touch(entry)
+            with self._lock:
+                self.hits += 1
+        return body
+
+    def handle_response(self, url: str, entry: Optional[CacheEntry], status: int,
+                        headers: Dict[str, str], body: bytes) -> Optional[bytes]:
+        """Обработка ответа на (возможно условный) запрос; возвращает актуальное тело.
+
+        None - ответ 304, но сохраненного тела уже нет (вытеснено или удалено после отправки
+        валидаторов): запись удалена, запрос нужно повторить без условных заголовков"""
+        if status == 304:
+            cached = self.read_body(entry) if entry is not None else None
+            if cached is None:
+                # Пустое тело ответа 304 не сохраняется
+                self.discard(url)
+                return None
+            self._touch(entry)
+            with self._lock:
+                self.hits += 1
+                self.revalidated += 1
+            return cached
+
+        with self._lock:
+            self.misses += 1
+        self.store(url, body, headers.get('etag'), headers.get('last-modified'))
+        return body
+
+    def store(self, url: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            # Запись через временный файл, чтобы параллельный читатель не увидел половину тела
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(object_path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, object_path)
+
+        with self._lock:
+            orphan = self._add(CacheEntry(url, digest, len(body), etag, last_modified, time.time()))
+            self._dirty = True
+            if orphan is not None:
+                self._delete_object(orphan)
+            self._evict()
+
+    def discard(self, url: str):
+        """Удаление записи URL"""
+        with self._lock:
+            orphan = self._remove(url)
+            self._dirty = True
+            if orphan is not None:
+                self._delete_object(orphan)
+
+    def invalidate_prefixes(self, prefixes: Iterable[str]) -> int:
+        """Удаление всех записей, URL которых начинается с одного из префиксов; возвращает их число"""
+        prefixes = tuple(prefixes)
+        if not prefixes:
+            return 0
+        with self._lock:
+            stale = [url for url in self._entries if url.startswith(prefixes)]
+            for url in stale:
+                orphan = self._remove(url)
+                if orphan is not None:
+                    self._delete_object(orphan)
+            if stale:
+                self._dirty = True
+        return len(stale)
+
+    def _delete_object(self, digest: str):
+        try:
+            os.remove(self._object_path(digest))
+        except OSError:
+            pass
+
+    def _touch(self, entry: CacheEntry):
+        with self._lock:
+            entry.atime = time.time()
+            self._dirty = True
+
+    def _evict(self):
+        """Вытеснение давно не использованных записей (вызывается под блокировкой).
+
+        Освобождается место с запасом до 90% лимита, чтобы не сортировать записи на каждой вставке"""
+        if self._bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for entry in sorted(self._entries.values(), key=lambda e: e.atime):
+            if self._bytes <= target:
+                break
+            orphan = self._remove(entry.url)
+            self.evictions += 1
+            if orphan is not None:
+                self._delete_object(orphan)
+
+    def save(self):
+        """Сохранение индекса на диск"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'entries': {url: entry.to_dict() for url, entry in self._entries.items()}}
+            self._dirty = False
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, os.path.join(self.directory, INDEX_FILE))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+            }
@@ -0,0 +1,489 @@
+"""
+Пул постоянных (keep-alive) HTTP соединений для запросов к NuGet API
+"""
+
+import contextlib
+import http.client
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from instrumentation import Instrumentation
+from rate_limit import RateLimiter, RetryPolicy, retry_delay
+
+
+class HTTPStatusError(Exception):
+    """Сервер вернул код ответа, отличный от 2xx/3xx"""
+
+    def __init__(self, url: str, code: int, reason: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"HTTP {code}: {reason}")
+        self.url = url
+        self.code = code
+        self.reason = reason
+        self.headers = headers or {}
+
+
+class HTTPResponse:
+    """Полностью прочитанный ответ сервера; body уже распакован,
+    wire_bytes - размер тела в том виде, в котором оно пришло по сети"""
+
+    def __init__(self, url: str, status: int, reason: str, headers: Dict[str, str], body: bytes,
+                 wire_bytes: Optional[int] = None):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.wire_bytes = len(body) if wire_bytes is None else wire_bytes
+
+
+class ContentDecoder:
+    """Потоковая распаковка тела ответа по заголовку Content-Encoding (gzip, deflate)"""
+
+    def __init__(self, encoding: Optional[str]):
+        self.encoding = (encoding or 'identity').strip().lower()
+        if self.encoding in ('gzip', 'x-gzip'):
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding == 'deflate':
+            self._decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+        elif self.encoding == 'identity':
+            self._decompressor = None
+        else:
+            raise ValueError(f"Неподдерживаемый Content-Encoding: {self.encoding}")
+        self._parts: List[bytes] = []
+        self._raw_deflate_checked = False
+        self.wire_bytes = 0
+
+    def decode(self, chunk: bytes) -> bytes:
+        """Распаковка очередного фрагмента тела"""
+        self.wire_bytes += len(chunk)
+        if self._decompressor is None:
+            return chunk
+        try:
+            data = self._decompressor.decompress(chunk)
+        except zlib.error:
+            # Часть серверов отдает "deflate" без zlib-заголовка
+            if self.encoding != 'deflate' or self._raw_deflate_checked:
+                raise
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            data = self._decompressor.decompress(chunk)
+        self._raw_deflate_checked = True
+        return data
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush() if self._decompressor is not None else b''
+
+    def feed(self, chunk: bytes):
+        self._parts.append(self.decode(chunk))
+
+    def finish(self) -> bytes:
+        self._parts.append(self.flush())
+        return b''.join(self._parts)
+
+
+class ResponseStream:
+    """Ответ, тело которого читается и распаковывается по частям"""
+
+    def __init__(self, url: str, response: http.client.HTTPResponse):
+        self.url = url
+        self.status = response.status
+        self.headers = {k.lower(): v for k, v in response.getheaders()}
+        self._response = response
+        self._decoder = ContentDecoder(response.getheader('Content-Encoding'))
+        self.decoded_bytes = 0
+        # True, если тело прочитано до конца и соединение можно вернуть в пул
+        self.complete = False
+
+    @property
+    def wire_bytes(self) -> int:
+        return self._decoder.wire_bytes
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        while True:
+            raw = self._response.read(_READ_CHUNK)
+            data = self._decoder.decode(raw) if raw else self._decoder.flush()
+            if data:
+                self.decoded_bytes += len(data)
+                yield data
+            if not raw:
+                self.complete = True
+                return
+
+
+class TransferStats:
+    """Объем переданных данных: байты по сети и после распаковки"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+
+    def record(self, wire_bytes: int, decoded_bytes: int):
+        with self._lock:
+            self.responses += 1
+            self.wire_bytes += wire_bytes
+            self.decoded_bytes += decoded_bytes
+
+    def summary(self) -> str:
+        ratio = (1 - self.wire_bytes / self.decoded_bytes) * 100 if self.decoded_bytes else 0.0
+        return (f"ответов: {self.responses}, по сети: {self.wire_bytes / 1024:.1f} КБ, "
+                f"после распаковки: {self.decoded_bytes / 1024:.1f} КБ (экономия {ratio:.0f}%)")
+
+
+# Ошибки, после которых повторно использованное соединение считается "протухшим":
+# сервер закрыл его, пока оно лежало в пуле
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+# Сетевые ошибки, после которых запрос повторяется по RetryPolicy
+_RETRY_ERRORS = (OSError, http.client.HTTPException)
+
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 5
+_READ_CHUNK = 64 * 1024
+
+DEFAULT_ACCEPT_ENCODING = 'gzip, deflate'
+
+HostKey = Tuple[str, str, int]
+
+# Контекст TLS общий для всех пулов процесса: загрузка системных сертификатов занимает
+# десятки миллисекунд, и для фидов по http она не нужна вовсе
+_ssl_context: Optional[ssl.SSLContext] = None
+_ssl_lock = threading.Lock()
+
+
+def default_ssl_context() -> ssl.SSLContext:
+    """TLS контекст, создаваемый при первом https соединении"""
+    global _ssl_context
+    with _ssl_lock:
+        if _ssl_context is None:
+            _ssl_context = ssl.create_default_context()
+        return _ssl_context
+
+
+class ConnectionPool:
+    """Пул соединений: не более max_per_host соединений на хост,
+    простаивающие дольше idle_timeout секунд закрываются.
+
+    rate_limiter ограничивает частоту запросов к хосту, retry_policy задает
+    повторы после сетевых ошибок и ответов 429/502/503/504. Включенный
+    instrumentation получает замеры http.dns, http.tcp, http.tls (новые
+    соединения), http.ttfb (отправка запроса и ожидание заголовков) и http.body"""
+
+    def __init__(self, max_per_host: int = 4, idle_timeout: float = 30.0, timeout: float = 30.0,
+                 accept_encoding: Optional[str] = DEFAULT_ACCEPT_ENCODING,
+                 transfer_stats: Optional[TransferStats] = None,
+                 rate_limiter: Optional[RateLimiter] = None, retry_policy: Optional[RetryPolicy] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        if max_per_host < 1:
+            raise ValueError("max_per_host должен быть >= 1")
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.accept_encoding = accept_encoding
+        self.transfer_stats = transfer_stats or TransferStats()
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.instrumentation = instrumentation or Instrumentation(enabled=False)
+        self._lock = threading.Lock()
+        self._idle: Dict[HostKey, List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._slots: Dict[HostKey, threading.BoundedSemaphore] = {}
+        # Статистика использования пула
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.connections_evicted = 0
+
+    @staticmethod
+    def _host_key(parsed: urllib.parse.SplitResult) -> HostKey:
+        scheme = parsed.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise ValueError(f"Неподдерживаемая схема URL: {scheme}")
+        port = parsed.port or (443 if scheme == 'https' else 80)
+        return scheme, (parsed.hostname or '').lower(), port
+
+    def _slot(self, key: HostKey) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._slots[key] = slot
+            return slot
+
+    def _new_connection(self, key: HostKey) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        with self._lock:
+            self.connections_created += 1
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=default_ssl_context())
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        if self.instrumentation.enabled:
+            self._connect_measured(conn, scheme == 'https')
+        return conn
+
+    def _connect_measured(self, conn: http.client.HTTPConnection, tls: bool):
+        """Подключение заранее, а не при первом запросе, с раздельными замерами DNS, TCP и TLS"""
+        marks = {}
+
+        def create_connection(address, timeout, source_address=None):
+            started = time.perf_counter()
+            infos = socket.getaddrinfo(address[0], address[1], 0, socket.SOCK_STREAM)
+            marks['dns'] = time.perf_counter()
+            self.instrumentation.record('http.dns', marks['dns'] - started)
+            error: Optional[OSError] = None
+            for family, socktype, proto, _, sockaddr in infos:
+                sock = socket.socket(family, socktype, proto)
+                try:
+                    sock.settimeout(timeout)
+                    if source_address:
+                        sock.bind(source_address)
+                    sock.connect(sockaddr)
+                except OSError as e:
+                    sock.close()
+                    error = e
+                    continue
+                marks['tcp'] = time.perf_counter()
+                self.instrumentation.record('http.tcp', marks['tcp'] - marks['dns'])
+                return sock
+            raise error or OSError(f"Не удалось подключиться к {address[0]}:{address[1]}")
+
+        # HTTPConnection.connect открывает сокет через _create_connection, HTTPSConnection затем выполняет TLS
+        conn._create_connection = create_connection
+        try:
+            conn.connect()
+        except BaseException:
+            conn.close()
+            raise
+        if tls:
+            self.instrumentation.record('http.tls', time.perf_counter() - marks['tcp'])
+
+    def _evict_expired(self, now: float):
+        """Закрытие соединений, простаивающих дольше idle_timeout (вызывается под блокировкой)"""
+        for key, idle in self._idle.items():
+            alive = []
+            for conn, last_used in idle:
+                if now - last_used > self.idle_timeout:
+                    conn.close()
+                    self.connections_evicted += 1
+                else:
+                    alive.append((conn, last_used))
+            self._idle[key] = alive
+
+    def _acquire(self, key: HostKey) -> Tuple[http.client.HTTPConnection, bool]:
+        """Возвращает (соединение, было_ли_оно_в_пуле)"""
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            idle = self._idle.get(key)
+            if idle:
+                conn, _ = idle.pop()
+                self.connections_reused += 1
+                return conn, True
+        return self._new_connection(key), False
+
+    def _release(self, key: HostKey, conn: http.client.HTTPConnection):
+        with self._lock:
+            self._idle.setdefault(key, []).append((conn, time.monotonic()))
+
+    def _prepare_headers(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        headers = dict(headers or {})
+        if self.accept_encoding:
+            headers.setdefault('Accept-Encoding', self.accept_encoding)
+        return headers
+
+    @staticmethod
+    def _split_url(url: str) -> Tuple[HostKey, str]:
+        parsed = urllib.parse.urlsplit(url)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+        return ConnectionPool._host_key(parsed), path
+
+    def _wait_for_token(self, key: HostKey):
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(key)
+            if delay > 0:
+                time.sleep(delay)
+
+    def _on_success(self, key: HostKey):
+        if self.rate_limiter is not None:
+            self.rate_limiter.on_success(key)
+
+    def request(self, url: str, headers: Optional[Dict[str, str]] = None) -> HTTPResponse:
+        """GET запрос через пул с обработкой перенаправлений и повторами"""
+        headers = self._prepare_headers(headers)
+        attempt = redirects = 0
+        while True:
+            key, _ = self._split_url(url)
+            self._wait_for_token(key)
+            try:
+                response = self._request_once(url, headers)
+            except _RETRY_ERRORS:
+                delay = retry_delay(self.rate_limiter, self.retry_policy, key, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            self.transfer_stats.record(response.wire_bytes, len(response.body))
+            if response.status in _REDIRECT_CODES and 'location' in response.headers:
+                redirects += 1
+                if redirects > _MAX_REDIRECTS:
+                    raise HTTPStatusError(url, 310, "Слишком много перенаправлений")
+                url = urllib.parse.urljoin(url, response.headers['location'])
+                continue
+            if response.status >= 400:
+                delay = retry_delay(self.rate_limiter, self.retry_policy, key, attempt,
+                                    response.status, response.headers)
+                if delay is None:
+                    raise HTTPStatusError(url, response.status, response.reason, response.headers)
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._on_success(key)
+            return response
+
+    @contextlib.contextmanager
+    def stream(self, url: str, headers: Optional[Dict[str, str]] = None) -> Iterator[ResponseStream]:
+        """GET запрос, тело которого читается по частям через ResponseStream.iter_chunks().
+
+        Повторы возможны только до начала чтения тела. Если тело дочитано
+        не до конца, соединение закрывается, а не возвращается в пул"""
+        headers = self._prepare_headers(headers)
+        attempt = redirects = 0
+        delay = 0.0
+        while True:
+            if delay:
+                time.sleep(delay)
+            key, path = self._split_url(url)
+            self._wait_for_token(key)
+            slot = self._slot(key)
+            slot.acquire()
+            try:
+                try:
+                    conn, response = self._open_response(key, path, headers)
+                except _RETRY_ERRORS:
+                    delay = retry_delay(self.rate_limiter, self.retry_policy, key, attempt)
+                    if delay is None:
+                        raise
+                    attempt += 1
+                    continue
+
+                if response.status in _REDIRECT_CODES or response.status >= 400:
+                    # Короткие служебные ответы дочитываем целиком, как в request()
+                    full = self._read_full(url, conn, response)
+                    self._finish(key, conn, response)
+                    self.transfer_stats.record(full.wire_bytes, len(full.body))
+                    if response.status in _REDIRECT_CODES and 'location' in full.headers:
+                        redirects += 1
+                        if redirects > _MAX_REDIRECTS:
+                            raise HTTPStatusError(url, 310, "Слишком много перенаправлений")
+                        url = urllib.parse.urljoin(url, full.headers['location'])
+                        delay = 0.0
+                        continue
+                    delay = retry_delay(self.rate_limiter, self.retry_policy, key, attempt, full.status, full.headers)
+                    if delay is None:
+                        raise HTTPStatusError(url, full.status, full.reason, full.headers)
+                    attempt += 1
+                    continue
+
+                self._on_success(key)
+                stream = ResponseStream(url, response)
+                try:
+                    yield stream
+                except BaseException:
+                    conn.close()
+                    raise
+                finally:
+                    self.transfer_stats.record(stream.wire_bytes, stream.decoded_bytes)
+                if stream.complete:
+                    self._finish(key, conn, response)
+                else:
+                    conn.close()
+                return
+            finally:
+                slot.release()
+
+    def _request_once(self, url: str, headers: Dict[str, str]) -> HTTPResponse:
+        key, path = self._split_url(url)
+        slot = self._slot(key)
+        slot.acquire()
+        try:
+            conn, response = self._open_response(key, path, headers)
+            result = self._read_full(url, conn, response)
+            self._finish(key, conn, response)
+            return result
+        finally:
+            slot.release()
+
+    def _open_response(self, key: HostKey, path: str,
+                       headers: Dict[str, str]) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Отправка запроса и чтение заголовков ответа"""
+        conn, reused = self._acquire(key)
+        try:
+            with self.instrumentation.span('http.ttfb'):
+                return conn, self._send(conn, path, headers)
+        except _STALE_ERRORS:
+            if not reused:
+                raise
+        # Сервер закрыл соединение из пула - повторяем на свежем
+        conn = self._new_connection(key)
+        with self.instrumentation.span('http.ttfb'):
+            return conn, self._send(conn, path, headers)
+
+    @staticmethod
+    def _send(conn: http.client.HTTPConnection, path: str, headers: Dict[str, str]) -> http.client.HTTPResponse:
+        try:
+            conn.request('GET', path, headers=headers)
+            return conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+
+    def _read_full(self, url: str, conn: http.client.HTTPConnection,
+                   response: http.client.HTTPResponse) -> HTTPResponse:
+        """Чтение всего тела: без этого соединение нельзя вернуть в пул;
+        сжатое тело распаковывается по мере чтения"""
+        try:
+            with self.instrumentation.span('http.body') as span:
+                decoder = ContentDecoder(response.getheader('Content-Encoding'))
+                while True:
+                    chunk = response.read(_READ_CHUNK)
+                    if not chunk:
+                        break
+                    decoder.feed(chunk)
+                body = decoder.finish()
+                span.bytes = decoder.wire_bytes
+        except BaseException:
+            conn.close()
+            raise
+        return HTTPResponse(url, response.status, response.reason,
+                            {k.lower(): v for k, v in response.getheaders()}, body, decoder.wire_bytes)
+
+    def _finish(self, key: HostKey, conn: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+    def close(self):
+        """Закрытие всех простаивающих соединений"""
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'created': self.connections_created,
+                'reused': self.connections_reused,
+                'evicted': self.connections_evicted,
+                'idle': sum(len(idle) for idle in self._idle.values()),
+            }
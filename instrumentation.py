@@ -0,0 +1,139 @@
+"""
+Замеры времени этапов запуска: HTTP (DNS, TCP, TLS, ожидание ответа, тело),
+разбор JSON, извлечение зависимостей, фильтрация
+
+Участок кода оборачивается в span:
+
+    with instrumentation.span('json.parse') as span:
+        data = json.loads(body)
+        span.bytes = len(body)
+
+Длительности одноименных span собираются в гистограмму (число, сумма,
+перцентили, байты). Выключенный Instrumentation возвращает общий пустой span,
+поэтому цена замера в обычном запуске - один вызов метода.
+"""
+
+import json
+import math
+import threading
+import time
+from array import array
+from typing import Any, Dict, Union
+
+
+class Histogram:
+    """Длительности одного вида span (в секундах) и переданные байты"""
+
+    def __init__(self):
+        self.samples = array('d')
+        self.total = 0.0
+        self.bytes = 0
+        self.errors = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+
+    def add(self, seconds: float, nbytes: int = 0, error: bool = False):
+        self.samples.append(seconds)
+        self.total += seconds
+        self.bytes += nbytes
+        if error:
+            self.errors += 1
+
+    def percentile(self, percent: float) -> float:
+        return _nearest_rank(sorted(self.samples), percent)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        return {'count': self.count, 'errors': self.errors, 'total': self.total, 'bytes': self.bytes,
+                'p50': _nearest_rank(ordered, 50), 'p95': _nearest_rank(ordered, 95),
+                'p99': _nearest_rank(ordered, 99), 'max': ordered[-1] if ordered else 0.0}
+
+
+def _nearest_rank(ordered, percent: float) -> float:
+    """Перцентиль отсортированной выборки по ближайшему рангу"""
+    if not ordered:
+        return 0.0
+    return ordered[max(1, math.ceil(percent / 100 * len(ordered))) - 1]
+
+
+class Span:
+    """Замер одного участка; bytes можно заполнить внутри блока with"""
+
+    __slots__ = ('_owner', 'name', 'bytes', '_started')
+
+    def __init__(self, owner: 'Instrumentation', name: str):
+        self._owner = owner
+        self.name = name
+        self.bytes = 0
+        self._started = 0.0
+
+    def __enter__(self) -> 'Span':
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._owner.record(self.name, time.perf_counter() - self._started, self.bytes, exc_type is not None)
+
+
+class _NullSpan:
+    """Span выключенного Instrumentation: не читает время и ничего не записывает"""
+
+    __slots__ = ('bytes',)
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Instrumentation:
+    """Гистограммы span по именам (потокобезопасно)"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Histogram] = {}
+        self.started = time.perf_counter()
+
+    def span(self, name: str) -> Union[Span, _NullSpan]:
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name: str, seconds: float, nbytes: int = 0, error: bool = False):
+        """Запись готового замера (когда участок неудобно обернуть в with)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds, nbytes, error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+        return {'wall_time': time.perf_counter() - self.started, 'spans': spans}
+
+    def report(self) -> str:
+        """Таблица для вывода в конце запуска (время в миллисекундах)"""
+        data = self.to_dict()
+        lines = [f"{'span':16} {'count':>7} {'errors':>6} {'total, s':>9} {'p50':>8} {'p95':>8} {'p99':>8} "
+                 f"{'max':>8} {'KB':>10}"]
+        for name, summary in data['spans'].items():
+            lines.append(f"{name:16} {summary['count']:7d} {summary['errors']:6d} {summary['total']:9.3f} "
+                         f"{summary['p50'] * 1000:8.2f} {summary['p95'] * 1000:8.2f} {summary['p99'] * 1000:8.2f} "
+                         f"{summary['max'] * 1000:8.2f} {summary['bytes'] / 1024:10.1f}")
+        lines.append(f"Время запуска: {data['wall_time']:.3f} с (span вложены и выполняются параллельно, "
+                     f"суммы не складываются)")
+        return '\n'.join(lines)
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
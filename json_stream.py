@@ -0,0 +1,133 @@
+"""
+Потоковый разбор индекса регистрации пакета NuGet
+
+Индекс пакета с тысячами версий весит мегабайты. Вместо json.loads всего
+документа разбираются только элементы items[*].items[*] по мере поступления
+данных, и чтение можно прекратить, как только нужная версия найдена.
+"""
+
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Сколько прочитанного текста накапливать перед тем, как отбросить разобранное начало буфера
+_COMPACT_THRESHOLD = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _TextReader:
+    """Буфер текста поверх потока байтов с разбором значений через json.JSONDecoder.raw_decode"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Дочитывание следующего фрагмента; False, если поток закончился"""
+        if self.eof:
+            return False
+        if self.pos > _COMPACT_THRESHOLD:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.text += self._decoder.decode(b'', final=True)
+            self.eof = True
+            return False
+        self.text += self._decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """Следующий значащий символ (пробелы пропускаются); '' в конце потока"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        actual = self.peek()
+        if actual != char:
+            raise ValueError(f"Ожидался '{char}', получено '{actual or 'конец данных'}' в позиции {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Разбор одного JSON значения целиком"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Число на границе фрагмента могло быть разобрано не полностью
+            if end == len(self.text) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def object_keys(self) -> Iterator[str]:
+        """Ключи объекта; значение каждого ключа должен разобрать вызывающий код"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def array_items(self) -> Iterator[None]:
+        """Элементы массива; каждый элемент должен разобрать вызывающий код"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield None
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+def iter_registration_leaves(chunks: Iterable[bytes],
+                             stub_pages: Optional[List[Dict[str, Any]]] = None) -> Iterator[Dict[str, Any]]:
+    """Листья items[*].items[*] индекса регистрации в порядке следования.
+
+    Страницы без встроенных items (только ссылка @id и границы lower/upper)
+    не дают листьев; если передан список stub_pages, они добавляются в него."""
+    reader = _TextReader(chunks)
+    for key in reader.object_keys():
+        if key != 'items' or reader.peek() != '[':
+            reader.value()
+            continue
+        for _ in reader.array_items():
+            if reader.peek() != '{':
+                reader.value()
+                continue
+            page: Dict[str, Any] = {}
+            inlined = False
+            for page_key in reader.object_keys():
+                if page_key != 'items' or reader.peek() != '[':
+                    page[page_key] = reader.value()
+                    continue
+                inlined = True
+                for _ in reader.array_items():
+                    yield reader.value()
+            if not inlined and stub_pages is not None:
+                stub_pages.append(page)
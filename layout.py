@@ -0,0 +1,322 @@
+"""
+Послойная раскладка графа зависимостей (метод Сугиямы) и вывод в SVG
+
+Этапы:
+    1. Разрыв циклов: обратные ребра обхода в глубину от корня не участвуют в раскладке.
+    2. Слои: длиннейший путь от корневого пакета.
+    3. Порядок в слоях: проходы барицентров сверху вниз и снизу вверх.
+    4. Координаты: узел тянется к среднему положению родителей с сохранением
+       порядка и минимального зазора.
+
+Фиктивные узлы на длинных ребрах не создаются: для больших графов их число
+растет как сумма длин ребер. Вместо этого барицентр считается по
+нормированным позициям соседей из любых слоев выше (ниже) текущего, а длинные
+ребра рисуются кривыми. При установленном numpy и широких слоях проходы
+барицентров и назначение координат векторизуются по слоям.
+"""
+
+import html
+from array import array
+from typing import Collection, Iterator, List, Optional, Tuple
+
+from csr_graph import CSRGraph
+from dependency_graph import NodeKey
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NODE_WIDTH = 180
+NODE_HEIGHT = 36
+H_GAP = 20
+V_GAP = 80
+MARGIN = 20
+
+# Средняя ширина слоя, начиная с которой numpy по умолчанию быстрее чистого Python
+NUMPY_MIN_LAYER_WIDTH = 32
+
+# Пары (сосед, узел слоя) для расчета барицентров одного слоя
+LayerPairs = Tuple[List[int], List[int]]
+
+
+def _back_edges(graph: CSRGraph) -> bytearray:
+    """Обратные ребра обхода в глубину (итеративного, без рекурсии); 1 - ребро замыкает цикл"""
+    offsets, targets = graph.offsets, graph.targets
+    state = bytearray(graph.node_count)  # 0 - не посещен, 1 - в стеке, 2 - обработан
+    back = bytearray(graph.edge_count)
+    starts = [graph.root] + [node for node in range(graph.node_count) if node != graph.root]
+    for start in starts:
+        if state[start]:
+            continue
+        state[start] = 1
+        stack = [[start, offsets[start]]]
+        while stack:
+            frame = stack[-1]
+            node, edge = frame
+            if edge < offsets[node + 1]:
+                frame[1] = edge + 1
+                target = targets[edge]
+                if state[target] == 0:
+                    state[target] = 1
+                    stack.append([target, offsets[target]])
+                elif state[target] == 1:
+                    back[edge] = 1
+            else:
+                state[node] = 2
+                stack.pop()
+    return back
+
+
+def _longest_path_layers(graph: CSRGraph, back: bytearray) -> array:
+    """Слой узла - длина длиннейшего пути до него без обратных ребер"""
+    offsets, targets = graph.offsets, graph.targets
+    indegree = array('i', [0]) * graph.node_count
+    for edge, target in enumerate(targets):
+        if not back[edge]:
+            indegree[target] += 1
+
+    layer = array('i', [0]) * graph.node_count
+    queue = [node for node in range(graph.node_count) if indegree[node] == 0]
+    for node in queue:
+        next_layer = layer[node] + 1
+        for edge in range(offsets[node], offsets[node + 1]):
+            if back[edge]:
+                continue
+            target = targets[edge]
+            if layer[target] < next_layer:
+                layer[target] = next_layer
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                queue.append(target)
+    return layer
+
+
+class LayeredLayout:
+    """Раскладка CSRGraph: слои, порядок в слоях и координаты узлов"""
+
+    def __init__(self, graph: CSRGraph, sweeps: int = 4, use_numpy: Optional[bool] = None):
+        if use_numpy and numpy is None:
+            raise ImportError("Для use_numpy=True требуется пакет numpy")
+        self.graph = graph
+
+        self.back = _back_edges(graph)
+        self.layer = _longest_path_layers(graph, self.back)
+        layer_count = max(self.layer, default=0) + 1
+        if use_numpy is None:
+            # На узких слоях накладные расходы вызовов numpy больше выигрыша
+            use_numpy = numpy is not None and graph.node_count >= NUMPY_MIN_LAYER_WIDTH * layer_count
+        self.use_numpy = use_numpy
+        self.layers: List[List[int]] = [[] for _ in range(layer_count)]
+        for node, node_layer in enumerate(self.layer):
+            self.layers[node_layer].append(node)
+
+        # Пары для барицентров: down[L] - (родитель, узел слоя L), up[L] - (потомок, узел слоя L)
+        self.down: List[LayerPairs] = [([], []) for _ in range(layer_count)]
+        self.up: List[LayerPairs] = [([], []) for _ in range(layer_count)]
+        for source in range(graph.node_count):
+            for edge in range(graph.offsets[source], graph.offsets[source + 1]):
+                if self.back[edge]:
+                    continue
+                target = graph.targets[edge]
+                self.down[self.layer[target]][0].append(source)
+                self.down[self.layer[target]][1].append(target)
+                self.up[self.layer[source]][0].append(target)
+                self.up[self.layer[source]][1].append(source)
+
+        # Проход барицентров может и увеличить число пересечений - сохраняется лучший порядок
+        best = crossings(self)
+        best_layers = [list(nodes) for nodes in self.layers]
+        for _ in range(sweeps):
+            if best == 0:
+                break
+            if self.use_numpy:
+                self._order_numpy(1)
+            else:
+                self._order_python(1)
+            current = crossings(self)
+            if current < best:
+                best = current
+                best_layers = [list(nodes) for nodes in self.layers]
+        self.layers = best_layers
+        self.x = self._coordinates_numpy() if self.use_numpy else self._coordinates_python()
+        shift = MARGIN - min(self.x, default=MARGIN)
+        self.x = [x + shift for x in self.x]
+        self.width = int(max(self.x, default=0) + NODE_WIDTH + MARGIN)
+        self.height = int(layer_count * (NODE_HEIGHT + V_GAP) - V_GAP + 2 * MARGIN)
+
+    def y(self, node: int) -> int:
+        return MARGIN + self.layer[node] * (NODE_HEIGHT + V_GAP)
+
+    def _sweep_order(self, sweeps: int) -> Iterator[Tuple[int, str]]:
+        """Слои в порядке проходов: вниз (по родителям, 'down'), затем вверх (по потомкам, 'up')"""
+        count = len(self.layers)
+        for _ in range(sweeps):
+            for layer in range(1, count):
+                yield layer, 'down'
+            for layer in range(count - 2, -1, -1):
+                yield layer, 'up'
+
+    def _order_python(self, sweeps: int):
+        position = [0.0] * self.graph.node_count
+        for nodes in self.layers:
+            for index, node in enumerate(nodes):
+                position[node] = (index + 0.5) / len(nodes)
+
+        for layer, direction in self._sweep_order(sweeps):
+            neighbors, members = (self.down if direction == 'down' else self.up)[layer]
+            sums = {}
+            counts = {}
+            for neighbor, member in zip(neighbors, members):
+                sums[member] = sums.get(member, 0.0) + position[neighbor]
+                counts[member] = counts.get(member, 0) + 1
+            nodes = self.layers[layer]
+            # Узел без соседей сохраняет свою позицию; при равенстве - прежний порядок
+            keys = [(sums[node] / counts[node] if node in counts else position[node], index, node)
+                    for index, node in enumerate(nodes)]
+            keys.sort()
+            nodes[:] = [node for _, _, node in keys]
+            for index, node in enumerate(nodes):
+                position[node] = (index + 0.5) / len(nodes)
+
+    def _order_numpy(self, sweeps: int):
+        count = self.graph.node_count
+        members = [numpy.array(nodes, dtype=numpy.int64) for nodes in self.layers]
+        slot = numpy.zeros(count, dtype=numpy.int64)
+        position = numpy.zeros(count)
+        for nodes in members:
+            slot[nodes] = numpy.arange(len(nodes))
+            position[nodes] = (numpy.arange(len(nodes)) + 0.5) / max(len(nodes), 1)
+        pairs = {}
+        for direction, layers in (('down', self.down), ('up', self.up)):
+            for layer, (neighbors, layer_members) in enumerate(layers):
+                pairs[direction, layer] = (numpy.array(neighbors, dtype=numpy.int64),
+                                           slot[numpy.array(layer_members, dtype=numpy.int64)])
+
+        for layer, direction in self._sweep_order(sweeps):
+            neighbors, slots = pairs[direction, layer]
+            nodes = members[layer]
+            size = len(nodes)
+            current = position[nodes]
+            sums = numpy.bincount(slots, weights=position[neighbors], minlength=size)
+            counts = numpy.bincount(slots, minlength=size)
+            keys = numpy.where(counts > 0, sums / numpy.maximum(counts, 1), current)
+            order = numpy.lexsort((current, keys))
+            position[nodes[order]] = (numpy.arange(size) + 0.5) / size
+
+        for layer, nodes in enumerate(members):
+            self.layers[layer] = nodes[numpy.argsort(position[nodes], kind='stable')].tolist()
+
+    def _coordinates_python(self, passes: int = 2) -> List[float]:
+        step = NODE_WIDTH + H_GAP
+        x = [0.0] * self.graph.node_count
+        for nodes in self.layers:
+            for index, node in enumerate(nodes):
+                x[node] = index * step
+
+        for _ in range(passes):
+            for layer in range(1, len(self.layers)):
+                sums = {}
+                counts = {}
+                for parent, node in zip(*self.down[layer]):
+                    sums[node] = sums.get(node, 0.0) + x[parent]
+                    counts[node] = counts.get(node, 0) + 1
+                previous = None
+                for node in self.layers[layer]:
+                    desired = sums[node] / counts[node] if node in counts else x[node]
+                    if previous is not None and desired < previous + step:
+                        desired = previous + step
+                    x[node] = previous = desired
+        return x
+
+    def _coordinates_numpy(self, passes: int = 2) -> List[float]:
+        step = NODE_WIDTH + H_GAP
+        x = numpy.zeros(self.graph.node_count)
+        slot = numpy.zeros(self.graph.node_count, dtype=numpy.int64)
+        members = [numpy.array(nodes, dtype=numpy.int64) for nodes in self.layers]
+        for nodes in members:
+            slot[nodes] = numpy.arange(len(nodes))
+            x[nodes] = numpy.arange(len(nodes)) * step
+        down = [(numpy.array(parents, dtype=numpy.int64), slot[numpy.array(nodes, dtype=numpy.int64)])
+                for parents, nodes in self.down]
+
+        for _ in range(passes):
+            for layer in range(1, len(members)):
+                nodes = members[layer]
+                parents, slots = down[layer]
+                sums = numpy.bincount(slots, weights=x[parents], minlength=len(nodes))
+                counts = numpy.bincount(slots, minlength=len(nodes))
+                desired = numpy.where(counts > 0, sums / numpy.maximum(counts, 1), x[nodes])
+                # x[i] = max(desired[i], x[i-1] + step) для всех i одним проходом
+                offsets = numpy.arange(len(nodes)) * step
+                x[nodes] = numpy.maximum.accumulate(desired - offsets) + offsets
+        return x.tolist()
+
+    def write_svg(self, path: str, errors: Collection[NodeKey] = ()):
+        """Запись SVG: ребра - кривые между нижней и верхней гранями узлов, узлы с ошибкой - красные"""
+        graph = self.graph
+        half = NODE_WIDTH // 2
+        with open(path, 'w', encoding='utf-8', buffering=1024 * 1024) as out:
+            out.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+                      f'viewBox="0 0 {self.width} {self.height}" font-family="Helvetica" font-size="10">\n'
+                      '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" '
+                      'markerHeight="6" orient="auto"><path d="M0,0 L10,5 L0,10 z" fill="#555"/></marker></defs>\n'
+                      '<g fill="none" stroke="#555" stroke-width="1" marker-end="url(#arrow)">\n')
+            for source in range(graph.node_count):
+                x1 = self.x[source] + half
+                y1 = self.y(source) + NODE_HEIGHT
+                for edge in range(graph.offsets[source], graph.offsets[source + 1]):
+                    target = graph.targets[edge]
+                    x2 = self.x[target] + half
+                    y2 = self.y(target)
+                    middle = (y1 + y2) / 2
+                    dash = ' stroke-dasharray="4,3"' if self.back[edge] else ''
+                    out.write(f'<path d="M{x1:.0f},{y1} C{x1:.0f},{middle:.0f} {x2:.0f},{middle:.0f} '
+                              f'{x2:.0f},{y2}"{dash}/>\n')
+            out.write('</g>\n<g>\n')
+            errors = set(errors)
+            for node in range(graph.node_count):
+                x, y = self.x[node], self.y(node)
+                color = 'red' if graph.keys[node] in errors else '#333'
+                package_id, version = graph.names[node]
+                out.write(f'<rect x="{x:.0f}" y="{y}" width="{NODE_WIDTH}" height="{NODE_HEIGHT}" rx="6" '
+                          f'fill="#fff" stroke="{color}"/>'
+                          f'<text x="{x + half:.0f}" y="{y + 15}" text-anchor="middle" fill="{color}">'
+                          f'{html.escape(package_id[:32])}</text>'
+                          f'<text x="{x + half:.0f}" y="{y + 27}" text-anchor="middle" fill="{color}">'
+                          f'{html.escape(version[:32])}</text>\n')
+            out.write('</g>\n</svg>\n')
+
+
+def crossings(layout: LayeredLayout) -> int:
+    """Число пересечений ребер между соседними слоями (для оценки качества раскладки;
+    длинные ребра не учитываются)"""
+    position = {}
+    for nodes in layout.layers:
+        for index, node in enumerate(nodes):
+            position[node] = index
+    total = 0
+    for layer in range(1, len(layout.layers)):
+        pairs = sorted((position[parent], position[node])
+                       for parent, node in zip(*layout.down[layer]) if layout.layer[parent] == layer - 1)
+        # Пересечения - инверсии по второй координате; подсчет слиянием за O(E log E)
+        total += _count_inversions([target for _, target in pairs])
+    return total
+
+
+def _count_inversions(values: List[int]) -> int:
+    if len(values) < 2:
+        return 0
+    middle = len(values) // 2
+    left, right = values[:middle], values[middle:]
+    count = _count_inversions(left) + _count_inversions(right)
+    i = j = 0
+    for k in range(len(values)):
+        if j >= len(right) or (i < len(left) and left[i] <= right[j]):
+            values[k] = left[i]
+            i += 1
+        else:
+            values[k] = right[j]
+            count += len(left) - i
+            j += 1
+    return count
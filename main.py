@@ -4,23 +4,36 @@
 Этап 2: Сбор данных - Исправленная версия с правильными URL
 """
 
+import asyncio
 import json
 import os
 import sys
-import urllib.request
-import urllib.error
+import threading
+import time
 import urllib.parse
-from typing import Dict, Any, List, Optional
-
-
-class ConfigError(Exception):
-    """Исключение для ошибок конфигурации"""
-    pass
-
-
-class NuGetError(Exception):
-    """Исключение для ошибок работы с NuGet API"""
-    pass
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import async_client
+from catalog_sync import CatalogSync
+from csr_graph import CSRGraph
+from dependency_graph import DependencyEdge, DependencyGraph, GraphObserver
+from errors import ConfigError, NuGetError, RenderError
+from frameworks import Framework, nearest_group, parse_framework
+from http_cache import HTTPCache
+from http_pool import DEFAULT_ACCEPT_ENCODING, ConnectionPool, HTTPStatusError
+from instrumentation import Instrumentation
+from json_stream import iter_registration_leaves
+from nuget_version import NuGetVersion, sort_versions, try_parse_version, versions_equal
+from package_filter import PackageFilter
+from rate_limit import RateLimiter, RetryPolicy
+from render import RENDER_BACKENDS, DotWriter, dot_path_for, render_image
+from resolver import TransitiveResolver
+from reverse_index import ReverseIndex, write_reverse_index
+from metadata_store import MetadataStore
+from service_index import SERVICE_INDEX_CACHE, ServiceIndex
+from single_flight import SingleFlight
+from snapshot import SnapshotRecorder, SnapshotRepository
+from sources import STRATEGIES as SOURCE_STRATEGIES, PackageSource, SourceSet
 
 
 class DependencyVisualizer:
@@ -28,6 +41,64 @@ class DependencyVisualizer:
         self.config_path = config_path
         self.config = self._load_config()
         self.dependencies = []
+        # Шаблоны filter_substring компилируются один раз на весь запуск
+        self.package_filter = PackageFilter(self.config['filter_substring'])
+        # Целевая платформа проекта: из каждого пакета берется только ближайшая совместимая группа
+        self.target_framework: Optional[Framework] = parse_framework(self.config['target_framework'])
+        self.graph: Optional[DependencyGraph] = None
+        # Замороженная копия graph для запросов по прямой и обратной смежности
+        self.csr_graph: Optional[CSRGraph] = None
+        self._versions_cache: Dict[str, List[NuGetVersion]] = {}
+        self._versions_lock = threading.Lock()
+        # Замеры этапов запуска; выключенные почти ничего не стоят
+        self.instrumentation = Instrumentation(self.config['instrumentation'])
+        self.http_pool = ConnectionPool(
+            max_per_host=self.config['http_pool_size'],
+            idle_timeout=self.config['http_idle_timeout'],
+            timeout=self.config['http_timeout'],
+            accept_encoding=DEFAULT_ACCEPT_ENCODING if self.config['http_compression'] else None,
+            rate_limiter=RateLimiter(self.config['http_rate_limit']),
+            retry_policy=RetryPolicy(self.config['http_retries'], self.config['http_retry_base_delay']),
+            instrumentation=self.instrumentation
+        )
+        # Источники пакетов: основной использует http_pool, остальные - свои пулы с общими
+        # ограничением частоты, повторами и учетом трафика
+        urls = self.config['repository_url']
+        urls = urls if isinstance(urls, list) else [urls]
+        self.sources = SourceSet(
+            [PackageSource(urls[0], self.http_pool)] + [PackageSource(url, self._create_pool()) for url in urls[1:]],
+            strategy=self.config['source_strategy'],
+            max_workers=self.config['max_workers']
+        )
+        # Одновременные запросы одного URL из разных потоков выполняются один раз
+        self.single_flight = SingleFlight()
+        self.http_cache: Optional[HTTPCache] = None
+        if self.config['http_cache_dir']:
+            self.http_cache = HTTPCache(self.config['http_cache_dir'],
+                                        max_bytes=int(self.config['http_cache_max_mb'] * 1024 * 1024))
+        # В test_mode данные пакетов берутся из офлайн-снимка, сеть не используется
+        self.snapshot: Optional[SnapshotRepository] = None
+        if self.config['test_mode']:
+            self.snapshot = SnapshotRepository(self.config['snapshot_path'])
+        self._snapshot_recorder: Optional[SnapshotRecorder] = None
+        # Локальное хранилище метаданных проверяется раньше любого HTTP запроса
+        self.metadata_store: Optional[MetadataStore] = None
+        if self.config['metadata_store_path'] and self.snapshot is None:
+            self.metadata_store = MetadataStore(self.config['metadata_store_path'],
+                                                versions_ttl=self.config['metadata_versions_ttl'])
+
+    def _create_pool(self) -> ConnectionPool:
+        """Пул соединений дополнительного источника с настройками http_pool"""
+        return ConnectionPool(
+            max_per_host=self.http_pool.max_per_host,
+            idle_timeout=self.http_pool.idle_timeout,
+            timeout=self.http_pool.timeout,
+            accept_encoding=self.http_pool.accept_encoding,
+            transfer_stats=self.http_pool.transfer_stats,
+            rate_limiter=self.http_pool.rate_limiter,
+            retry_policy=self.http_pool.retry_policy,
+            instrumentation=self.instrumentation
+        )
 
     def _load_config(self) -> Dict[str, Any]:
         """Загрузка конфигурации из JSON файла"""
@@ -40,12 +111,39 @@ class DependencyVisualizer:
                     "package_version": "13.0.3",
                     "output_image": "dependencies.png",
                     "filter_substring": "",
-                    "test_mode": False
+                    "filter_mode": "display",
+                    "test_mode": False,
+                    "http_pool_size": 4,
+                    "http_idle_timeout": 30,
+                    "http_timeout": 30,
+                    "http_rate_limit": 0,
+                    "http_retries": 3,
+                    "http_retry_base_delay": 0.5,
+                    "transitive": False,
+                    "max_workers": 8,
+                    "http_backend": "threaded",
+                    "async_concurrency": 64,
+                    "http_cache_dir": "",
+                    "http_cache_max_mb": 256,
+                    "service_index_ttl": 300,
+                    "http_compression": True,
+                    "stream_registration_index": True,
+                    "snapshot_path": "nuget_snapshot.bin",
+                    "metadata_store_path": "",
+                    "metadata_versions_ttl": 86400,
+                    "catalog_cursor_path": "catalog_cursor.json",
+                    "render_backend": "auto",
+                    "instrumentation": False,
+                    "instrumentation_path": "instrumentation.json",
+                    "batch_output": "batch_results.json",
+                    "reverse_index_path": "",
+                    "target_framework": "",
+                    "source_strategy": "race"
                 }
                 with open(self.config_path, 'w', encoding='utf-8') as f:
                     json.dump(default_config, f, indent=2)
                 print(f"Создан конфиг по умолчанию: {default_config}")
-                return default_config
+                return self._validate_config(default_config)
 
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
@@ -80,9 +178,12 @@ class DependencyVisualizer:
         if not isinstance(config["package_name"], str) or not config["package_name"].strip():
             raise ConfigError("package_name должен быть непустой строкой")
 
-        # Валидация repository_url
-        if not isinstance(config["repository_url"], str) or not config["repository_url"].strip():
-            raise ConfigError("repository_url должен быть непустой строкой")
+        # Валидация repository_url: один источник или список источников в порядке приоритета
+        urls = config["repository_url"]
+        if not isinstance(urls, list):
+            urls = [urls]
+        if not urls or not all(isinstance(url, str) and url.strip() for url in urls):
+            raise ConfigError("repository_url должен быть непустой строкой или непустым списком строк")
 
         # Валидация package_version
         if not isinstance(config["package_version"], str) or not config["package_version"].strip():
@@ -91,57 +192,214 @@ class DependencyVisualizer:
         # Устанавливаем значения по умолчанию для опциональных полей
         config.setdefault("output_image", "dependencies.png")
         config.setdefault("filter_substring", "")
+        config.setdefault("filter_mode", "display")
         config.setdefault("test_mode", False)
+        config.setdefault("http_pool_size", 4)
+        config.setdefault("http_idle_timeout", 30)
+        config.setdefault("http_timeout", 30)
+        config.setdefault("http_rate_limit", 0)
+        config.setdefault("http_retries", 3)
+        config.setdefault("http_retry_base_delay", 0.5)
+        config.setdefault("transitive", False)
+        config.setdefault("max_workers", 8)
+        config.setdefault("http_backend", "threaded")
+        config.setdefault("async_concurrency", 64)
+        config.setdefault("http_cache_dir", "")
+        config.setdefault("http_cache_max_mb", 256)
+        config.setdefault("service_index_ttl", 300)
+        config.setdefault("http_compression", True)
+        config.setdefault("stream_registration_index", True)
+        config.setdefault("snapshot_path", "nuget_snapshot.bin")
+        config.setdefault("metadata_store_path", "")
+        config.setdefault("metadata_versions_ttl", 86400)
+        config.setdefault("catalog_cursor_path", "catalog_cursor.json")
+        config.setdefault("render_backend", "auto")
+        config.setdefault("instrumentation", False)
+        config.setdefault("instrumentation_path", "instrumentation.json")
+        config.setdefault("batch_output", "batch_results.json")
+        config.setdefault("reverse_index_path", "")
+        config.setdefault("target_framework", "")
+        config.setdefault("source_strategy", "race")
+
+        # Валидация параметров пула соединений
+        if not isinstance(config["http_pool_size"], int) or config["http_pool_size"] < 1:
+            raise ConfigError("http_pool_size должен быть целым числом >= 1")
+        for field in ("http_idle_timeout", "http_timeout"):
+            if not isinstance(config[field], (int, float)) or config[field] <= 0:
+                raise ConfigError(f"{field} должен быть положительным числом")
+
+        # Валидация ограничения частоты (0 - без предела, пока сервер не ответит 429) и повторов
+        for field in ("http_rate_limit", "http_retry_base_delay"):
+            if not isinstance(config[field], (int, float)) or config[field] < 0:
+                raise ConfigError(f"{field} должен быть неотрицательным числом")
+        if not isinstance(config["http_retries"], int) or config["http_retries"] < 0:
+            raise ConfigError("http_retries должен быть целым числом >= 0")
+
+        # Валидация параметров транзитивного обхода
+        if not isinstance(config["transitive"], bool):
+            raise ConfigError("transitive должен быть true или false")
+        if not isinstance(config["max_workers"], int) or config["max_workers"] < 1:
+            raise ConfigError("max_workers должен быть целым числом >= 1")
+
+        # Валидация выбора HTTP клиента
+        if config["http_backend"] not in ("threaded", "async"):
+            raise ConfigError("http_backend должен быть 'threaded' или 'async'")
+        if not isinstance(config["async_concurrency"], int) or config["async_concurrency"] < 1:
+            raise ConfigError("async_concurrency должен быть целым числом >= 1")
+
+        # Валидация параметров дискового кэша (пустой http_cache_dir отключает кэш)
+        if not isinstance(config["http_cache_dir"], str):
+            raise ConfigError("http_cache_dir должен быть строкой")
+        if not isinstance(config["http_cache_max_mb"], (int, float)) or config["http_cache_max_mb"] <= 0:
+            raise ConfigError("http_cache_max_mb должен быть положительным числом")
+        if not isinstance(config["service_index_ttl"], (int, float)) or config["service_index_ttl"] < 0:
+            raise ConfigError("service_index_ttl должен быть неотрицательным числом")
+        if not isinstance(config["http_compression"], bool):
+            raise ConfigError("http_compression должен быть true или false")
+        if not isinstance(config["stream_registration_index"], bool):
+            raise ConfigError("stream_registration_index должен быть true или false")
+
+        # Валидация фильтра: строка или список шаблонов (подстрока, glob, re:регулярное выражение)
+        patterns = config["filter_substring"]
+        if not isinstance(patterns, (str, list)) or \
+                isinstance(patterns, list) and not all(isinstance(pattern, str) for pattern in patterns):
+            raise ConfigError("filter_substring должен быть строкой или списком строк")
+        PackageFilter(patterns)
+        if config["filter_mode"] not in ("display", "prune"):
+            raise ConfigError("filter_mode должен быть 'display' или 'prune'")
+
+        # Валидация офлайн-режима
+        if not isinstance(config["test_mode"], bool):
+            raise ConfigError("test_mode должен быть true или false")
+        if not isinstance(config["snapshot_path"], str) or not config["snapshot_path"].strip():
+            raise ConfigError("snapshot_path должен быть непустой строкой")
+
+        # Валидация хранилища метаданных (пустой metadata_store_path отключает хранилище)
+        if not isinstance(config["metadata_store_path"], str):
+            raise ConfigError("metadata_store_path должен быть строкой")
+        if not isinstance(config["metadata_versions_ttl"], (int, float)) or config["metadata_versions_ttl"] < 0:
+            raise ConfigError("metadata_versions_ttl должен быть неотрицательным числом")
+        if not isinstance(config["catalog_cursor_path"], str) or not config["catalog_cursor_path"].strip():
+            raise ConfigError("catalog_cursor_path должен быть непустой строкой")
+
+        # Валидация вывода изображения (пустой output_image отключает вывод)
+        if not isinstance(config["output_image"], str):
+            raise ConfigError("output_image должен быть строкой")
+        if config["render_backend"] not in ("auto",) + tuple(RENDER_BACKENDS):
+            raise ConfigError(f"render_backend должен быть одним из: auto, {', '.join(RENDER_BACKENDS)}")
+
+        # Валидация замеров (пустой instrumentation_path - только таблица без JSON)
+        if not isinstance(config["instrumentation"], bool):
+            raise ConfigError("instrumentation должен быть true или false")
+        if not isinstance(config["instrumentation_path"], str):
+            raise ConfigError("instrumentation_path должен быть строкой")
+
+        # Валидация пакетного режима
+        if not isinstance(config["batch_output"], str) or not config["batch_output"].strip():
+            raise ConfigError("batch_output должен быть непустой строкой")
+
+        # Валидация индекса обратных зависимостей (пустой reverse_index_path отключает индекс)
+        if not isinstance(config["reverse_index_path"], str):
+            raise ConfigError("reverse_index_path должен быть строкой")
+
+        # Валидация целевой платформы (пустая строка - зависимости всех групп)
+        if not isinstance(config["target_framework"], str):
+            raise ConfigError("target_framework должен быть строкой")
+        if config["target_framework"].strip() and parse_framework(config["target_framework"]) is None:
+            raise ConfigError(f"Неизвестная целевая платформа: '{config['target_framework']}' "
+                              f"(примеры: net8.0, net462, netstandard2.0)")
+
+        # Валидация стратегии опроса нескольких источников
+        if config["source_strategy"] not in SOURCE_STRATEGIES:
+            raise ConfigError(f"source_strategy должен быть одним из: {', '.join(SOURCE_STRATEGIES)}")
 
         return config
 
     def _make_http_request(self, url: str) -> str:
-        """Выполнение HTTP запроса"""
-        try:
-            req = urllib.request.Request(
-                url,
-                headers={
+        """Выполнение HTTP запроса через пул keep-alive соединений и дисковый кэш"""
+        with self.instrumentation.span('http.request') as span:
+            try:
+                entry = None
+                if self.http_cache is not None:
+                    # Документы конкретных версий не меняются - сеть не нужна
+                    body = self.http_cache.get_fresh(url)
+                    if body is not None:
+                        span.bytes = len(body)
+                        return body.decode('utf-8')
+                    entry = self.http_cache.lookup(url)
+
+                headers = {
                     'User-Agent': 'DependencyVisualizer/1.0',
                     'Accept': 'application/json'
                 }
-            )
-
-            with urllib.request.urlopen(req, timeout=30) as response:
-                return response.read().decode('utf-8')
-
-        except urllib.error.HTTPError as e:
-            raise NuGetError(f"HTTP ошибка {e.code}: {e.reason} для URL {url}")
-        except urllib.error.URLError as e:
-            raise NuGetError(f"Ошибка подключения: {e.reason} для URL {url}")
-        except Exception as e:
-            raise NuGetError(f"Ошибка при выполнении запроса к {url}: {e}")
+                if self.http_cache is not None:
+                    headers.update(self.http_cache.conditional_headers(entry))
+
+                response = self.sources.current().pool.request(url, headers=headers)
+
+                body = response.body
+                if self.http_cache is not None:
+                    body = self.http_cache.handle_response(url, entry, response.status, response.headers, body)
+                    if body is None:
+                        # Тело из кэша пропало после отправки валидаторов - повторяем обычным запросом
+                        response = self.sources.current().pool.request(url, headers={
+                            'User-Agent': 'DependencyVisualizer/1.0',
+                            'Accept': 'application/json'
+                        })
+                        body = self.http_cache.handle_response(url, None, response.status, response.headers,
+                                                               response.body)
+                        if body is None:
+                            raise NuGetError(f"Ответ 304 на безусловный запрос к {url}")
+                span.bytes = len(body)
+                return body.decode('utf-8')
+
+            except NuGetError:
+                raise
+            except HTTPStatusError as e:
+                raise NuGetError(f"HTTP ошибка {e.code}: {e.reason} для URL {url}")
+            except OSError as e:
+                raise NuGetError(f"Ошибка подключения: {e} для URL {url}")
+            except Exception as e:
+                raise NuGetError(f"Ошибка при выполнении запроса к {url}: {e}")
 
     def _get_json_from_url(self, url: str) -> Dict[str, Any]:
-        """Получение и парсинг JSON из URL"""
+        """Получение и парсинг JSON из URL; результат общий для одновременных вызовов и не изменяется"""
+        with self.instrumentation.span('json.fetch'):
+            return self.single_flight.do(url, lambda: self._load_json(url))
+
+    def _load_json(self, url: str) -> Dict[str, Any]:
         try:
             response_data = self._make_http_request(url)
-            return json.loads(response_data)
+            with self.instrumentation.span('json.parse') as span:
+                span.bytes = len(response_data)
+                return json.loads(response_data)
         except json.JSONDecodeError as e:
             raise NuGetError(f"Ошибка парсинга JSON из {url}: {e}")
 
     def _get_service_index(self) -> Dict[str, Any]:
         """Получение индекса сервисов NuGet"""
         try:
-            print(f"Получение индекса сервисов из {self.config['repository_url']}...")
-            return self._get_json_from_url(self.config['repository_url'])
+            repository_url = self.sources.current().url
+            print(f"Получение индекса сервисов из {repository_url}...")
+            return self._get_json_from_url(repository_url)
         except Exception as e:
             raise NuGetError(f"Ошибка получения индекса сервисов: {e}")
 
-    def _find_service_url(self, service_index: Dict[str, Any], service_type: str) -> str:
+    def _get_cached_service_index(self) -> ServiceIndex:
+        """Индекс сервисов текущего источника из кэша процесса
+        (загружается не чаще раза в service_index_ttl секунд)"""
+        return SERVICE_INDEX_CACHE.get(self.sources.current().url, self._get_service_index,
+                                       self.config['service_index_ttl'])
+
+    def _find_service_url(self, service_index: Union[ServiceIndex, Dict[str, Any]], service_type: str) -> str:
         """Поиск URL конкретного сервиса в индексе"""
-        resources = service_index.get('resources', [])
+        if not isinstance(service_index, ServiceIndex):
+            service_index = ServiceIndex(service_index)
 
-        for resource in resources:
-            if resource.get('@type') == service_type:
-                url = resource.get('@id')
-                if url:
-                    print(f"Найден {service_type}: {url}")
-                    return url
+        url = service_index.find(service_type)
+        if url:
+            print(f"Найден {service_type}: {url}")
+            return url
 
         raise NuGetError(f"Сервис {service_type} не найден в индексе")
 
@@ -166,73 +424,243 @@ class DependencyVisualizer:
             print(f"Запрос данных пакета: {registration_url}")
             registration_data = self._get_json_from_url(registration_url)
 
-            # Извлекаем catalogEntry из полученных данных
-            items = registration_data.get('items', [])
-            if not items:
-                raise NuGetError(f"Не найдены данные о пакете {package_name} версии {version}")
+            catalog_url = self._catalog_entry_url(registration_data)
+            if catalog_url is not None:
+                # Лист регистрации ссылается на лист каталога: оба документа неизменяемы
+                # и при повторных запусках берутся из дискового кэша без запросов
+                return self._get_json_from_url(catalog_url)
+            return self._catalog_entry_from_registration(registration_data, package_name, version)
 
-            # Ищем catalogEntry в данных
-            for item in items:
-                if 'catalogEntry' in item:
-                    catalog_entry = item['catalogEntry']
+        except NuGetError:
+            raise
+        except Exception as e:
+            raise NuGetError(f"Ошибка получения данных пакета: {e}")
+
+    def _catalog_entry_from_registration(self, registration_data: Dict[str, Any], package_name: str,
+                                         version: str) -> Dict[str, Any]:
+        """Извлечение catalogEntry из документа регистрации версии"""
+        # Лист регистрации с встроенным catalogEntry
+        if isinstance(registration_data.get('catalogEntry'), dict):
+            return registration_data['catalogEntry']
+
+        items = registration_data.get('items', [])
+        if not items:
+            raise NuGetError(f"Не найдены данные о пакете {package_name} версии {version}")
+
+        # Ищем catalogEntry в данных
+        for item in items:
+            if 'catalogEntry' in item:
+                catalog_entry = item['catalogEntry']
+                print(f"Найден catalogEntry для {package_name} {version}")
+                return catalog_entry
+
+        # Если catalogEntry не найден напрямую, ищем в items[0].items
+        if 'items' in items[0]:
+            for sub_item in items[0]['items']:
+                if 'catalogEntry' in sub_item:
+                    catalog_entry = sub_item['catalogEntry']
                     print(f"Найден catalogEntry для {package_name} {version}")
                     return catalog_entry
 
-            # Если catalogEntry не найден напрямую, ищем в items[0].items
-            if 'items' in items[0]:
-                for sub_item in items[0]['items']:
-                    if 'catalogEntry' in sub_item:
-                        catalog_entry = sub_item['catalogEntry']
-                        print(f"Найден catalogEntry для {package_name} {version}")
-                        return catalog_entry
+        raise NuGetError(f"Не удалось извлечь catalogEntry для пакета {package_name}")
 
-            raise NuGetError(f"Не удалось извлечь catalogEntry для пакета {package_name}")
+    @staticmethod
+    def _catalog_entry_url(registration_data: Dict[str, Any]) -> Optional[str]:
+        """URL листа каталога, если лист регистрации ссылается на catalogEntry по URL (как в nuget.org)"""
+        catalog_entry = registration_data.get('catalogEntry')
+        return catalog_entry if isinstance(catalog_entry, str) and catalog_entry else None
 
-        except NuGetError:
-            raise
-        except Exception as e:
-            raise NuGetError(f"Ошибка получения данных пакета: {e}")
+    def _get_package_index_url(self, registration_base_url: str, package_name: str) -> str:
+        """URL индекса регистрации пакета (все версии)"""
+        return f"{registration_base_url}{package_name.lower()}/index.json"
 
     def _try_alternative_registration_url(self, registration_base_url: str, package_name: str, version: str) -> Dict[
         str, Any]:
         """Попытка использовать альтернативный формат URL"""
-        package_name_lower = package_name.lower()
-
         # Альтернативный формат: индекс пакета
-        alt_url = f"{registration_base_url}{package_name_lower}/index.json"
+        alt_url = self._get_package_index_url(registration_base_url, package_name)
         print(f"Попытка альтернативного URL: {alt_url}")
 
         try:
+            # С дисковым кэшем документ нужен целиком, поэтому потоковый разбор только без него
+            if self.config['stream_registration_index'] and self.http_cache is None:
+                return self._stream_version_from_index(alt_url, package_name, version)
             index_data = self._get_json_from_url(alt_url)
-            items = index_data.get('items', [])
-
-            # Ищем нужную версию в индексе
-            for item in items:
-                items_list = item.get('items', [])
-                for sub_item in items_list:
-                    catalog_entry = sub_item.get('catalogEntry', {})
-                    if catalog_entry.get('version') == version:
+            return self._find_version_in_index(index_data, package_name, version)
+        except Exception as e:
+            raise NuGetError(f"Альтернативный метод также не сработал: {e}")
+
+    def _stream_version_from_index(self, index_url: str, package_name: str, version: str) -> Dict[str, Any]:
+        """Поиск версии в индексе регистрации с потоковым разбором ответа.
+
+        Чтение прекращается, как только найдена нужная версия"""
+        first_entry = None
+        stub_pages: List[Dict[str, Any]] = []
+        try:
+            with self.instrumentation.span('json.stream'), self.sources.current().pool.stream(index_url, headers={
+                'User-Agent': 'DependencyVisualizer/1.0',
+                'Accept': 'application/json'
+            }) as stream:
+                for leaf in iter_registration_leaves(stream.iter_chunks(), stub_pages):
+                    catalog_entry = leaf.get('catalogEntry', {}) if isinstance(leaf, dict) else {}
+                    if first_entry is None:
+                        first_entry = catalog_entry
+                    if versions_equal(catalog_entry.get('version', ''), version):
                         print(f"Найдена версия {version} через альтернативный URL")
                         return catalog_entry
-
-            # Если точная версия не найдена, берем первую доступную
-            for item in items:
-                items_list = item.get('items', [])
-                if items_list:
-                    catalog_entry = items_list[0].get('catalogEntry', {})
-                    actual_version = catalog_entry.get('version', 'unknown')
-                    print(f"Версия {version} не найдена, используем {actual_version}")
+        except HTTPStatusError as e:
+            raise NuGetError(f"HTTP ошибка {e.code}: {e.reason} для URL {index_url}")
+        except OSError as e:
+            raise NuGetError(f"Ошибка подключения: {e} для URL {index_url}")
+        except ValueError as e:
+            raise NuGetError(f"Ошибка парсинга JSON из {index_url}: {e}")
+
+        # Страницы без встроенных версий загружаются только та, что может содержать нужную
+        page = self._locate_page(stub_pages, version)
+        if page is not None:
+            catalog_entry = self._find_version_in_page(page, version)
+            if catalog_entry is not None:
+                return catalog_entry
+
+        # Если точная версия не найдена, берем первую доступную
+        if first_entry is not None:
+            print(f"Версия {version} не найдена, используем {first_entry.get('version', 'unknown')}")
+            return first_entry
+
+        raise NuGetError(f"Пакет {package_name} не найден через альтернативный URL")
+
+    def _locate_page(self, pages: List[Dict[str, Any]], version: str) -> Optional[Dict[str, Any]]:
+        """Бинарный поиск страницы индекса, в границы lower/upper которой попадает версия.
+
+        Страницы в индексе регистрации упорядочены по возрастанию версий"""
+        target = try_parse_version(version)
+        if target is None or not pages:
+            return None
+
+        low, high = 0, len(pages)
+        while low < high:
+            middle = (low + high) // 2
+            upper = try_parse_version(pages[middle].get('upper', ''))
+            if upper is None:
+                return None
+            if upper < target:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < len(pages):
+            lower = try_parse_version(pages[low].get('lower', ''))
+            if lower is not None and lower <= target:
+                return pages[low]
+        return None
+
+    def _find_version_in_page(self, page: Dict[str, Any], version: str) -> Optional[Dict[str, Any]]:
+        """Поиск версии на странице индекса; страница без встроенных items загружается по @id"""
+        leaves = page.get('items')
+        if leaves is None:
+            print(f"Загрузка страницы индекса {page.get('lower')} - {page.get('upper')}: {page.get('@id')}")
+            leaves = self._get_json_from_url(page['@id']).get('items', [])
+
+        for leaf in leaves:
+            catalog_entry = leaf.get('catalogEntry', {})
+            if versions_equal(catalog_entry.get('version', ''), version):
+                print(f"Найдена версия {version} через альтернативный URL")
+                return catalog_entry
+        return None
+
+    def _find_version_in_index(self, index_data: Dict[str, Any], package_name: str, version: str) -> Dict[str, Any]:
+        """Поиск catalogEntry нужной версии в индексе регистрации пакета"""
+        items = index_data.get('items', [])
+
+        # Сначала страница, которая по границам может содержать версию
+        page = self._locate_page(items, version)
+        if page is not None:
+            catalog_entry = self._find_version_in_page(page, version)
+            if catalog_entry is not None:
+                return catalog_entry
+
+        # Ищем нужную версию в индексе (страницы без границ)
+        for item in items:
+            items_list = item.get('items', [])
+            for sub_item in items_list:
+                catalog_entry = sub_item.get('catalogEntry', {})
+                if versions_equal(catalog_entry.get('version', ''), version):
+                    print(f"Найдена версия {version} через альтернативный URL")
                     return catalog_entry
 
-            raise NuGetError(f"Пакет {package_name} не найден через альтернативный URL")
-
-        except Exception as e:
-            raise NuGetError(f"Альтернативный метод также не сработал: {e}")
-
-    def _extract_dependencies(self, package_data: Dict[str, Any]) -> List[Dict[str, str]]:
+        # Если точная версия не найдена, берем первую доступную
+        for item in items:
+            items_list = item.get('items', [])
+            if items_list:
+                catalog_entry = items_list[0].get('catalogEntry', {})
+                actual_version = catalog_entry.get('version', 'unknown')
+                print(f"Версия {version} не найдена, используем {actual_version}")
+                return catalog_entry
+
+        raise NuGetError(f"Пакет {package_name} не найден через альтернативный URL")
+
+    def _get_flat_container_url(self, package_base_url: str, package_name: str) -> str:
+        """URL списка версий пакета в сервисе PackageBaseAddress"""
+        return f"{package_base_url}{package_name.lower()}/index.json"
+
+    def _versions_from_registration_index(self, index_data: Dict[str, Any]) -> List[str]:
+        """Все версии из индекса регистрации (страницы без встроенных items загружаются)"""
+        versions = []
+        for page in index_data.get('items', []):
+            leaves = page.get('items')
+            if leaves is None and page.get('@id'):
+                leaves = self._get_json_from_url(page['@id']).get('items', [])
+            for leaf in leaves or []:
+                version = leaf.get('catalogEntry', {}).get('version')
+                if version:
+                    versions.append(version)
+        return versions
+
+    def _get_package_versions(self, package_name: str) -> List[NuGetVersion]:
+        """Отсортированный список опубликованных версий пакета (запоминается на время жизни объекта)"""
+        key = package_name.lower()
+        with self._versions_lock:
+            cached = self._versions_cache.get(key)
+        if cached is not None:
+            return cached
+
+        stored = self.metadata_store.versions(package_name) if self.metadata_store is not None else None
+        if self.snapshot is not None:
+            raw_versions = self.snapshot.versions(package_name)
+        elif stored is not None:
+            raw_versions = stored
+        else:
+            raw_versions = self.sources.first(lambda source: self._fetch_package_versions(package_name))
+            if self.metadata_store is not None:
+                self.metadata_store.put_versions(package_name, raw_versions)
+
+        versions = sort_versions(raw_versions)
+        with self._versions_lock:
+            self._versions_cache[key] = versions
+        return versions
+
+    def _fetch_package_versions(self, package_name: str) -> List[str]:
+        """Список версий пакета из текущего источника"""
+        service_index = self._get_cached_service_index()
+        package_base_url = service_index.find('PackageBaseAddress/3.0.0')
+        if package_base_url:
+            data = self._get_json_from_url(self._get_flat_container_url(package_base_url, package_name))
+            return data.get('versions', [])
+        registration_base_url = self._find_service_url(service_index, 'RegistrationsBaseUrl/3.6.0')
+        index_data = self._get_json_from_url(self._get_package_index_url(registration_base_url, package_name))
+        return self._versions_from_registration_index(index_data)
+
+    def _extract_dependencies(self, package_data: Dict[str, Any]) -> List[DependencyEdge]:
         """Извлечение зависимостей из данных пакета"""
+        with self.instrumentation.span('extract'):
+            return self._extract_dependency_groups(package_data)
+
+    def _extract_dependency_groups(self, package_data: Dict[str, Any]) -> List[DependencyEdge]:
         dependencies = []
 
+        if self._snapshot_recorder is not None:
+            self._snapshot_recorder.record_entry(package_data)
+
         print("Анализ структуры данных пакета...")
 
         # Выводим доступные ключи для отладки
@@ -241,6 +669,12 @@ class DependencyVisualizer:
         # Основной способ получения зависимостей - через dependencyGroups
         dependency_groups = package_data.get('dependencyGroups', [])
 
+        if dependency_groups and self.target_framework is not None:
+            group = nearest_group(self.target_framework, dependency_groups)
+            print(f"Групп зависимостей: {len(dependency_groups)}, для {self.target_framework} выбрана: "
+                  f"{group.get('targetFramework', 'Unknown') if group is not None else 'нет совместимых'}")
+            dependency_groups = [group] if group is not None else []
+
         if dependency_groups:
             print(f"Найдено групп зависимостей: {len(dependency_groups)}")
 
@@ -266,12 +700,7 @@ class DependencyVisualizer:
                         dep_range = dep.get('version', '')
 
                     if dep_id:
-                        dependency_info = {
-                            'id': dep_id,
-                            'version_range': dep_range,
-                            'target_framework': target_framework
-                        }
-                        dependencies.append(dependency_info)
+                        dependencies.append(DependencyEdge(dep_id, dep_range, target_framework))
                         print(f"  → {dep_id} {dep_range}")
 
         # Если не нашли зависимостей, выводим отладочную информацию
@@ -286,7 +715,67 @@ class DependencyVisualizer:
 
         return dependencies
 
-    def get_dependencies(self) -> List[Dict[str, str]]:
+    def _get_registration_base_url(self) -> str:
+        """Получение базового URL сервиса регистрации пакетов текущего источника"""
+        if self.snapshot is not None:
+            # Офлайн-снимку URL не нужен
+            return ''
+        service_index = self._get_cached_service_index()
+        return self._find_service_url(service_index, 'RegistrationsBaseUrl/3.6.0')
+
+    def _fetch_package_data(self, registration_base_url: Optional[str], package_name: str,
+                            version: str) -> Dict[str, Any]:
+        """Получение catalogEntry пакета: из снимка или хранилища, иначе сначала по URL версии,
+        затем через индекс пакета в источниках по source_strategy. Без registration_base_url
+        URL определяется при первом запросе; заданный URL относится к основному источнику"""
+        if self.snapshot is not None:
+            return self.snapshot.package_data(package_name, version)
+        if self.metadata_store is not None:
+            stored = self.metadata_store.package_data(package_name, version)
+            if stored is not None:
+                return stored
+
+        def lookup(source: PackageSource) -> Dict[str, Any]:
+            base_url = registration_base_url if source is self.sources.primary else None
+            return self._fetch_from_source(base_url, package_name, version)
+
+        package_data = self.sources.first(lookup)
+        if self.metadata_store is not None:
+            self.metadata_store.put_package_data(package_data)
+        return package_data
+
+    def _fetch_from_source(self, registration_base_url: Optional[str], package_name: str,
+                           version: str) -> Dict[str, Any]:
+        """catalogEntry пакета из текущего источника: сначала по URL версии, затем через индекс пакета"""
+        registration_base_url = registration_base_url or self._get_registration_base_url()
+        try:
+            return self._get_package_data(registration_base_url, package_name, version)
+        except NuGetError as e:
+            print(f"Первый метод не сработал: {e}")
+            print("Пробуем альтернативный метод...")
+            return self._try_alternative_registration_url(registration_base_url, package_name, version)
+
+    def _apply_filter(self, dependencies: List[DependencyEdge]) -> List[DependencyEdge]:
+        """Применение filter_substring к списку зависимостей"""
+        if not self.package_filter:
+            return dependencies
+
+        original_count = len(dependencies)
+        with self.instrumentation.span('filter'):
+            dependencies = [dep for dep in dependencies if self.package_filter.matches(dep['id'])]
+        print(
+            f"Применен фильтр: '{self.package_filter}', осталось зависимостей: {len(dependencies)} из {original_count}")
+        return dependencies
+
+    def _prune_dependencies(self, dependencies: List[DependencyEdge]) -> List[DependencyEdge]:
+        """Зависимости для транзитивного обхода: при filter_mode='prune' пакеты,
+        не прошедшие фильтр, и их поддеревья не запрашиваются"""
+        if self.config['filter_mode'] != 'prune':
+            return dependencies
+        with self.instrumentation.span('filter'):
+            return self.package_filter.prune(dependencies)
+
+    def get_dependencies(self) -> List[DependencyEdge]:
         """Основной метод получения зависимостей пакета"""
         package_name = self.config['package_name']
         package_version = self.config['package_version']
@@ -294,31 +783,17 @@ class DependencyVisualizer:
         print(f"\nПоиск зависимостей для пакета {package_name} версии {package_version}...")
 
         try:
-            # Получаем индекс сервисов
-            service_index = self._get_service_index()
-
-            # Находим URL сервиса регистрации
-            registration_base_url = self._find_service_url(service_index, 'RegistrationsBaseUrl/3.6.0')
-
-            # Получаем данные пакета
-            try:
-                package_data = self._get_package_data(registration_base_url, package_name, package_version)
-            except NuGetError as e:
-                print(f"Первый метод не сработал: {e}")
-                print("Пробуем альтернативный метод...")
-                package_data = self._try_alternative_registration_url(registration_base_url, package_name,
-                                                                      package_version)
+            if self.config['http_backend'] == 'async' and self.snapshot is None:
+                package_data = asyncio.run(async_client.fetch_package_data(self, package_name, package_version))
+            else:
+                # Получаем данные пакета (URL сервиса регистрации нужен, только если данных нет локально)
+                package_data = self._fetch_package_data(None, package_name, package_version)
 
             # Извлекаем зависимости
             dependencies = self._extract_dependencies(package_data)
 
             # Применяем фильтр если указан
-            if self.config.get('filter_substring'):
-                filter_str = self.config['filter_substring'].lower()
-                original_count = len(dependencies)
-                dependencies = [dep for dep in dependencies if filter_str in dep['id'].lower()]
-                print(
-                    f"Применен фильтр: '{filter_str}', осталось зависимостей: {len(dependencies)} из {original_count}")
+            dependencies = self._apply_filter(dependencies)
 
             self.dependencies = dependencies
             return dependencies
@@ -327,6 +802,35 @@ class DependencyVisualizer:
             print(f"Ошибка при получении зависимостей: {type(e).__name__}: {e}")
             raise
 
+    def resolve_graph(self, observer: Optional[GraphObserver] = None) -> DependencyGraph:
+        """Построение полного транзитивного графа зависимостей пакета;
+        observer получает узлы и ребра по мере обхода"""
+        package_name = self.config['package_name']
+        package_version = self.config['package_version']
+
+        print(f"\nПостроение транзитивного графа для {package_name} {package_version}...")
+
+        if self.config['http_backend'] == 'async' and self.snapshot is None:
+            self.graph = asyncio.run(async_client.resolve_graph(self, package_name, package_version, observer))
+        else:
+            resolver = TransitiveResolver(self, max_workers=self.config['max_workers'])
+            self.graph = resolver.resolve(package_name, package_version, observer)
+
+        if self.graph.nodes[self.graph.root]['error']:
+            raise NuGetError(self.graph.nodes[self.graph.root]['error'])
+
+        self.dependencies = self._apply_filter(self.graph.dependencies_of(self.graph.root))
+        self.csr_graph = CSRGraph.from_graph(self.graph)
+        print(f"Граф построен: {self.graph.node_count} пакетов, {self.graph.edge_count} связей")
+        if self.config['filter_mode'] == 'prune' and self.package_filter:
+            pruned_ids = self.package_filter.pruned_ids
+            # Отсеченный пакет сэкономил запросы, только если обход не загрузил его другим путем
+            loaded = {node['id'].lower() for node in self.graph.nodes.values()}
+            print(f"Фильтр отсек при обходе: связей {self.package_filter.pruned_edges}, "
+                  f"пакетов {len(pruned_ids)}, из них не загружалось {len(pruned_ids - loaded)}; "
+                  f"запросов JSON выполнено: {self.single_flight.stats.as_dict()['executed']}")
+        return self.graph
+
     def display_dependencies(self):
         """Вывод всех прямых зависимостей на экран (требование этапа 2)"""
         if not self.dependencies:
@@ -345,14 +849,316 @@ class DependencyVisualizer:
         print("=" * 80)
         print(f"Всего найдено зависимостей: {len(self.dependencies)}")
 
+    def display_graph(self):
+        """Вывод транзитивного графа зависимостей по уровням"""
+        if self.graph is None:
+            return
+
+        print(f"\nТРАНЗИТИВНЫЕ ЗАВИСИМОСТИ ПАКЕТА {self.config['package_name']} {self.config['package_version']}:")
+        print("=" * 80)
+
+        for key, depth in self.graph.walk():
+            if depth == 0:
+                continue
+            node = self.graph.nodes[key]
+            if not self.package_filter.matches(node['id']):
+                continue
+            error_display = f"  (ошибка: {node['error']})" if node['error'] else ""
+            print(f"[{depth}] {node['id']:40} {node['version']:20}{error_display}")
+
+        print("=" * 80)
+        print(f"Всего пакетов в графе: {self.graph.node_count - 1}, связей: {self.graph.edge_count}")
+
+    def load_manifest(self, path: str) -> List[Tuple[str, str]]:
+        """Корни пакетного режима из JSON: [{"package_name": ..., "package_version": ...}, ...]"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ConfigError(f"Ошибка загрузки манифеста {path}: {e}")
+
+        if not isinstance(manifest, list) or not manifest:
+            raise ConfigError("Манифест должен быть непустым списком пакетов")
+        roots = []
+        for i, entry in enumerate(manifest):
+            if not isinstance(entry, dict) or not all(
+                    isinstance(entry.get(field), str) and entry[field].strip()
+                    for field in ("package_name", "package_version")):
+                raise ConfigError(f"Элемент манифеста {i}: package_name и package_version "
+                                  f"должны быть непустыми строками")
+            roots.append((entry["package_name"].strip(), entry["package_version"].strip()))
+        return roots
+
+    def resolve_roots(self, roots: List[Tuple[str, str]],
+                      observer: Optional[GraphObserver] = None) -> DependencyGraph:
+        """Общий транзитивный граф нескольких корней: пул соединений, кэши и обход
+        общие, поэтому пакет, нужный нескольким корням, запрашивается один раз"""
+        print(f"\nПостроение общего графа для {len(roots)} пакетов...")
+
+        if self.config['http_backend'] == 'async' and self.snapshot is None:
+            self.graph = asyncio.run(async_client.resolve_roots(self, roots, observer))
+        else:
+            resolver = TransitiveResolver(self, max_workers=self.config['max_workers'])
+            self.graph = resolver.resolve_many(roots, observer)
+
+        self.csr_graph = CSRGraph.from_graph(self.graph)
+        print(f"Граф построен: {self.graph.node_count} пакетов, {self.graph.edge_count} связей")
+        self._write_reverse_index()
+        return self.graph
+
+    def _write_reverse_index(self):
+        """Сохранение индекса обратных зависимостей общего графа нескольких корней.
+
+        Индекс пишет только пакетный режим: обычный запуск для одного пакета
+        не должен заменять индекс, построенный по всему манифесту"""
+        path = self.config['reverse_index_path']
+        if not path:
+            return
+        roots = [self.csr_graph.index_of(self.graph.nodes[key]['id'], self.graph.nodes[key]['version'])
+                 for key in self.graph.roots]
+        write_reverse_index(path, self.csr_graph, roots)
+
+    def find_dependents(self, package_id: str, version_range: str = '') -> List[Dict[str, Any]]:
+        """Корни из индекса последнего пакетного запуска, транзитивно зависящие от package_id
+        в диапазоне version_range, с кратчайшими путями до него"""
+        if not self.config['reverse_index_path']:
+            raise ConfigError("reverse_index_path не задан: индекс обратных зависимостей не сохраняется")
+        with ReverseIndex(self.config['reverse_index_path']) as index:
+            return index.dependents(package_id, version_range)
+
+    def run_dependents(self, package_id: str, version_range: str = ''):
+        """Запрос "кто зависит от пакета" из командной строки"""
+        try:
+            results = self.find_dependents(package_id, version_range)
+            range_display = f" {version_range}" if version_range else ""
+            roots = {result['root'] for result in results}
+            print(f"\nКорней, зависящих от {package_id}{range_display}: {len(roots)}")
+            for result in results:
+                print(' -> '.join(f"{name} {version}" for name, version in result['path']))
+        except (ConfigError, NuGetError, ValueError) as e:
+            print(f"Ошибка поиска обратных зависимостей: {e}")
+            sys.exit(1)
+        finally:
+            self.sources.close()
+
+    def batch_results(self, graph: DependencyGraph) -> List[Dict[str, Any]]:
+        """Результаты по каждому корню общего графа"""
+        results = []
+        for root in graph.roots:
+            subgraph = graph.subgraph(root)
+            node = graph.nodes[root]
+            dependencies = [dict(dependency.to_dict(), version=subgraph.nodes[child]['version'])
+                            for child, dependency in subgraph.edges[root]
+                            if self.package_filter.matches(dependency['id'])]
+            packages = [subgraph.nodes[key] for key, depth in subgraph.walk() if depth > 0]
+            results.append({
+                'package_name': node['id'],
+                'package_version': node['version'],
+                'error': node['error'],
+                'dependencies': dependencies,
+                'packages': [[package['id'], package['version']] for package in packages
+                             if self.package_filter.matches(package['id'])],
+                'edges': subgraph.edge_count,
+                'errors': [[package['id'], package['version']] for package in packages if package['error']],
+            })
+        return results
+
+    def run_batch(self, manifest_path: str):
+        """Пакетный режим из командной строки: общий граф для всех корней манифеста,
+        результаты по корням и сводка по общему графу в batch_output"""
+        try:
+            roots = self.load_manifest(manifest_path)
+            started = time.perf_counter()
+            writer = DotWriter(dot_path_for(self.config['output_image'])) if self.config['output_image'] else None
+            try:
+                graph = self.resolve_roots(roots, observer=writer)
+            finally:
+                if writer is not None:
+                    writer.close()
+            elapsed = time.perf_counter() - started
+
+            results = self.batch_results(graph)
+            print(f"\n{'Пакет':40} {'Версия':20} {'пакетов':>8} {'ошибок':>7}")
+            for result in results:
+                status = f"  (ошибка: {result['error']})" if result['error'] else ""
+                print(f"{result['package_name']:40} {result['package_version']:20} {len(result['packages']):8d} "
+                      f"{len(result['errors']):7d}{status}")
+
+            summary = {
+                'seconds': round(elapsed, 3),
+                'roots': results,
+                'merged': {'packages': graph.node_count, 'edges': graph.edge_count},
+                'requests': self.single_flight.stats.as_dict()['executed'],
+            }
+            with open(self.config['batch_output'], 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            failed = sum(1 for result in results if result['error'])
+            print(f"\nКорней: {len(results)}, с ошибкой: {failed}; общий граф: {graph.node_count} пакетов, "
+                  f"{graph.edge_count} связей; запросов JSON: {summary['requests']}; {elapsed:.2f} с")
+            print(f"Результаты сохранены: {self.config['batch_output']}")
+            if len(self.sources) > 1:
+                self.report_sources()
+
+            if writer is not None:
+                self.render_output(writer, graph)
+            if self.instrumentation.enabled:
+                self.report_instrumentation()
+        except (ConfigError, NuGetError, RenderError) as e:
+            print(f"Ошибка пакетного режима: {e}")
+            sys.exit(1)
+        finally:
+            self.sources.close()
+            if self.http_cache is not None:
+                self.http_cache.save()
+            if self.snapshot is not None:
+                self.snapshot.close()
+            if self.metadata_store is not None:
+                self.metadata_store.close()
+
+    def export_snapshot(self, path: str) -> int:
+        """Разрешение зависимостей с записью всех использованных данных пакетов
+        в офлайн-снимок; возвращает число пакетов в снимке"""
+        recorder = SnapshotRecorder()
+        self._snapshot_recorder = recorder
+        try:
+            if self.config['transitive']:
+                self.resolve_graph()
+            else:
+                self.get_dependencies()
+        finally:
+            self._snapshot_recorder = None
+
+        with self._versions_lock:
+            known_versions = list(self._versions_cache.items())
+        for package_key, versions in known_versions:
+            recorder.record_versions(package_key, [str(version) for version in versions])
+        return recorder.write(path)
+
+    def run_export(self, path: str):
+        """Запуск экспорта офлайн-снимка из командной строки"""
+        try:
+            count = self.export_snapshot(path)
+            print(f"\nСнимок сохранен: {path} ({count} пакетов, {os.path.getsize(path)} байт)")
+        except (ConfigError, NuGetError) as e:
+            print(f"Ошибка экспорта снимка: {e}")
+            sys.exit(1)
+        finally:
+            self.sources.close()
+            if self.http_cache is not None:
+                self.http_cache.save()
+            if self.snapshot is not None:
+                self.snapshot.close()
+            if self.metadata_store is not None:
+                self.metadata_store.close()
+
+    def sync_catalog(self) -> Dict[str, int]:
+        """Инкрементальное обновление локальных данных по каталогу NuGet"""
+        if self.snapshot is not None:
+            raise ConfigError("Синхронизация с каталогом недоступна в test_mode")
+        sync = CatalogSync(self, self.config['catalog_cursor_path'], max_workers=self.config['max_workers'])
+        return sync.run()
+
+    def run_sync(self):
+        """Запуск синхронизации с каталогом из командной строки"""
+        try:
+            stats = self.sync_catalog()
+            print(f"\nСинхронизация завершена: страниц {stats['pages']}, изменений {stats['changes']}, "
+                  f"обновлено пакетов {stats['packages']}, удалено из кэша {stats['cache_entries']}")
+        except (ConfigError, NuGetError) as e:
+            print(f"Ошибка синхронизации: {e}")
+            sys.exit(1)
+        finally:
+            self.sources.close()
+            if self.http_cache is not None:
+                self.http_cache.save()
+            if self.snapshot is not None:
+                self.snapshot.close()
+            if self.metadata_store is not None:
+                self.metadata_store.close()
+
+    def _write_direct_graph(self, writer: DotWriter) -> DependencyGraph:
+        """Граф прямых зависимостей для вывода (без транзитивного обхода версии не выбираются)"""
+        graph = DependencyGraph(self.config['package_name'], self.config['package_version'], writer)
+        for dep in self.dependencies:
+            child = graph.add_node(dep['id'], dep['version_range'] or '*')
+            graph.add_edge(graph.root, child, dep)
+        return graph
+
+    def render_output(self, writer: DotWriter, graph: DependencyGraph) -> str:
+        """Построение output_image из записанного DOT или напрямую из графа"""
+        errors = [key for key, node in graph.nodes.items() if node['error']]
+        csr_graph = self.csr_graph if graph is self.graph and self.csr_graph is not None \
+            else CSRGraph.from_graph(graph)
+        path = render_image(writer.path, self.config['output_image'], self.config['render_backend'],
+                            csr_graph, errors)
+        print(f"\nГраф сохранен: {path} ({writer.node_count} пакетов, {writer.edge_count} связей)")
+        return path
+
+    def report_sources(self):
+        """Исходы и задержки поиска пакетов по источникам (время в миллисекундах)"""
+        print(f"\nИсточники ({self.sources.strategy}):")
+        print(f"{'источник':50} {'побед':>6} {'неудач':>6} {'отменено':>8} {'p50':>8} {'p95':>8} {'max':>8}")
+        for stats in self.sources.stats():
+            print(f"{stats['url']:50} {stats['wins']:6d} {stats['failures']:6d} {stats['cancelled']:8d} "
+                  f"{stats['p50'] * 1000:8.1f} {stats['p95'] * 1000:8.1f} {stats['max'] * 1000:8.1f}")
+
+    def report_instrumentation(self):
+        """Таблица замеров в конце запуска и JSON для машинной обработки"""
+        print("\n=== ЗАМЕРЫ (мс) ===")
+        print(self.instrumentation.report())
+        path = self.config['instrumentation_path']
+        if path:
+            self.instrumentation.write_json(path)
+            print(f"Замеры сохранены: {path}")
+
     def run(self):
         """Основной метод запуска приложения"""
         try:
-            # Получаем зависимости
-            dependencies = self.get_dependencies()
+            # DOT пишется по мере обхода, изображение строится после
+            writer = DotWriter(dot_path_for(self.config['output_image'])) if self.config['output_image'] else None
+            try:
+                # Получаем зависимости
+                if self.config['transitive']:
+                    output_graph = self.resolve_graph(observer=writer)
+                else:
+                    self.get_dependencies()
+                    if writer is not None:
+                        output_graph = self._write_direct_graph(writer)
+            finally:
+                if writer is not None:
+                    writer.close()
 
             # Выводим зависимости на экран (требование этапа 2)
             self.display_dependencies()
+            self.display_graph()
+            if writer is not None:
+                self.render_output(writer, output_graph)
+
+            pool_stats = [source.pool.stats() for source in self.sources]
+            print(f"\nHTTP соединений создано: {sum(stats['created'] for stats in pool_stats)}, "
+                  f"переиспользовано: {sum(stats['reused'] for stats in pool_stats)}")
+            if len(self.sources) > 1:
+                self.report_sources()
+            print(f"Трафик: {self.http_pool.transfer_stats.summary()}")
+            limiter_stats = self.http_pool.rate_limiter.stats()
+            if limiter_stats['throttled'] or self.http_pool.retry_policy.retried:
+                print(f"Сервер ограничивал запросы: ответов 429/503: {limiter_stats['throttled']}, "
+                      f"повторов: {self.http_pool.retry_policy.retried}, "
+                      f"ожидание лимита: {limiter_stats['waited']:.1f} с")
+            flight_stats = self.single_flight.stats.as_dict()
+            print(f"Запросов JSON выполнено: {flight_stats['executed']}, "
+                  f"объединено одновременных дубликатов: {flight_stats['collapsed']}")
+            if self.http_cache is not None:
+                cache_stats = self.http_cache.stats()
+                print(f"HTTP кэш: попаданий {cache_stats['hits']} (подтверждено 304: {cache_stats['revalidated']}), "
+                      f"промахов {cache_stats['misses']}, вытеснено {cache_stats['evictions']}")
+            if self.metadata_store is not None:
+                store_stats = self.metadata_store.stats()
+                print(f"Хранилище метаданных: попаданий {store_stats['hits']}, промахов {store_stats['misses']}, "
+                      f"пакетов {store_stats['packages']}")
+
+            if self.instrumentation.enabled:
+                self.report_instrumentation()
 
             print(f"\nЭтап 2 завершен успешно!")
             print(f"Результаты сохранены для следующего этапа визуализации")
@@ -363,11 +1169,35 @@ class DependencyVisualizer:
         except NuGetError as e:
             print(f"Ошибка получения данных: {e}")
             sys.exit(1)
+        except RenderError as e:
+            print(f"Ошибка построения изображения: {e}")
+            sys.exit(1)
         except Exception as e:
             print(f"Неожиданная ошибка: {type(e).__name__}: {e}")
             import traceback
             traceback.print_exc()
             sys.exit(1)
+        finally:
+            self.sources.close()
+            if self.http_cache is not None:
+                self.http_cache.save()
+            if self.snapshot is not None:
+                self.snapshot.close()
+            if self.metadata_store is not None:
+                self.metadata_store.close()
+
+
+def _create_visualizer(config_path: str) -> DependencyVisualizer:
+    """DependencyVisualizer для командной строки: ошибка конфигурации или открытия снимка
+    (test_mode) - сообщение и код 1, без трассировки"""
+    try:
+        return DependencyVisualizer(config_path)
+    except ConfigError as e:
+        print(f"Ошибка конфигурации: {e}")
+        sys.exit(1)
+    except NuGetError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
 
 
 def main():
@@ -375,12 +1205,49 @@ def main():
     print("=== Dependency Visualizer - Этап 2: Сбор данных ===")
     print("Исправленная версия с правильными URL API")
 
+    # main.py export <снимок> [конфиг] - сохранение данных пакетов для офлайн-режима (test_mode)
+    if len(sys.argv) > 1 and sys.argv[1] == 'export':
+        if len(sys.argv) < 3:
+            print("Использование: main.py export <файл снимка> [конфигурационный файл]")
+            sys.exit(2)
+        config_path = sys.argv[3] if len(sys.argv) > 3 else "config.json"
+        print(f"Используется конфигурационный файл: {config_path}")
+        _create_visualizer(config_path).run_export(sys.argv[2])
+        return
+
+    # main.py sync [конфиг] - обновление хранилища и кэша по новым коммитам каталога
+    if len(sys.argv) > 1 and sys.argv[1] == 'sync':
+        config_path = sys.argv[2] if len(sys.argv) > 2 else "config.json"
+        print(f"Используется конфигурационный файл: {config_path}")
+        _create_visualizer(config_path).run_sync()
+        return
+
+    # main.py batch <манифест> [конфиг] - общий граф для списка корневых пакетов
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        if len(sys.argv) < 3:
+            print("Использование: main.py batch <манифест JSON> [конфигурационный файл]")
+            sys.exit(2)
+        config_path = sys.argv[3] if len(sys.argv) > 3 else "config.json"
+        print(f"Используется конфигурационный файл: {config_path}")
+        _create_visualizer(config_path).run_batch(sys.argv[2])
+        return
+
+    # main.py dependents <id> [диапазон] [конфиг] - кто из корней тянет пакет (по индексу пакетного режима)
+    if len(sys.argv) > 1 and sys.argv[1] == 'dependents':
+        if len(sys.argv) < 3:
+            print("Использование: main.py dependents <id пакета> [диапазон версий] [конфигурационный файл]")
+            sys.exit(2)
+        config_path = sys.argv[4] if len(sys.argv) > 4 else "config.json"
+        print(f"Используется конфигурационный файл: {config_path}")
+        _create_visualizer(config_path).run_dependents(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else '')
+        return
+
     # Можно указать путь к конфигурационному файлу как аргумент командной строки
     config_path = sys.argv[1] if len(sys.argv) > 1 else "config.json"
 
     print(f"Используется конфигурационный файл: {config_path}")
 
-    visualizer = DependencyVisualizer(config_path)
+    visualizer = _create_visualizer(config_path)
     visualizer.run()
 
 
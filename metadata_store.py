@@ -0,0 +1,260 @@
+"""
+Локальное хранилище метаданных пакетов NuGet в SQLite
+
+catalogEntry конкретной версии пакета не меняется, поэтому однажды
+полученные группы зависимостей сохраняются в базе и при следующих запусках
+берутся из нее без HTTP запросов и разбора JSON. Списки версий пакетов
+меняются при публикации новых версий и считаются свежими ограниченное время.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from nuget_version import try_parse_version
+
+# Сколько записей накапливать перед записью одной транзакцией
+_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    id_lower TEXT NOT NULL,
+    version_key TEXT NOT NULL,
+    id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (id_lower, version_key)
+);
+CREATE TABLE IF NOT EXISTS dependencies (
+    id_lower TEXT NOT NULL,
+    version_key TEXT NOT NULL,
+    group_index INTEGER NOT NULL,
+    target_framework TEXT,
+    dependency_id TEXT,
+    dependency_id_lower TEXT,
+    version_range TEXT
+);
+CREATE INDEX IF NOT EXISTS dependencies_by_package ON dependencies (id_lower, version_key);
+CREATE INDEX IF NOT EXISTS dependencies_by_dependency ON dependencies (dependency_id_lower);
+CREATE TABLE IF NOT EXISTS versions (
+    id_lower TEXT PRIMARY KEY,
+    versions TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    catalog_commit TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Строка таблицы dependencies без первых двух колонок
+DependencyRow = Tuple[int, Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def version_key(version: str) -> str:
+    """Нормализованная версия: '1.0' и '1.0.0' хранятся под одним ключом"""
+    parsed = try_parse_version(version)
+    return parsed.normalized if parsed is not None else version
+
+
+def _dependency_rows(catalog_entry: Dict[str, Any]) -> List[DependencyRow]:
+    """Группы зависимостей в виде строк; пустая группа - строка без dependency_id"""
+    rows: List[DependencyRow] = []
+    for group_index, group in enumerate(catalog_entry.get('dependencyGroups') or []):
+        if not isinstance(group, dict):
+            continue
+        target_framework = group.get('targetFramework')
+        dependencies = [dep for dep in group.get('dependencies') or [] if isinstance(dep, dict) and dep.get('id')]
+        if not dependencies:
+            rows.append((group_index, target_framework, None, None, None))
+        for dep in dependencies:
+            version_range = dep.get('range') or dep.get('version') or ''
+            rows.append((group_index, target_framework, dep['id'], dep['id'].lower(), version_range))
+    return rows
+
+
+class MetadataStore:
+    """Хранилище catalogEntry и списков версий; безопасно для нескольких потоков"""
+
+    def __init__(self, path: str, versions_ttl: float = 86400):
+        self.path = path
+        self.versions_ttl = versions_ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(versions)")}
+        if 'catalog_commit' not in columns:
+            # База предыдущей версии: ее списки версий без отметки каталога не продлеваются синхронизацией
+            self._connection.execute("ALTER TABLE versions ADD COLUMN catalog_commit TEXT")
+        row = self._connection.execute("SELECT value FROM meta WHERE key = 'catalog_commit'").fetchone()
+        # Коммит каталога (timestamp_key), с которым согласованы вновь сохраняемые списки версий
+        self.catalog_commit: Optional[str] = row[0] if row else None
+        # Записи, еще не сброшенные в базу: (id_lower, version_key) -> (id, version, строки зависимостей)
+        self._pending: Dict[Tuple[str, str], Tuple[str, str, List[DependencyRow]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_from_rows(self, package_id: str, version: str, rows: Iterable[DependencyRow]) -> Dict[str, Any]:
+        groups: Dict[int, Dict[str, Any]] = {}
+        for group_index, target_framework, dependency_id, _, version_range in rows:
+            group = groups.get(group_index)
+            if group is None:
+                group = groups[group_index] = {'dependencies': []}
+                if target_framework is not None:
+                    group['targetFramework'] = target_framework
+            if dependency_id is not None:
+                group['dependencies'].append({'id': dependency_id, 'range': version_range})
+        return {'id': package_id, 'version': version,
+                'dependencyGroups': [groups[index] for index in sorted(groups)]}
+
+    def package_data(self, package_id: str, version: str) -> Optional[Dict[str, Any]]:
+        """catalogEntry из хранилища в формате регистрации NuGet либо None"""
+        key = (package_id.lower(), version_key(version))
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.hits += 1
+                return self._entry_from_rows(*pending)
+
+            package = self._connection.execute(
+                "SELECT id, version FROM packages WHERE id_lower = ? AND version_key = ?", key).fetchone()
+            if package is None:
+                self.misses += 1
+                return None
+            rows = self._connection.execute(
+                "SELECT group_index, target_framework, dependency_id, dependency_id_lower, version_range "
+                "FROM dependencies WHERE id_lower = ? AND version_key = ? ORDER BY rowid", key).fetchall()
+            self.hits += 1
+        return self._entry_from_rows(package[0], package[1], rows)
+
+    def put_package_data(self, catalog_entry: Dict[str, Any]):
+        """Добавление catalogEntry; запись в базу выполняется пачками"""
+        package_id = catalog_entry.get('id')
+        version = catalog_entry.get('version')
+        if not package_id or not version:
+            return
+        key = (package_id.lower(), version_key(version))
+        with self._lock:
+            self._pending[key] = (package_id, version, _dependency_rows(catalog_entry))
+            if len(self._pending) >= _BATCH_SIZE:
+                self._flush_locked()
+
+    def put_many(self, catalog_entries: Iterable[Dict[str, Any]]):
+        for catalog_entry in catalog_entries:
+            self.put_package_data(catalog_entry)
+        self.flush()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        packages = []
+        dependencies = []
+        for (id_lower, key), (package_id, version, rows) in self._pending.items():
+            packages.append((id_lower, key, package_id, version))
+            dependencies.extend((id_lower, key) + row for row in rows)
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM dependencies WHERE id_lower = ? AND version_key = ?",
+                [package[:2] for package in packages])
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO packages (id_lower, version_key, id, version) VALUES (?, ?, ?, ?)", packages)
+            self._connection.executemany(
+                "INSERT INTO dependencies (id_lower, version_key, group_index, target_framework, dependency_id, "
+                "dependency_id_lower, version_range) VALUES (?, ?, ?, ?, ?, ?, ?)", dependencies)
+        self._pending.clear()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def versions(self, package_id: str) -> Optional[List[str]]:
+        """Список версий пакета, если он сохранен не раньше versions_ttl секунд назад"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT versions, updated_at FROM versions WHERE id_lower = ?", (package_id.lower(),)).fetchone()
+        if row is None or time.time() - row[1] >= self.versions_ttl:
+            return None
+        return row[0].split('\n') if row[0] else []
+
+    def put_versions(self, package_id: str, versions: Iterable[str]):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO versions (id_lower, versions, updated_at, catalog_commit) VALUES (?, ?, ?, ?)",
+                (package_id.lower(), '\n'.join(versions), time.time(), self.catalog_commit))
+
+    def apply_catalog_changes(self, changes: Iterable[Tuple[str, str, bool]]) -> int:
+        """Применение изменений из каталога NuGet: (id, версия, удалена ли версия).
+
+        Сохраненный catalogEntry измененной версии удаляется (будет загружен заново),
+        список версий пакета дополняется или сокращается на месте.
+        Возвращает число затронутых пакетов"""
+        self.flush()
+        affected = set()
+        with self._lock, self._connection:
+            for package_id, version, deleted in changes:
+                id_lower = package_id.lower()
+                key = version_key(version)
+                cursor = self._connection.execute(
+                    "DELETE FROM packages WHERE id_lower = ? AND version_key = ?", (id_lower, key))
+                if cursor.rowcount:
+                    self._connection.execute(
+                        "DELETE FROM dependencies WHERE id_lower = ? AND version_key = ?", (id_lower, key))
+                    affected.add(id_lower)
+
+                row = self._connection.execute(
+                    "SELECT versions FROM versions WHERE id_lower = ?", (id_lower,)).fetchone()
+                if row is None:
+                    continue
+                versions = [known for known in (row[0].split('\n') if row[0] else []) if version_key(known) != key]
+                if not deleted:
+                    versions.append(version)
+                self._connection.execute(
+                    "UPDATE versions SET versions = ? WHERE id_lower = ?", ('\n'.join(versions), id_lower))
+                affected.add(id_lower)
+        return len(affected)
+
+    def mark_catalog_commit(self, commit: str):
+        """Позиция каталога (timestamp_key), с которой согласованы списки версий, сохраняемые дальше"""
+        with self._lock, self._connection:
+            self._set_catalog_commit(commit)
+
+    def _set_catalog_commit(self, commit: str):
+        self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('catalog_commit', ?)", (commit,))
+        self.catalog_commit = commit
+
+    def refresh_versions(self, since: str, until: str) -> int:
+        """Продление свежести списков версий, согласованных с каталогом на коммите since или позже:
+        после применения изменений (since, until] они согласованы с until.
+
+        Сравниваются времена коммитов каталога (timestamp_key), а не локальные часы.
+        Возвращает число продленных списков"""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "UPDATE versions SET updated_at = ?, catalog_commit = ? WHERE catalog_commit >= ?",
+                (time.time(), until, since))
+            self._set_catalog_commit(until)
+            return cursor.rowcount
+
+    def dependents(self, dependency_id: str) -> List[Dict[str, str]]:
+        """Сохраненные версии пакетов, которые зависят от dependency_id"""
+        self.flush()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT p.id, p.version, d.version_range, d.target_framework "
+                "FROM dependencies d JOIN packages p ON p.id_lower = d.id_lower AND p.version_key = d.version_key "
+                "WHERE d.dependency_id_lower = ? ORDER BY p.id_lower, p.version_key",
+                (dependency_id.lower(),)).fetchall()
+        return [{'id': package_id, 'version': version, 'version_range': version_range or '',
+                 'target_framework': target_framework or ''}
+                for package_id, version, version_range, target_framework in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            packages = self._connection.execute("SELECT COUNT(*) FROM packages").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'packages': packages + len(self._pending)}
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._connection.close()
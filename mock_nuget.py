@@ -0,0 +1,285 @@
+"""
+Локальный HTTP сервер, имитирующий NuGet v3 API (для тестов и замеров)
+"""
+
+import gzip
+import hashlib
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Без TCP_NODELAY заголовки и тело уходят разными сегментами и упираются в delayed ACK
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # setup() вызывается один раз на каждое TCP соединение
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.paths.append(self.path)
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        failure = self.server.next_failure()
+        if failure is not None:
+            status, retry_after = failure
+            self._send(status, b'{"error": "throttled"}', retry_after=retry_after)
+            return
+        path = self.path.split('?', 1)[0]
+        body = self.server.bodies.get(path)
+        if body is None:
+            self._send(404, b'{"error": "not found"}')
+            return
+        etag = self.server.etags[path]
+        if self.headers.get('If-None-Match') == etag:
+            with self.server.lock:
+                self.server.not_modified += 1
+            self._send(304, b'', etag)
+            return
+
+        encoding = None
+        if self.server.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            with self.server.lock:
+                if path not in self.server.gzipped:
+                    self.server.gzipped[path] = gzip.compress(body)
+                body = self.server.gzipped[path]
+            encoding = 'gzip'
+        self._send(200, body, etag, encoding)
+
+    def _send(self, status: int, body: bytes, etag: str = None, encoding: str = None, retry_after: str = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if retry_after is not None:
+            self.send_header('Retry-After', retry_after)
+        if etag:
+            self.send_header('ETag', etag)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    # Очередь по умолчанию (5) переполняется при десятках одновременных подключений,
+    # и отброшенный SYN повторяется только через секунду
+    request_queue_size = 128
+    daemon_threads = True
+
+    def next_failure(self):
+        """(код, Retry-After) для ответа с ошибкой либо None: сначала внедренные ошибки,
+        затем ограничение max_rps (корзина токенов с запасом в одну секунду)"""
+        with self.lock:
+            if self.failures:
+                self.throttled += 1
+                return self.failures.pop(0)
+            if not self.max_rps:
+                return None
+            now = time.monotonic()
+            self.tokens = min(self.max_rps, self.tokens + (now - self.tokens_updated) * self.max_rps)
+            self.tokens_updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+            self.throttled += 1
+            return 429, self.retry_after
+
+    def handle_error(self, request, client_address):
+        # Клиент вправе закрыть соединение, не дочитав ответ (потоковый разбор)
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class MockNuGetServer:
+    """Сервер, отдающий заранее подготовленные JSON документы по пути URL.
+
+    Пути в documents могут содержать плейсхолдер {base}, который заменяется
+    на адрес запущенного сервера (нужно для ссылок внутри index.json).
+    latency - искусственная задержка ответа в секундах,
+    compress - сжимать ответы gzip, если клиент это поддерживает,
+    max_rps - отвечать 429 на запросы сверх max_rps в секунду (0 - без ограничения),
+    retry_after - значение заголовка Retry-After в ответах 429 (None - без заголовка)."""
+
+    def __init__(self, documents: Dict[str, Any], latency: float = 0.0, compress: bool = True,
+                 max_rps: float = 0.0, retry_after: Optional[str] = None):
+        self._httpd = _Server(('127.0.0.1', 0), _Handler)
+        self._httpd.lock = threading.Lock()
+        self._httpd.connections = 0
+        self._httpd.requests = 0
+        self._httpd.not_modified = 0
+        self._httpd.paths = []
+        self._httpd.latency = latency
+        self._httpd.compress = compress
+        self._httpd.max_rps = max_rps
+        self._httpd.retry_after = retry_after
+        self._httpd.tokens = max_rps
+        self._httpd.tokens_updated = time.monotonic()
+        self._httpd.failures = []
+        self._httpd.throttled = 0
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._httpd.bodies = {}
+        self._httpd.etags = {}
+        self._httpd.gzipped = {}
+        self.update(documents)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+
+    def update(self, documents: Dict[str, Any]):
+        """Добавление или замена документов (например, публикация новой версии пакета)"""
+        # Документы сериализуются заранее, чтобы сервер не тратил время и память на каждый запрос
+        bodies = {path: json.dumps(doc).replace('{base}', self.base_url).encode('utf-8')
+                  for path, doc in documents.items()}
+        with self._httpd.lock:
+            for path, body in bodies.items():
+                self._httpd.bodies[path] = body
+                self._httpd.etags[path] = '"' + hashlib.sha1(body).hexdigest() + '"'
+                self._httpd.gzipped.pop(path, None)
+
+    def inject_failures(self, count: int, status: int = 429, retry_after: Optional[str] = None):
+        """Следующие count запросов (к любому пути) получат ответ status"""
+        with self._httpd.lock:
+            self._httpd.failures.extend([(status, retry_after)] * count)
+
+    @property
+    def throttled(self) -> int:
+        """Число ответов с внедренной ошибкой или 429 из-за max_rps"""
+        return self._httpd.throttled
+
+    @property
+    def connections(self) -> int:
+        return self._httpd.connections
+
+    @property
+    def requests(self) -> int:
+        return self._httpd.requests
+
+    @property
+    def not_modified(self) -> int:
+        return self._httpd.not_modified
+
+    @property
+    def paths(self):
+        return list(self._httpd.paths)
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def start(self) -> 'MockNuGetServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'MockNuGetServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def simple_feed(packages: Dict[str, Dict[str, Any]], page_size: int = 0, inline: bool = True) -> Dict[str, Any]:
+    """Построение документов минимального фида.
+
+    packages: {id: {version: [(dep_id, range), ...]}} - одна группа netstandard2.0;
+    вместо списка можно задать группы по платформам {targetFramework: [(dep_id, range), ...]}.
+    page_size и inline - разбиение индекса регистрации на страницы, как в registration_documents"""
+    documents: Dict[str, Any] = {
+        '/v3/index.json': {
+            'version': '3.0.0',
+            'resources': [
+                {'@id': '{base}/v3/registration/', '@type': 'RegistrationsBaseUrl/3.6.0'},
+                {'@id': '{base}/v3/flatcontainer/', '@type': 'PackageBaseAddress/3.0.0'},
+            ],
+        },
+    }
+    for package_id, versions in packages.items():
+        lower = package_id.lower()
+        leaves = []
+        for version, deps in versions.items():
+            groups = deps if isinstance(deps, dict) else ({'netstandard2.0': deps} if deps else {})
+            entry = {
+                'id': package_id,
+                'version': version,
+                'dependencyGroups': [{
+                    'targetFramework': framework,
+                    'dependencies': [{'id': dep_id, 'range': dep_range} for dep_id, dep_range in group],
+                } for framework, group in groups.items()],
+            }
+            leaf_url = f'{{base}}/v3/registration/{lower}/{version}.json'
+            leaves.append({'@id': leaf_url, 'catalogEntry': entry})
+            # Как и в настоящем NuGet, лист регистрации ссылается на catalogEntry по URL
+            catalog_path = f'/v3/catalog/{lower}.{version}.json'
+            documents[catalog_path] = entry
+            documents[f'/v3/registration/{lower}/{version}.json'] = {
+                '@id': leaf_url,
+                'catalogEntry': '{base}' + catalog_path,
+                'listed': True,
+            }
+        documents.update(_registration_index(lower, list(versions), leaves, page_size, inline))
+    return documents
+
+
+def _registration_index(lower: str, versions: List[str], leaves: List[Dict[str, Any]], page_size: int,
+                        inline: bool) -> Dict[str, Any]:
+    """index.json регистрации со страницами по page_size листьев (0 - одна страница),
+    отдельные документы страниц при inline=False и список версий flat container"""
+    page_size = page_size or len(versions)
+    index_path = f'/v3/registration/{lower}/index.json'
+    documents: Dict[str, Any] = {}
+    pages = []
+    for start in range(0, len(versions), page_size):
+        chunk = versions[start:start + page_size]
+        page_path = f'/v3/registration/{lower}/page/{chunk[0]}/{chunk[-1]}.json'
+        page = {
+            '@id': '{base}' + (page_path if not inline else f'{index_path}#page/{chunk[0]}/{chunk[-1]}'),
+            'count': len(chunk),
+            'lower': chunk[0],
+            'upper': chunk[-1],
+        }
+        page_leaves = leaves[start:start + page_size]
+        if inline:
+            page['items'] = page_leaves
+        else:
+            documents[page_path] = dict(page, items=page_leaves, parent='{base}' + index_path)
+        pages.append(page)
+    documents[index_path] = {'count': len(pages), 'items': pages}
+    documents[f'/v3/flatcontainer/{lower}/index.json'] = {'versions': [v.lower() for v in versions]}
+    return documents
+
+
+def registration_documents(package_id: str, versions: List[str], page_size: int = 0,
+                           inline: bool = True) -> Dict[str, Any]:
+    """Документы индекса регистрации пакета: страницы по page_size версий (0 - одна страница).
+
+    inline=False - как у nuget.org для пакетов с большим числом версий: index.json
+    содержит только ссылки на страницы с границами lower/upper, листья лежат
+    в отдельных документах страниц."""
+    lower = package_id.lower()
+    leaves = [{
+        '@id': f'{{base}}/v3/registration/{lower}/{version}.json',
+        'catalogEntry': {
+            '@id': f'{{base}}/v3/catalog/{lower}.{version}.json',
+            'id': package_id,
+            'version': version,
+            'description': f'{package_id} {version}',
+            'dependencyGroups': [],
+        },
+        'packageContent': f'{{base}}/v3/flatcontainer/{lower}/{version}/{lower}.{version}.nupkg',
+    } for version in versions]
+    return _registration_index(lower, versions, leaves, page_size, inline)
@@ -0,0 +1,223 @@
+"""
+Версии пакетов NuGet (SemVer 2.0 с расширениями NuGet)
+"""
+
+import bisect
+import functools
+import itertools
+import re
+from typing import Iterable, List, Optional, Tuple
+
+_VERSION_RE = re.compile(
+    r'^\s*v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:\.(\d+))?'
+    r'(?:-([0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?'
+    r'(?:\+([0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?\s*$'
+)
+
+
+@functools.total_ordering
+class NuGetVersion:
+    """Версия major.minor.patch[.revision][-prerelease][+metadata].
+
+    Сравнение как в NuGet: недостающие компоненты равны 0, релиз старше любого
+    пререлиза, метки пререлиза сравниваются без учета регистра, числовые метки -
+    как числа и младше буквенных, метаданные сборки не учитываются."""
+
+    __slots__ = ('major', 'minor', 'patch', 'revision', 'release', 'metadata', 'original', '_key')
+
+    def __init__(self, major: int, minor: int = 0, patch: int = 0, revision: int = 0,
+                 release: str = '', metadata: str = '', original: Optional[str] = None):
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.revision = revision
+        self.release = release
+        self.metadata = metadata
+        self.original = original
+        self._key = (major, minor, patch, revision, self._release_key(release))
+
+    @staticmethod
+    def _release_key(release: str) -> Tuple:
+        # Пустая метка (релиз) должна быть больше любой непустой
+        if not release:
+            return (1,)
+        labels = []
+        for label in release.split('.'):
+            if label.isdigit():
+                labels.append((0, int(label), ''))
+            else:
+                labels.append((1, 0, label.lower()))
+        return (0, tuple(labels))
+
+    @property
+    def is_prerelease(self) -> bool:
+        return bool(self.release)
+
+    @property
+    def normalized(self) -> str:
+        """Нормализованная строка: как в URL регистрации NuGet (без метаданных, revision только если != 0)"""
+        text = f"{self.major}.{self.minor}.{self.patch}"
+        if self.revision:
+            text += f".{self.revision}"
+        if self.release:
+            text += f"-{self.release}"
+        return text
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, NuGetVersion):
+            return NotImplemented
+        return self._key == other._key
+
+    def __lt__(self, other) -> bool:
+        if not isinstance(other, NuGetVersion):
+            return NotImplemented
+        return self._key < other._key
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    def __repr__(self) -> str:
+        return f"NuGetVersion('{self}')"
+
+    def __str__(self) -> str:
+        return self.original or self.normalized
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_version(text: str) -> NuGetVersion:
+    """Разбор строки версии; ValueError для некорректной строки"""
+    match = _VERSION_RE.match(text or '')
+    if match is None:
+        raise ValueError(f"Некорректная версия NuGet: '{text}'")
+    major, minor, patch, revision, release, metadata = match.groups()
+    return NuGetVersion(int(major), int(minor or 0), int(patch or 0), int(revision or 0),
+                        release or '', metadata or '', text.strip())
+
+
+def try_parse_version(text: str) -> Optional[NuGetVersion]:
+    try:
+        return parse_version(text)
+    except (ValueError, TypeError):
+        return None
+
+
+def versions_equal(left: str, right: str) -> bool:
+    """Сравнение строк версий с учетом нормализации ('1.0' == '1.0.0')"""
+    if left == right:
+        return True
+    left_version = try_parse_version(left)
+    right_version = try_parse_version(right)
+    return left_version is not None and left_version == right_version
+
+
+class VersionRange:
+    """Диапазон версий NuGet в интервальной нотации: '1.0' (>= 1.0), '[1.0]' (== 1.0),
+    '[1.0, 2.0)', '(, 2.0]', '(1.0, )' и т.д."""
+
+    __slots__ = ('min_version', 'min_inclusive', 'max_version', 'max_inclusive', 'original')
+
+    def __init__(self, min_version: Optional[NuGetVersion], min_inclusive: bool,
+                 max_version: Optional[NuGetVersion], max_inclusive: bool, original: str = ''):
+        self.min_version = min_version
+        self.min_inclusive = min_inclusive
+        self.max_version = max_version
+        self.max_inclusive = max_inclusive
+        self.original = original
+
+    @property
+    def allows_prerelease(self) -> bool:
+        """Пререлизы подходят, только если они явно указаны в границах диапазона"""
+        return bool((self.min_version and self.min_version.is_prerelease) or
+                    (self.max_version and self.max_version.is_prerelease))
+
+    def _above_min(self, version: NuGetVersion) -> bool:
+        if self.min_version is None:
+            return True
+        return version >= self.min_version if self.min_inclusive else version > self.min_version
+
+    def _below_max(self, version: NuGetVersion) -> bool:
+        if self.max_version is None:
+            return True
+        return version <= self.max_version if self.max_inclusive else version < self.max_version
+
+    def satisfies(self, version: NuGetVersion) -> bool:
+        if version.is_prerelease and not self.allows_prerelease:
+            return False
+        return self._above_min(version) and self._below_max(version)
+
+    def contains(self, version: NuGetVersion) -> bool:
+        """Попадание в границы без правила о пререлизах (для поиска уже выбранных версий)"""
+        return self._above_min(version) and self._below_max(version)
+
+    def best_match(self, sorted_versions: List[NuGetVersion]) -> Optional[NuGetVersion]:
+        """Наименьшая подходящая версия из отсортированного списка (правило NuGet lowest applicable)"""
+        if self.min_version is None:
+            start = 0
+        elif self.min_inclusive:
+            start = bisect.bisect_left(sorted_versions, self.min_version)
+        else:
+            start = bisect.bisect_right(sorted_versions, self.min_version)
+
+        allow_prerelease = self.allows_prerelease
+        for version in itertools.islice(sorted_versions, start, None):
+            if not self._below_max(version):
+                return None
+            if allow_prerelease or not version.is_prerelease:
+                return version
+        return None
+
+    def __repr__(self) -> str:
+        return f"VersionRange('{self}')"
+
+    def __str__(self) -> str:
+        if self.original:
+            return self.original
+        if self.min_version is not None and self.min_inclusive and self.max_version is None:
+            return str(self.min_version)
+        return (('[' if self.min_inclusive else '(') + (str(self.min_version) if self.min_version else '') + ', ' +
+                (str(self.max_version) if self.max_version else '') + (']' if self.max_inclusive else ')'))
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_range(text: str) -> VersionRange:
+    """Разбор диапазона версий; одинаковые строки разбираются один раз"""
+    value = (text or '').strip()
+    if not value:
+        # Пустой диапазон - любая версия
+        return VersionRange(None, False, None, False, value)
+
+    if value[0] not in '[(':
+        return VersionRange(parse_version(value), True, None, False, value)
+
+    if value[-1] not in '])' or len(value) < 3:
+        raise ValueError(f"Некорректный диапазон версий: '{text}'")
+    min_inclusive = value[0] == '['
+    max_inclusive = value[-1] == ']'
+    body = value[1:-1]
+
+    if ',' not in body:
+        # [1.0] - ровно одна версия
+        if not (min_inclusive and max_inclusive):
+            raise ValueError(f"Некорректный диапазон версий: '{text}'")
+        exact = parse_version(body)
+        return VersionRange(exact, True, exact, True, value)
+
+    min_text, _, max_text = body.partition(',')
+    min_version = parse_version(min_text) if min_text.strip() else None
+    max_version = parse_version(max_text) if max_text.strip() else None
+    if min_version is not None and max_version is not None and max_version < min_version:
+        raise ValueError(f"Нижняя граница больше верхней: '{text}'")
+    return VersionRange(min_version, min_inclusive and min_version is not None,
+                        max_version, max_inclusive and max_version is not None, value)
+
+
+def try_parse_range(text: str) -> Optional[VersionRange]:
+    try:
+        return parse_range(text)
+    except (ValueError, TypeError):
+        return None
+
+
+def sort_versions(versions: Iterable[str]) -> List[NuGetVersion]:
+    """Отсортированный список версий; некорректные строки пропускаются"""
+    return sorted(version for version in map(try_parse_version, versions) if version is not None)
@@ -0,0 +1,118 @@
+"""
+Фильтр пакетов по id (параметр filter_substring)
+
+Каждый шаблон - подстрока, glob или регулярное выражение; все шаблоны
+компилируются один раз в общее регулярное выражение, поэтому проверка id
+выполняется одним поиском независимо от числа шаблонов. Регулярные выражения
+с группами (обратные ссылки сдвинулись бы) или глобальными флагами вроде (?i)
+в общее выражение не объединяются и проверяются по отдельности.
+Регистр не учитывается.
+
+    'logging'                  подстрока id
+    'Microsoft.*'              glob по всему id (есть символы * ? [)
+    're:^System\\.(IO|Net)'    регулярное выражение (поиск в любом месте id)
+"""
+
+import fnmatch
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Pattern, Set, Union
+
+from errors import ConfigError
+
+_REGEX_PREFIX = 're:'
+_GLOB_CHARS = frozenset('*?[')
+
+Patterns = Union[str, Iterable[str]]
+
+
+def pattern_source(pattern: str) -> str:
+    """Текст регулярного выражения для одного шаблона"""
+    if pattern.startswith(_REGEX_PREFIX):
+        return pattern[len(_REGEX_PREFIX):]
+    if _GLOB_CHARS.intersection(pattern):
+        return '^' + fnmatch.translate(pattern)
+    return re.escape(pattern)
+
+
+def compile_pattern(pattern: str) -> Pattern[str]:
+    """Шаблон, скомпилированный сам по себе; ConfigError для некорректного выражения"""
+    try:
+        return re.compile(pattern_source(pattern), re.IGNORECASE)
+    except re.error as e:
+        raise ConfigError(f"Некорректное регулярное выражение в фильтре '{pattern}': {e}")
+
+
+def _combinable(source: str) -> bool:
+    """Можно ли вставить выражение в общее как (?:...): без групп и без глобальных флагов"""
+    compiled = re.compile(source)
+    return compiled.groups == 0 and not compiled.flags & ~re.UNICODE
+
+
+class PackageFilter:
+    """Скомпилированный набор шаблонов; пустой набор пропускает все пакеты"""
+
+    def __init__(self, patterns: Patterns = ()):
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self.patterns: List[str] = [pattern for pattern in patterns if pattern]
+        compiled = [compile_pattern(pattern) for pattern in self.patterns]
+        combined = [regex.pattern for regex in compiled if _combinable(regex.pattern)]
+        # Выражения с группами или флагами проверяются по отдельности после общего
+        self._separate: List[Pattern[str]] = [regex for regex in compiled if not _combinable(regex.pattern)]
+        self._regex = None
+        if combined:
+            self._regex = re.compile('|'.join(f"(?:{source})" for source in combined), re.IGNORECASE)
+        # Результаты по id: пакет встречается в графе многократно
+        self._matches: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self._pruned: Set[str] = set()
+        self._pruned_edges = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def __str__(self) -> str:
+        return ', '.join(self.patterns)
+
+    def matches(self, package_id: str) -> bool:
+        if not self.patterns:
+            return True
+        result = self._matches.get(package_id)
+        if result is None:
+            result = ((self._regex is not None and self._regex.search(package_id) is not None) or
+                      any(regex.search(package_id) for regex in self._separate))
+            self._matches[package_id] = result
+        return result
+
+    def prune(self, dependencies: List) -> List:
+        """Зависимости, прошедшие фильтр; отброшенные связи считаются, а их id
+        запоминаются для статистики (вызывается из рабочих потоков обхода)"""
+        if not self.patterns:
+            return dependencies
+        kept = [dependency for dependency in dependencies if self.matches(dependency['id'])]
+        if len(kept) == len(dependencies):
+            return dependencies
+        pruned = {dependency['id'].lower() for dependency in dependencies if not self.matches(dependency['id'])}
+        with self._lock:
+            self._pruned.update(pruned)
+            self._pruned_edges += len(dependencies) - len(kept)
+        return kept
+
+    @property
+    def pruned_packages(self) -> int:
+        """Число различных пакетов, отброшенных при обходе"""
+        with self._lock:
+            return len(self._pruned)
+
+    @property
+    def pruned_ids(self) -> FrozenSet[str]:
+        """id отброшенных пакетов в нижнем регистре"""
+        with self._lock:
+            return frozenset(self._pruned)
+
+    @property
+    def pruned_edges(self) -> int:
+        """Число связей, отброшенных при обходе"""
+        with self._lock:
+            return self._pruned_edges
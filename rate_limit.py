@@ -0,0 +1,177 @@
+"""
+Ограничение частоты запросов к хосту и повтор запросов с экспоненциальной паузой
+
+Каждому хосту соответствует корзина токенов (token bucket). Скорость
+подстраивается под сервер: ответ 429/503 вдвое снижает ее и, если есть
+Retry-After, приостанавливает запросы к хосту; каждый успешный ответ понемногу
+ее повышает (additive increase / multiplicative decrease). Без заданного
+предела корзина не ограничивает запросы, пока сервер не начнет отказывать;
+начальной скоростью тогда становится половина фактической за последнюю секунду.
+
+Все запросы клиента - GET, поэтому их можно безопасно повторять.
+"""
+
+import collections
+import email.utils
+import random
+import threading
+import time
+from typing import Deque, Dict, Hashable, Mapping, Optional
+
+# Коды ответа, после которых запрос повторяется
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Коды, означающие перегрузку сервера: скорость запросов к хосту снижается
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Retry-After в секундах: число секунд или HTTP-дата"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+class TokenBucket:
+    """Адаптивная корзина токенов одного хоста (вызывается под блокировкой RateLimiter)"""
+
+    def __init__(self, rate: Optional[float], min_rate: float, max_rate: Optional[float], increase: float):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.tokens = rate or 0.0
+        self.updated: Optional[float] = None
+        self.blocked_until = 0.0
+        self._last_decrease = float('-inf')
+        # Время запросов за последнюю секунду - пока скорость не ограничена
+        self._recent: Deque[float] = collections.deque()
+
+    def reserve(self, now: float) -> float:
+        """Занимает токен; возвращает, сколько секунд ждать до запроса"""
+        pause = max(0.0, self.blocked_until - now)
+        if self.rate is None:
+            self._recent.append(now)
+            while self._recent[0] < now - 1.0:
+                self._recent.popleft()
+            return pause
+        # Запас не больше секунды работы на текущей скорости
+        elapsed = now - self.updated if self.updated is not None else 0.0
+        self.tokens = min(max(self.rate, 1.0), self.tokens + elapsed * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(pause, -self.tokens / self.rate)
+
+    def throttled(self, now: float, retry_after: Optional[float]):
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+        # Ответы на запросы, отправленные до снижения, не должны снижать скорость повторно
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        current = self.rate if self.rate is not None else float(len(self._recent))
+        self.rate = max(self.min_rate, current / 2)
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = now
+        self._recent.clear()
+
+    def succeeded(self):
+        if self.rate is None:
+            return
+        # Прибавка increase запросов в секунду за каждую секунду успешной работы
+        self.rate += self.increase / self.rate
+        if self.max_rate is not None:
+            self.rate = min(self.rate, self.max_rate)
+
+
+class RateLimiter:
+    """Корзины токенов по хостам; rate - предел запросов в секунду (0 - без предела)"""
+
+    def __init__(self, rate: float = 0.0, min_rate: float = 1.0, increase: float = 2.0):
+        self.max_rate = rate or None
+        self.min_rate = min_rate
+        self.increase = increase
+        self._lock = threading.Lock()
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self.throttled = 0
+        self.waited = 0.0
+
+    def _bucket(self, host: Hashable) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.max_rate, self.min_rate, self.max_rate, self.increase)
+        return bucket
+
+    def reserve(self, host: Hashable) -> float:
+        """Пауза перед запросом к хосту; ожидание выполняет вызывающий (sleep или asyncio.sleep)"""
+        with self._lock:
+            delay = self._bucket(host).reserve(time.monotonic())
+            self.waited += delay
+        return delay
+
+    def on_success(self, host: Hashable):
+        with self._lock:
+            self._bucket(host).succeeded()
+
+    def on_throttle(self, host: Hashable, retry_after: Optional[float] = None):
+        with self._lock:
+            self.throttled += 1
+            self._bucket(host).throttled(time.monotonic(), retry_after)
+
+    def rate(self, host: Hashable) -> Optional[float]:
+        """Текущая скорость для хоста (None - не ограничена)"""
+        with self._lock:
+            return self._bucket(host).rate
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {'throttled': self.throttled, 'waited': self.waited}
+
+
+class RetryPolicy:
+    """Ограниченное число повторов с паузой base_delay * 2^попытка со случайным
+    разбросом (full jitter), чтобы параллельные запросы не повторялись одновременно"""
+
+    def __init__(self, retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0,
+                 rng: Optional[random.Random] = None):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self.retried = 0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Пауза перед повтором номер attempt + 1 либо None, если повторы исчерпаны"""
+        if attempt >= self.retries:
+            return None
+        with self._lock:
+            self.retried += 1
+            jitter = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            return max(jitter, min(retry_after, self.max_delay))
+        return jitter
+
+
+def retry_delay(rate_limiter: Optional[RateLimiter], retry_policy: Optional[RetryPolicy], host: Hashable,
+                attempt: int, status: Optional[int] = None,
+                headers: Optional[Mapping[str, str]] = None) -> Optional[float]:
+    """Пауза перед повтором запроса либо None, если ошибку нужно вернуть вызывающему.
+
+    status=None - сетевая ошибка; headers - заголовки ответа в нижнем регистре"""
+    retry_after = None
+    if status is not None:
+        if status not in RETRY_STATUSES:
+            return None
+        retry_after = parse_retry_after((headers or {}).get('retry-after'))
+        if status in THROTTLE_STATUSES and rate_limiter is not None:
+            rate_limiter.on_throttle(host, retry_after)
+    if retry_policy is None:
+        return None
+    return retry_policy.delay(attempt, retry_after)
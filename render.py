@@ -0,0 +1,289 @@
+"""
+Вывод графа зависимостей в Graphviz DOT и изображение (output_image)
+
+DotWriter подключается к DependencyGraph как наблюдатель и пишет узлы и ребра
+в файл по мере обхода, поэтому текст DOT целиком в памяти не собирается.
+Готовый файл превращается в изображение одним из движков: Graphviz (dot),
+если он установлен, послойной раскладкой layout.py по построенному графу
+либо простым генератором SVG по самому файлу DOT.
+"""
+
+import html
+import os
+import re
+import shutil
+import subprocess
+import threading
+from typing import Collection, Dict, Iterator, Optional, Set, Tuple
+
+from csr_graph import CSRGraph
+from dependency_graph import DependencyEdge, GraphObserver, NodeKey
+from errors import RenderError
+from layout import LayeredLayout
+
+# Буфер записи DOT: редкие системные вызовы при сотнях тысяч строк
+_WRITE_BUFFER = 1024 * 1024
+
+# Больше узлов Graphviz раскладывает минутами - в режиме auto используется встроенная раскладка
+GRAPHVIZ_MAX_NODES = 2000
+
+_QUOTED = r'"((?:[^"\\]|\\.)*)"'
+_NODE_RE = re.compile(r'^\s*' + _QUOTED + r' \[label=' + _QUOTED + r', depth=(\d+)\];$')
+_EDGE_RE = re.compile(r'^\s*' + _QUOTED + r' -> ' + _QUOTED + r';$')
+_ERROR_RE = re.compile(r'^\s*' + _QUOTED + r' \[color=red')
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def _unquote(text: str) -> str:
+    return re.sub(r'\\(.)', lambda match: '\n' if match.group(1) == 'n' else match.group(1), text)
+
+
+def node_name(key: NodeKey) -> str:
+    """Имя узла в DOT: id пакета в нижнем регистре и версия"""
+    return f"{key[0]}/{key[1]}"
+
+
+class DotWriter(GraphObserver):
+    """Потоковая запись графа в DOT.
+
+    Объявление узла откладывается до первого входящего ребра, чтобы записать
+    его глубину (атрибут depth) - по ней встроенный SVG движок раскладывает
+    узлы по слоям. В памяти хранятся только глубины узлов, ребра сразу уходят в файл."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER)
+        self._lock = threading.Lock()
+        self._depth: Dict[NodeKey, int] = {}
+        self._pending: Dict[NodeKey, Tuple[str, str]] = {}
+        self.node_count = 0
+        self.edge_count = 0
+        self._file.write('digraph dependencies {\n'
+                         '  rankdir=TB;\n'
+                         '  node [shape=box, style=rounded, fontname="Helvetica", fontsize=10];\n'
+                         '  edge [arrowsize=0.6];\n')
+
+    def _write_node(self, key: NodeKey, package_id: str, version: str, depth: int):
+        self._depth[key] = depth
+        self.node_count += 1
+        self._file.write(f'  {_quote(node_name(key))} [label={_quote(f"{package_id}{chr(10)}{version}")}, '
+                         f'depth={depth}];\n')
+
+    def on_node(self, key: NodeKey, package_id: str, version: str):
+        with self._lock:
+            if not self._depth:
+                # Первый узел графа - корень
+                self._write_node(key, package_id, version, 0)
+            else:
+                self._pending[key] = (package_id, version)
+
+    def on_edge(self, parent: NodeKey, child: NodeKey, dependency: DependencyEdge):
+        with self._lock:
+            pending = self._pending.pop(child, None)
+            if pending is not None:
+                self._write_node(child, pending[0], pending[1], self._depth.get(parent, 0) + 1)
+            self.edge_count += 1
+            self._file.write(f'  {_quote(node_name(parent))} -> {_quote(node_name(child))};\n')
+
+    def on_error(self, key: NodeKey, message: str):
+        with self._lock:
+            self._file.write(f'  {_quote(node_name(key))} [color=red, fontcolor=red, tooltip={_quote(message)}];\n')
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            for key, (package_id, version) in self._pending.items():
+                self._write_node(key, package_id, version, 0)
+            self._pending.clear()
+            self._file.write('}\n')
+            self._file.close()
+
+    def __enter__(self) -> 'DotWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_dot(path: str) -> Iterator[Tuple[str, tuple]]:
+    """Разбор DOT, записанного DotWriter: ('node', (имя, подпись, глубина)),
+    ('edge', (откуда, куда)), ('error', (имя,)). Произвольный DOT не поддерживается"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = _EDGE_RE.match(line)
+            if match:
+                yield 'edge', (_unquote(match.group(1)), _unquote(match.group(2)))
+                continue
+            match = _NODE_RE.match(line)
+            if match:
+                yield 'node', (_unquote(match.group(1)), _unquote(match.group(2)), int(match.group(3)))
+                continue
+            match = _ERROR_RE.match(line)
+            if match:
+                yield 'error', (_unquote(match.group(1)),)
+
+
+class RenderBackend:
+    """Движок построения изображения из файла DOT"""
+
+    name = ''
+    formats: Tuple[str, ...] = ()
+
+    def available(self) -> bool:
+        return True
+
+    def render(self, dot_path: str, output_path: str, fmt: str, graph: Optional[CSRGraph] = None,
+               errors: Collection[NodeKey] = ()):
+        """graph и errors - построенный граф и узлы с ошибками, если движку нужен сам граф"""
+        raise NotImplementedError
+
+
+class GraphvizBackend(RenderBackend):
+    """Внешняя утилита dot из Graphviz: читает файл сама, Python память не расходует"""
+
+    name = 'graphviz'
+    formats = ('png', 'svg', 'pdf', 'jpg', 'gif')
+
+    def available(self) -> bool:
+        return shutil.which('dot') is not None
+
+    def render(self, dot_path: str, output_path: str, fmt: str, graph: Optional[CSRGraph] = None,
+               errors: Collection[NodeKey] = ()):
+        try:
+            subprocess.run(['dot', f'-T{fmt}', dot_path, '-o', output_path],
+                           check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            raise RenderError(f"Graphviz завершился с ошибкой: {e.stderr.strip()}")
+        except OSError as e:
+            raise RenderError(f"Не удалось запустить Graphviz: {e}")
+
+
+class SvgBackend(RenderBackend):
+    """Встроенный генератор SVG: узлы по слоям согласно depth, ребра - прямые линии.
+
+    Файл DOT читается трижды (размеры и координаты, ребра, узлы), в памяти
+    держатся только координаты узлов"""
+
+    name = 'svg'
+    formats = ('svg',)
+
+    NODE_WIDTH = 180
+    NODE_HEIGHT = 36
+    H_GAP = 20
+    V_GAP = 60
+    MARGIN = 20
+
+    def _layout(self, dot_path: str) -> Tuple[Dict[str, Tuple[int, int]], Set[str], int, int]:
+        positions: Dict[str, Tuple[int, int]] = {}
+        layer_sizes: Dict[int, int] = {}
+        errors: Set[str] = set()
+        for kind, data in read_dot(dot_path):
+            if kind == 'node':
+                name, _, depth = data
+                index = layer_sizes.get(depth, 0)
+                layer_sizes[depth] = index + 1
+                positions[name] = (self.MARGIN + index * (self.NODE_WIDTH + self.H_GAP),
+                                   self.MARGIN + depth * (self.NODE_HEIGHT + self.V_GAP))
+            elif kind == 'error':
+                errors.add(data[0])
+        widest = max(layer_sizes.values(), default=1)
+        width = 2 * self.MARGIN + widest * (self.NODE_WIDTH + self.H_GAP)
+        height = 2 * self.MARGIN + (max(layer_sizes, default=0) + 1) * (self.NODE_HEIGHT + self.V_GAP)
+        return positions, errors, width, height
+
+    def render(self, dot_path: str, output_path: str, fmt: str, graph: Optional[CSRGraph] = None,
+               errors: Collection[NodeKey] = ()):
+        positions, error_names, width, height = self._layout(dot_path)
+        half = self.NODE_WIDTH // 2
+        with open(output_path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER) as out:
+            out.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                      f'viewBox="0 0 {width} {height}" font-family="Helvetica" font-size="10">\n'
+                      '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" '
+                      'markerHeight="6" orient="auto"><path d="M0,0 L10,5 L0,10 z" fill="#555"/></marker></defs>\n'
+                      '<g stroke="#555" stroke-width="1" marker-end="url(#arrow)">\n')
+            for kind, data in read_dot(dot_path):
+                if kind != 'edge' or data[0] not in positions or data[1] not in positions:
+                    continue
+                (x1, y1), (x2, y2) = positions[data[0]], positions[data[1]]
+                out.write(f'<line x1="{x1 + half}" y1="{y1 + self.NODE_HEIGHT}" x2="{x2 + half}" y2="{y2}"/>\n')
+            out.write('</g>\n<g>\n')
+            for kind, data in read_dot(dot_path):
+                if kind != 'node':
+                    continue
+                name, label, _ = data
+                x, y = positions[name]
+                color = 'red' if name in error_names else '#333'
+                lines = label.split('\n')
+                out.write(f'<rect x="{x}" y="{y}" width="{self.NODE_WIDTH}" height="{self.NODE_HEIGHT}" rx="6" '
+                          f'fill="#fff" stroke="{color}"/>')
+                for number, text in enumerate(lines[:2]):
+                    out.write(f'<text x="{x + half}" y="{y + 15 + number * 12}" text-anchor="middle" '
+                              f'fill="{color}">{html.escape(text[:32])}</text>')
+                out.write('\n')
+            out.write('</g>\n</svg>\n')
+
+
+class LayeredBackend(RenderBackend):
+    """Послойная раскладка (метод Сугиямы) прямо по CSRGraph, без внешних программ"""
+
+    name = 'layered'
+    formats = ('svg',)
+
+    def render(self, dot_path: str, output_path: str, fmt: str, graph: Optional[CSRGraph] = None,
+               errors: Collection[NodeKey] = ()):
+        if graph is None:
+            raise RenderError("Движку 'layered' нужен построенный граф")
+        LayeredLayout(graph).write_svg(output_path, errors)
+
+
+RENDER_BACKENDS = {
+    'graphviz': GraphvizBackend,
+    'layered': LayeredBackend,
+    'svg': SvgBackend,
+}
+
+
+def dot_path_for(output_image: str) -> str:
+    """Файл DOT рядом с изображением: dependencies.png -> dependencies.dot"""
+    return os.path.splitext(output_image)[0] + '.dot'
+
+
+def _auto_backend(graph: Optional[CSRGraph]) -> RenderBackend:
+    graphviz = GraphvizBackend()
+    if graphviz.available() and (graph is None or graph.node_count <= GRAPHVIZ_MAX_NODES):
+        return graphviz
+    return LayeredBackend() if graph is not None else SvgBackend()
+
+
+def render_image(dot_path: str, output_image: str, backend: str = 'auto', graph: Optional[CSRGraph] = None,
+                 errors: Collection[NodeKey] = ()) -> str:
+    """Построение изображения; возвращает путь к созданному файлу.
+
+    backend='auto' выбирает Graphviz, если он установлен и граф не больше
+    GRAPHVIZ_MAX_NODES узлов, иначе встроенную раскладку (или простой SVG,
+    если graph не передан). Если выбранный движок не поддерживает формат
+    output_image, создается SVG с тем же именем"""
+    fmt = os.path.splitext(output_image)[1].lstrip('.').lower()
+    if fmt == 'dot':
+        return dot_path
+
+    if backend == 'auto':
+        engine = _auto_backend(graph)
+    elif backend in RENDER_BACKENDS:
+        engine = RENDER_BACKENDS[backend]()
+        if not engine.available():
+            raise RenderError(f"Движок визуализации '{backend}' недоступен")
+    else:
+        raise RenderError(f"Неизвестный движок визуализации '{backend}'")
+
+    if fmt not in engine.formats:
+        print(f"Движок '{engine.name}' не поддерживает формат '{fmt}', изображение будет сохранено в SVG")
+        fmt = 'svg'
+        output_image = os.path.splitext(output_image)[0] + '.svg'
+
+    engine.render(dot_path, output_image, fmt, graph, errors)
+    return output_image
@@ -0,0 +1,111 @@
+"""
+Разрешение транзитивных зависимостей обходом графа в ширину
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+from dependency_graph import DependencyEdge, DependencyGraph, GraphObserver, NodeKey
+from nuget_version import NuGetVersion, try_parse_range
+
+# Зависимость из _extract_dependencies и выбранная для нее версия
+Edge = Tuple[DependencyEdge, Optional[str]]
+
+
+def lowest_version_from_range(version_range: str) -> Optional[str]:
+    """Нижняя граница диапазона версий NuGet: '[4.3.0, )' -> '4.3.0', '4.3.0' -> '4.3.0'.
+
+    Запасной вариант, когда список опубликованных версий недоступен"""
+    text = version_range.strip()
+    if not text:
+        return None
+    if text[0] in '[(':
+        lower = text[1:].split(',', 1)[0].strip(' ])')
+        return lower or None
+    return text
+
+
+class TransitiveResolver:
+    """Обход графа зависимостей по уровням: все пакеты очередного уровня
+    запрашиваются параллельно, не более max_workers запросов одновременно"""
+
+    def __init__(self, visualizer, max_workers: int = 8):
+        self.visualizer = visualizer
+        self.max_workers = max_workers
+
+    @staticmethod
+    def choose_version(version_range: str, versions: List[NuGetVersion]) -> Optional[str]:
+        """Наименьшая версия из versions, подходящая под диапазон (как выбирает NuGet).
+
+        Если диапазон не разбирается или подходящих версий нет, берется его нижняя граница"""
+        parsed = try_parse_range(version_range)
+        if parsed is not None:
+            match = parsed.best_match(versions)
+            if match is not None:
+                return str(match)
+        return lowest_version_from_range(version_range)
+
+    def select_version(self, package_id: str, version_range: str) -> Optional[str]:
+        """Выбор конкретной версии зависимости по диапазону"""
+        try:
+            versions = self.visualizer._get_package_versions(package_id)
+        except Exception:
+            # Список версий недоступен - остается нижняя граница диапазона
+            versions = []
+        return self.choose_version(version_range, versions)
+
+    def _fetch(self, graph: DependencyGraph, key: NodeKey) -> List[Edge]:
+        """Зависимости узла вместе с выбранными версиями (выполняется в рабочем потоке)"""
+        node = graph.nodes[key]
+        # URL сервиса регистрации определяется при первом запросе, которому он нужен:
+        # пакеты из локального хранилища обходятся без сети
+        package_data = self.visualizer._fetch_package_data(None, node['id'], node['version'])
+        dependencies = self.visualizer._prune_dependencies(self.visualizer._extract_dependencies(package_data))
+        return [(dependency, self.select_version(dependency['id'], dependency['version_range']))
+                for dependency in dependencies]
+
+    def expand_level(self, graph: DependencyGraph, frontier: List[NodeKey], results: list,
+                     visited: Set[NodeKey]) -> List[NodeKey]:
+        """Добавление в граф результатов очередного уровня; возвращает следующий фронт.
+
+        results[i] - список пар (зависимость, выбранная версия) для frontier[i] либо исключение"""
+        next_frontier = []
+        for key, result in zip(frontier, results):
+            if isinstance(result, BaseException):
+                # Ошибка одного пакета не должна прерывать построение всего графа
+                graph.mark_error(key, str(result))
+                continue
+
+            for dependency, child_version in result:
+                if child_version is None:
+                    continue
+                child = graph.add_node(dependency['id'], child_version)
+                graph.add_edge(key, child, dependency)
+                if child not in visited:
+                    visited.add(child)
+                    next_frontier.append(child)
+        return next_frontier
+
+    def resolve(self, package_name: str, version: str, observer: Optional[GraphObserver] = None) -> DependencyGraph:
+        """Построение полного графа зависимостей пакета; observer получает узлы и ребра по мере обхода"""
+        return self.resolve_many([(package_name, version)], observer)
+
+    def resolve_many(self, roots: List[Tuple[str, str]], observer: Optional[GraphObserver] = None) -> DependencyGraph:
+        """Общий граф для нескольких корней (id, версия): обход идет по всем корням сразу,
+        и пакет, общий для нескольких корней, запрашивается один раз"""
+        graph = DependencyGraph(*roots[0], observer)
+        for package_name, version in roots[1:]:
+            graph.add_root(package_name, version)
+        visited = set(graph.roots)
+        frontier = list(graph.roots)
+        depth = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while frontier:
+                print(f"Уровень {depth}: запрос {len(frontier)} пакетов")
+                futures = [executor.submit(self._fetch, graph, key) for key in frontier]
+                results = [future.exception() or future.result() for future in futures]
+                frontier = self.expand_level(graph, frontier, results, visited)
+                depth += 1
+
+        return graph
@@ -0,0 +1,169 @@
+"""
+Индекс обратных зависимостей ("кто тянет X?") по разрешенному графу
+
+Индекс записывается после построения общего графа в пакетном режиме и отвечает
+на вопрос "какие корни и через какие пакеты зависят от пакета X в диапазоне
+версий R". Обход идет
+от найденных версий X по обратным ребрам, поэтому его цена пропорциональна
+числу пакетов, зависящих от X, а не размеру графа. Файл читается через mmap,
+пакет ищется двоичным поиском по id - открытие и поиск не читают граф целиком.
+
+Формат (заголовок little-endian, массивы int32 little-endian):
+    заголовок         magic, версия формата, число узлов, ребер и корней
+    reverse_offsets   N + 1 смещений обратной смежности
+    reverse_sources   E номеров узлов, зависящих от узла
+    roots             номера корневых узлов
+    by_id             номера узлов, отсортированные по id в нижнем регистре
+    name_offsets      N + 1 смещений имен
+    имена             "id\tверсия" каждого узла (utf-8)
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from csr_graph import CSRGraph
+from errors import NuGetError
+from nuget_version import parse_range, try_parse_version
+
+_MAGIC = b'NGRIDX\x00\x01'
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sIIII')
+
+
+def _int32(values: Iterable[int]) -> bytes:
+    data = array('i', values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_reverse_index(path: str, graph: CSRGraph, roots: Iterable[int]):
+    """Запись индекса по замороженному графу; roots - номера корневых узлов"""
+    roots = list(roots)
+    names = [f"{package_id}\t{version}".encode('utf-8') for package_id, version in graph.names]
+    by_id = sorted(range(graph.node_count), key=lambda node: graph.keys[node])
+    name_offsets = [0]
+    for name in names:
+        name_offsets.append(name_offsets[-1] + len(name))
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, graph.node_count, graph.edge_count, len(roots)))
+        for values in (graph.reverse_offsets, graph.reverse_sources, roots, by_id, name_offsets):
+            f.write(_int32(values))
+        f.writelines(names)
+    os.replace(temp_path, path)
+
+
+class ReverseIndex:
+    """Запросы к записанному индексу обратных зависимостей"""
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise NuGetError(f"Не удалось открыть индекс обратных зависимостей {path}: {e}")
+
+        if len(self._mm) < _HEADER.size:
+            self._mm.close()
+            raise NuGetError(f"Файл {path} не является индексом обратных зависимостей")
+        magic, format_version, self.node_count, self.edge_count, root_count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or format_version != _FORMAT_VERSION:
+            self._mm.close()
+            raise NuGetError(f"Файл {path} не является индексом обратных зависимостей версии {_FORMAT_VERSION}")
+
+        offset = _HEADER.size
+        arrays = []
+        for length in (self.node_count + 1, self.edge_count, root_count, self.node_count, self.node_count + 1):
+            arrays.append(self._array(offset, length))
+            offset += 4 * length
+        self._reverse_offsets, self._reverse_sources, roots, self._by_id, self._name_offsets = arrays
+        self._names_offset = offset
+        self.roots: List[int] = list(roots)
+
+    def _array(self, offset: int, length: int):
+        """Массив int32 из файла: без копирования, если порядок байт совпадает"""
+        view = memoryview(self._mm)[offset:offset + 4 * length]
+        if sys.byteorder == 'little':
+            return view.cast('i')
+        data = array('i', view.tobytes())
+        view.release()
+        data.byteswap()
+        return data
+
+    def name(self, node: int) -> Tuple[str, str]:
+        """(id, версия) узла"""
+        start = self._names_offset + self._name_offsets[node]
+        end = self._names_offset + self._name_offsets[node + 1]
+        package_id, _, version = self._mm[start:end].decode('utf-8').partition('\t')
+        return package_id, version
+
+    def find(self, package_id: str, version_range: str = '') -> List[int]:
+        """Узлы пакета package_id с версиями из диапазона (пустой диапазон - любая версия).
+
+        Пререлизы не исключаются: ищутся уже выбранные версии, а не кандидаты на установку"""
+        key = package_id.lower()
+        low, high = 0, self.node_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.name(self._by_id[middle])[0].lower() < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        bounds = parse_range(version_range) if version_range.strip() else None
+        nodes = []
+        for position in range(low, self.node_count):
+            node = self._by_id[position]
+            node_id, version = self.name(node)
+            if node_id.lower() != key:
+                break
+            if bounds is None:
+                nodes.append(node)
+                continue
+            parsed = try_parse_version(version)
+            if parsed is not None and bounds.contains(parsed):
+                nodes.append(node)
+        return nodes
+
+    def dependents(self, package_id: str, version_range: str = '') -> List[Dict[str, object]]:
+        """Корни, зависящие от пакета, и кратчайший путь от каждого корня до каждой найденной версии:
+        [{'root': (id, версия), 'package': (id, версия), 'path': [(id, версия), ...]}, ...]"""
+        roots = set(self.roots)
+        results = []
+        for target in self.find(package_id, version_range):
+            # toward[узел] - следующий узел на кратчайшем пути к target
+            toward: Dict[int, Optional[int]] = {target: None}
+            queue = [target]
+            for node in queue:
+                if node in roots:
+                    path = [node]
+                    while toward[path[-1]] is not None:
+                        path.append(toward[path[-1]])
+                    results.append({'root': self.name(node), 'package': self.name(target),
+                                     'path': [self.name(step) for step in path]})
+                start, end = self._reverse_offsets[node], self._reverse_offsets[node + 1]
+                for parent in self._reverse_sources[start:end]:
+                    if parent not in toward:
+                        toward[parent] = node
+                        queue.append(parent)
+        return results
+
+    def close(self):
+        # Представления массивов ссылаются на mmap и должны быть освобождены раньше него
+        for data in (self._reverse_offsets, self._reverse_sources, self._by_id, self._name_offsets):
+            if isinstance(data, memoryview):
+                data.release()
+        self._mm.close()
+
+    def __enter__(self) -> 'ReverseIndex':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,74 @@
+"""
+Разобранный индекс сервисов NuGet и его кэш на время жизни процесса
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ServiceIndex:
+    """Индекс сервисов с готовым словарем @type -> @id"""
+
+    def __init__(self, document: Dict[str, Any]):
+        self.document = document
+        self.services: Dict[str, str] = {}
+        for resource in document.get('resources', []):
+            service_type = resource.get('@type')
+            service_url = resource.get('@id')
+            # Как и при линейном поиске, побеждает первый ресурс данного типа
+            if isinstance(service_type, str) and service_url and service_type not in self.services:
+                self.services[service_type] = service_url
+
+    def find(self, service_type: str) -> Optional[str]:
+        return self.services.get(service_type)
+
+
+class ServiceIndexCache:
+    """Кэш индексов сервисов по URL репозитория с ограниченным временем жизни"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[ServiceIndex, float]] = {}
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self.fetches = 0
+
+    def peek(self, url: str, ttl: float) -> Optional[ServiceIndex]:
+        """Индекс из кэша, если он моложе ttl секунд"""
+        with self._lock:
+            cached = self._entries.get(url)
+        if cached is not None and time.monotonic() - cached[1] < ttl:
+            return cached[0]
+        return None
+
+    def put(self, url: str, document: Dict[str, Any]) -> ServiceIndex:
+        index = ServiceIndex(document)
+        with self._lock:
+            self._entries[url] = (index, time.monotonic())
+            self.fetches += 1
+        return index
+
+    def get(self, url: str, loader: Callable[[], Dict[str, Any]], ttl: float) -> ServiceIndex:
+        """Индекс из кэша либо загруженный через loader; параллельные вызовы
+        для одного URL загружают индекс один раз"""
+        index = self.peek(url, ttl)
+        if index is not None:
+            return index
+
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            # Пока ждали блокировку, индекс мог загрузить другой поток
+            index = self.peek(url, ttl)
+            if index is not None:
+                return index
+            return self.put(url, loader())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.fetches = 0
+
+
+# Общий для всех DependencyVisualizer процесса
+SERVICE_INDEX_CACHE = ServiceIndexCache()
@@ -0,0 +1,118 @@
+"""
+Объединение одновременных запросов одного и того же URL (single-flight)
+
+В ромбовидном графе десятки родителей зависят от одного пакета, и при
+параллельном обходе одинаковые документы запрашиваются одновременно. Первый
+вызов по ключу выполняет запрос, остальные ждут его завершения и получают тот
+же разобранный результат (или то же исключение). Завершившийся вызов не
+запоминается - это не кэш, повторный запрос после него выполняется заново.
+
+Результат общий для всех ожидавших, поэтому изменять его нельзя.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class FlightStats:
+    """Счетчики выполненных и объединенных вызовов (общие для потоков и asyncio)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.collapsed = 0
+
+    def record(self, collapsed: bool):
+        with self._lock:
+            if collapsed:
+                self.collapsed += 1
+            else:
+                self.executed += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {'executed': self.executed, 'collapsed': self.collapsed}
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Single-flight для рабочих потоков"""
+
+    def __init__(self, stats: Optional[FlightStats] = None):
+        self.stats = stats or FlightStats()
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, function: Callable[[], Any]) -> Any:
+        """Результат function(); одновременные вызовы с тем же key ждут первый"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        self.stats.record(collapsed=not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Single-flight для корутин одного цикла событий"""
+
+    def __init__(self, stats: Optional[FlightStats] = None):
+        self.stats = stats or FlightStats()
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        self.stats.record(collapsed=future is not None)
+        if future is not None:
+            # Отмена одного из ожидающих не должна отменять общий запрос
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            # Отменен ведущий вызов (например, проигравший поиск в другом источнике) -
+            # ожидающие его не отменялись и повторяют запрос сами
+            return await self.do(key, factory)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Исключение получено ведущим вызовом - без ожидающих предупреждения не будет
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
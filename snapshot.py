@@ -0,0 +1,187 @@
+"""
+Офлайн-снимок данных регистрации NuGet
+
+Снимок - один бинарный файл с данными пакетов, которые понадобились при
+разрешении зависимостей: id, список версий и dependencyGroups каждой
+использованной версии. Файл читается через mmap, поэтому открытие почти
+ничего не стоит, а поиск пакета затрагивает только страницы индекса и
+одной записи.
+
+Формат (все числа little-endian):
+    заголовок   magic, версия формата, число пакетов, смещения индекса и имен
+    записи      JSON каждого пакета (utf-8), одна за другой
+    индекс      записи <QIII: смещение и длина JSON, смещение и длина имени,
+                отсортированы по id пакета в нижнем регистре
+    имена       id пакетов в нижнем регистре (utf-8)
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from errors import NuGetError
+from nuget_version import try_parse_version
+
+_MAGIC = b'NGSNAP\x00\x01'
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sIIQQ')
+_INDEX_ENTRY = struct.Struct('<QIII')
+
+# Поля catalogEntry, которые нужны для разрешения зависимостей
+_ENTRY_FIELDS = ('id', 'version', 'dependencyGroups')
+
+
+def _version_key(version: str) -> str:
+    """Ключ версии в снимке: '1.0' и '1.0.0' - одна и та же версия"""
+    parsed = try_parse_version(version)
+    return parsed.normalized if parsed is not None else version
+
+
+class SnapshotRecorder:
+    """Накопление данных пакетов во время разрешения зависимостей (потокобезопасно)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.packages: Dict[str, Dict[str, Any]] = {}
+
+    def _package(self, package_id: str) -> Dict[str, Any]:
+        return self.packages.setdefault(package_id.lower(), {'id': package_id, 'versions': [], 'entries': {}})
+
+    def record_entry(self, catalog_entry: Dict[str, Any]):
+        """Запоминание catalogEntry версии пакета (лишние поля отбрасываются)"""
+        package_id = catalog_entry.get('id')
+        version = catalog_entry.get('version')
+        if not package_id or not version:
+            return
+        entry = {field: catalog_entry[field] for field in _ENTRY_FIELDS if field in catalog_entry}
+        with self._lock:
+            package = self._package(package_id)
+            package['id'] = package_id
+            package['entries'][_version_key(version)] = entry
+
+    def record_versions(self, package_id: str, versions: Iterable[str]):
+        with self._lock:
+            self._package(package_id)['versions'] = list(versions)
+
+    def write(self, path: str) -> int:
+        """Запись снимка в файл; возвращает число пакетов"""
+        with self._lock:
+            packages = list(self.packages.values())
+        for package in packages:
+            if not package['versions']:
+                # Список версий не запрашивался - известны только сохраненные версии
+                package['versions'] = [entry['version'] for entry in package['entries'].values()]
+        write_snapshot(path, packages)
+        return len(packages)
+
+
+def write_snapshot(path: str, packages: List[Dict[str, Any]]):
+    """Запись снимка; packages - словари {'id', 'versions', 'entries': {версия: catalogEntry}}"""
+    records = sorted(((package['id'].lower().encode('utf-8'),
+                       json.dumps(package, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                      for package in packages), key=lambda record: record[0])
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(b'\x00' * _HEADER.size)
+        offsets = []
+        for _, body in records:
+            offsets.append(f.tell())
+            f.write(body)
+
+        index_offset = f.tell()
+        names_offset = index_offset + _INDEX_ENTRY.size * len(records)
+        name_offset = names_offset
+        for (name, body), offset in zip(records, offsets):
+            f.write(_INDEX_ENTRY.pack(offset, len(body), name_offset, len(name)))
+            name_offset += len(name)
+        for name, _ in records:
+            f.write(name)
+
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(records), index_offset, names_offset))
+    os.replace(temp_path, path)
+
+
+class SnapshotRepository:
+    """Источник данных пакетов из снимка вместо сервера NuGet"""
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise NuGetError(f"Не удалось открыть снимок {path}: {e}")
+
+        if len(self._mm) < _HEADER.size:
+            self._mm.close()
+            raise NuGetError(f"Файл {path} не является снимком NuGet")
+        magic, format_version, self._count, self._index_offset, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or format_version != _FORMAT_VERSION:
+            self._mm.close()
+            raise NuGetError(f"Файл {path} не является снимком NuGet версии {_FORMAT_VERSION}")
+        self._records: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def _entry(self, position: int) -> Tuple[int, int, bytes]:
+        offset, length, name_offset, name_length = _INDEX_ENTRY.unpack_from(
+            self._mm, self._index_offset + position * _INDEX_ENTRY.size)
+        return offset, length, self._mm[name_offset:name_offset + name_length]
+
+    def _find(self, name: bytes) -> Optional[Tuple[int, int]]:
+        """Двоичный поиск по индексу: читаются только log2(N) его записей"""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset, length, candidate = self._entry(middle)
+            if candidate == name:
+                return offset, length
+            if candidate < name:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def record(self, package_id: str) -> Optional[Dict[str, Any]]:
+        """Запись пакета {'id', 'versions', 'entries'} либо None"""
+        key = package_id.lower()
+        if key not in self._records:
+            location = self._find(key.encode('utf-8'))
+            self._records[key] = None if location is None else \
+                json.loads(self._mm[location[0]:location[0] + location[1]])
+        return self._records[key]
+
+    def _require(self, package_id: str) -> Dict[str, Any]:
+        record = self.record(package_id)
+        if record is None:
+            raise NuGetError(f"Пакет {package_id} отсутствует в снимке {self.path}")
+        return record
+
+    def package_data(self, package_id: str, version: str) -> Dict[str, Any]:
+        """catalogEntry версии пакета - аналог _get_package_data без сети"""
+        entry = self._require(package_id)['entries'].get(_version_key(version))
+        if entry is None:
+            raise NuGetError(f"Версия {version} пакета {package_id} отсутствует в снимке {self.path}")
+        return entry
+
+    def versions(self, package_id: str) -> List[str]:
+        return list(self._require(package_id)['versions'])
+
+    def package_ids(self) -> Iterator[str]:
+        for position in range(self._count):
+            yield self._entry(position)[2].decode('utf-8')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self) -> 'SnapshotRepository':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,239 @@
+"""
+Несколько источников пакетов (внутренний фид и nuget.org) с выбором первого ответа
+
+Каждый источник - URL индекса сервисов со своим пулом соединений и своей
+записью в кэше индексов сервисов. Поиск пакета (данные версии, список версий)
+выполняется по стратегии:
+
+    priority - источники по порядку, следующий - только если предыдущий не нашел пакет
+    race     - все источники одновременно; первый успешный ответ побеждает,
+               остальные отменяются (в потоках - еще не начатые, в asyncio - все)
+
+Запросы внутри поиска идут через пул источника, выбранного для текущего потока
+или задачи asyncio (CURRENT_SOURCE), поэтому код разбора документов не знает
+об источниках. Для каждого источника собираются задержки поиска и исходы.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from errors import NuGetError
+from http_pool import ConnectionPool
+from instrumentation import Histogram
+
+T = TypeVar('T')
+
+STRATEGIES = ('priority', 'race')
+
+# Источник, через который идут запросы текущего поиска (None - основной)
+CURRENT_SOURCE: contextvars.ContextVar[Optional['PackageSource']] = \
+    contextvars.ContextVar('current_source', default=None)
+
+
+class SourceCancelled(Exception):
+    """Поиск в источнике не начат: пакет уже найден в другом"""
+
+
+class PackageSource:
+    """Фид NuGet: URL индекса сервисов, пул соединений и статистика поиска"""
+
+    def __init__(self, url: str, pool: ConnectionPool):
+        self.url = url
+        self.pool = pool
+        self.latency = Histogram()
+        self.wins = 0
+        self.failures = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, seconds: Optional[float] = None):
+        """outcome: 'win', 'failure' или 'cancelled'; seconds - время завершенного поиска"""
+        with self._lock:
+            if seconds is not None:
+                self.latency.add(seconds, error=outcome == 'failure')
+            if outcome == 'win':
+                self.wins += 1
+            elif outcome == 'failure':
+                self.failures += 1
+            else:
+                self.cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            summary = self.latency.summary()
+            return {'url': self.url, 'wins': self.wins, 'failures': self.failures, 'cancelled': self.cancelled,
+                    'lookups': summary['count'], 'p50': summary['p50'], 'p95': summary['p95'],
+                    'max': summary['max']}
+
+
+class _Race:
+    """Победитель одного поиска в режиме race"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.winner: Optional[PackageSource] = None
+
+    def claim(self, source: PackageSource) -> bool:
+        with self._lock:
+            if self.winner is None:
+                self.winner = source
+            return self.winner is source
+
+
+class SourceSet:
+    """Источники в порядке приоритета и стратегия поиска пакета в них"""
+
+    def __init__(self, sources: List[PackageSource], strategy: str = 'race', max_workers: int = 8):
+        if not sources:
+            raise ValueError("Нужен хотя бы один источник")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия: {strategy}")
+        self.sources = sources
+        self.strategy = strategy
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def primary(self) -> PackageSource:
+        return self.sources[0]
+
+    def current(self) -> PackageSource:
+        """Источник текущего поиска либо основной"""
+        return CURRENT_SOURCE.get() or self.sources[0]
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def __iter__(self):
+        return iter(self.sources)
+
+    def _run(self, source: PackageSource, lookup: Callable[[PackageSource], T], race: Optional[_Race] = None) -> T:
+        if race is not None and race.winner is not None:
+            source.record('cancelled')
+            raise SourceCancelled(source.url)
+        token = CURRENT_SOURCE.set(source)
+        started = time.perf_counter()
+        try:
+            result = lookup(source)
+        except Exception:
+            source.record('failure', time.perf_counter() - started)
+            raise
+        finally:
+            CURRENT_SOURCE.reset(token)
+        won = race is None or race.claim(source)
+        source.record('win' if won else 'cancelled', time.perf_counter() - started)
+        return result
+
+    def first(self, lookup: Callable[[PackageSource], T]) -> T:
+        """Результат lookup(источник) от первого источника, где поиск удался"""
+        if len(self.sources) == 1:
+            # Ошибка единственного источника передается как есть
+            return self._run(self.sources[0], lookup)
+        if self.strategy == 'priority':
+            errors = []
+            for source in self.sources:
+                try:
+                    return self._run(source, lookup)
+                except Exception as e:
+                    errors.append(f"{source.url}: {e}")
+            raise NuGetError(self._failure_message(errors))
+
+        race = _Race()
+        futures = {self._pool().submit(self._run, source, lookup, race): source for source in self.sources}
+        pending = set(futures)
+        errors = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None and race.winner is futures[future]:
+                    for loser in pending:
+                        # Запущенные запросы не прерываются: их результат просто не нужен
+                        if loser.cancel():
+                            futures[loser].record('cancelled')
+                    return future.result()
+                if error is not None:
+                    errors.append(f"{futures[future].url}: {error}")
+        raise NuGetError(self._failure_message(errors))
+
+    async def _run_async(self, source: PackageSource, lookup: Callable[[PackageSource], Awaitable[T]],
+                         race: Optional[_Race] = None) -> T:
+        # Для нескольких источников вызывается в отдельной задаче asyncio: у нее своя копия
+        # контекста, и установка видна только ей. Единственный источник - основной, его не задаем
+        if len(self.sources) > 1:
+            CURRENT_SOURCE.set(source)
+        started = time.perf_counter()
+        try:
+            result = await lookup(source)
+        except asyncio.CancelledError:
+            source.record('cancelled')
+            raise
+        except Exception:
+            source.record('failure', time.perf_counter() - started)
+            raise
+        won = race is None or race.claim(source)
+        source.record('win' if won else 'cancelled', time.perf_counter() - started)
+        return result
+
+    async def first_async(self, lookup: Callable[[PackageSource], Awaitable[T]]) -> T:
+        """Корутинный аналог first; в режиме race проигравшие задачи отменяются"""
+        if len(self.sources) == 1:
+            return await self._run_async(self.sources[0], lookup)
+        if self.strategy == 'priority':
+            errors = []
+            for source in self.sources:
+                try:
+                    return await asyncio.ensure_future(self._run_async(source, lookup))
+                except Exception as e:
+                    errors.append(f"{source.url}: {e}")
+            raise NuGetError(self._failure_message(errors))
+
+        race = _Race()
+        tasks = {asyncio.ensure_future(self._run_async(source, lookup, race)): source for source in self.sources}
+        pending = set(tasks)
+        errors = []
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        errors.append(f"{tasks[task].url}: поиск отменен")
+                        continue
+                    error = task.exception()
+                    if error is None and race.winner is tasks[task]:
+                        return task.result()
+                    if error is not None:
+                        errors.append(f"{tasks[task].url}: {error}")
+        finally:
+            for task in pending:
+                task.cancel()
+        raise NuGetError(self._failure_message(errors))
+
+    @staticmethod
+    def _failure_message(errors: List[str]) -> str:
+        if len(errors) == 1:
+            return errors[0]
+        return "Пакет не найден ни в одном источнике: " + "; ".join(errors)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers * len(self.sources),
+                                                    thread_name_prefix='source')
+            return self._executor
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [source.stats() for source in self.sources]
+
+    def close(self):
+        for source in self.sources:
+            source.pool.close()
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
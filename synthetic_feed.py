@@ -0,0 +1,102 @@
+"""
+Генератор синтетических фидов NuGet v3 для замеров производительности
+
+Функции-формы строят описание графа заданной структуры с корнем
+Root.Package 1.0.0 в формате mock_nuget.simple_feed: {id: {версия: [(id
+зависимости, диапазон), ...]}} (группы по платформам - словарем
+{targetFramework: [...]}). Документы фида собирает simple_feed, поэтому
+синтетические фиды и фиды тестов устроены одинаково.
+"""
+
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from mock_nuget import simple_feed
+
+ROOT_ID = 'Root.Package'
+ROOT_VERSION = '1.0.0'
+
+Dependencies = List[Tuple[str, str]]
+Packages = Dict[str, Dict[str, Union[Dependencies, Dict[str, Dependencies]]]]
+
+
+def chain(depth: int) -> Packages:
+    """Root -> Chain1 -> Chain2 -> ... -> Chain<depth>: один пакет на уровень"""
+    packages: Packages = {ROOT_ID: {ROOT_VERSION: [('Chain1', '[1.0.0, )')] if depth else []}}
+    for level in range(1, depth + 1):
+        packages[f'Chain{level}'] = {'1.0.0': [(f'Chain{level + 1}', '[1.0.0, )')] if level < depth else []}
+    return packages
+
+
+def fan_out(width: int) -> Packages:
+    """Корень с width прямыми зависимостями без собственных зависимостей"""
+    packages: Packages = {ROOT_ID: {ROOT_VERSION: [(f'Leaf{i}', '[1.0.0, )') for i in range(width)]}}
+    for i in range(width):
+        packages[f'Leaf{i}'] = {'1.0.0': []}
+    return packages
+
+
+def diamonds(width: int, levels: int) -> Packages:
+    """levels уровней по width пакетов; каждый пакет зависит от всех пакетов следующего уровня
+    (width^2 ребер между уровнями, один и тот же пакет достижим width путями)"""
+    def level_ids(level: int) -> List[str]:
+        return [f'D{level}.{i}' for i in range(width)]
+
+    packages: Packages = {ROOT_ID: {ROOT_VERSION: [(dep, '[1.0.0, )') for dep in level_ids(1)] if levels else []}}
+    for level in range(1, levels + 1):
+        deps = [(dep, '[1.0.0, )') for dep in level_ids(level + 1)] if level < levels else []
+        for package_id in level_ids(level):
+            packages[package_id] = {'1.0.0': deps}
+    return packages
+
+
+def cycle(length: int) -> Packages:
+    """Root -> Cycle0 -> Cycle1 -> ... -> Cycle<length-1> -> Cycle0"""
+    packages: Packages = {ROOT_ID: {ROOT_VERSION: [('Cycle0', '[1.0.0, )')]}}
+    for i in range(length):
+        packages[f'Cycle{i}'] = {'1.0.0': [(f'Cycle{(i + 1) % length}', '[1.0.0, )')]}
+    return packages
+
+
+def many_versions(packages_count: int, versions: int) -> Packages:
+    """Корень зависит от packages_count пакетов с versions версиями у каждого;
+    диапазон указывает на середину списка, чтобы выбор версии просматривал его целиком"""
+    middle = f'1.{versions // 2}.0'
+    packages: Packages = {ROOT_ID: {ROOT_VERSION: [(f'Versioned{i}', f'[{middle}, )') for i in range(packages_count)]}}
+    for i in range(packages_count):
+        packages[f'Versioned{i}'] = {f'1.{minor}.0': [] for minor in range(versions)}
+    return packages
+
+
+def multi_framework(width: int, levels: int) -> Packages:
+    """Пакеты с группами net462, netstandard2.0 и net8.0, ведущими к разным пакетам
+    следующего уровня (Fx*, Std*, Core*): без целевой платформы обход идет во все три"""
+    families = {'net462': 'Fx', 'netstandard2.0': 'Std', 'net8.0': 'Core'}
+
+    def groups(level: int) -> Dict[str, Dependencies]:
+        if level > levels:
+            return {}
+        return {framework: [(f'{prefix}{level}.{i}', '[1.0.0, )') for i in range(width)]
+                for framework, prefix in families.items()}
+
+    packages: Packages = {ROOT_ID: {ROOT_VERSION: groups(1)}}
+    for level in range(1, levels + 1):
+        for prefix in families.values():
+            for i in range(width):
+                packages[f'{prefix}{level}.{i}'] = {'1.0.0': groups(level + 1)}
+    return packages
+
+
+# Формы для набора замеров: имя -> (описание пакетов, параметры simple_feed)
+SHAPES: Dict[str, Callable[[], Tuple[Packages, Dict[str, Any]]]] = {
+    'chain': lambda: (chain(50), {}),
+    'fan_out': lambda: (fan_out(300), {}),
+    'diamonds': lambda: (diamonds(8, 6), {}),
+    'cycle': lambda: (cycle(40), {}),
+    'many_versions': lambda: (many_versions(5, 3000), {'page_size': 128, 'inline': False}),
+    'multi_framework': lambda: (multi_framework(5, 4), {}),
+}
+
+
+def shape_feed(name: str) -> Dict[str, Any]:
+    packages, options = SHAPES[name]()
+    return simple_feed(packages, **options)
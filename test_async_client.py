@@ -0,0 +1,127 @@
+"""
+Тесты асинхронного клиента NuGet
+"""
+
+import asyncio
+
+import pytest
+
+from async_client import AsyncNuGetClient
+from errors import NuGetError
+from mock_nuget import MockNuGetServer, simple_feed
+
+
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('A', '[1.0.0, )'), ('B', '[1.0.0, )')]},
+    'A': {'1.0.0': [('C', '[1.0.0, )')]},
+    'B': {'1.0.0': [('C', '[1.0.0, )')]},
+    'C': {'1.0.0': []},
+})
+
+
+def test_get_dependencies_with_async_backend(make_visualizer):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, http_backend='async')
+        dependencies = visualizer.get_dependencies()
+
+        assert [dep['id'] for dep in dependencies] == ['A', 'B']
+        assert server.connections == 1
+
+
+def test_resolve_graph_with_async_backend(make_visualizer):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, http_backend='async', transitive=True)
+        graph = visualizer.resolve_graph()
+
+        assert set(graph.nodes) == {('root.package', '1.0.0'), ('a', '1.0.0'), ('b', '1.0.0'), ('c', '1.0.0')}
+        assert graph.edge_count == 4
+
+
+def test_concurrency_is_bounded(make_visualizer):
+    feed = simple_feed({f'Pkg{i}': {'1.0.0': []} for i in range(20)})
+    with MockNuGetServer(feed, latency=0.01) as server:
+        visualizer = make_visualizer(server)
+
+        async def lookup_all():
+            async with AsyncNuGetClient(visualizer, concurrency=3) as client:
+                base = await client.get_registration_base_url()
+                return await asyncio.gather(
+                    *(client.try_alternative_registration_url(base, f'Pkg{i}', '1.0.0') for i in range(20)))
+
+        entries = asyncio.run(lookup_all())
+
+        assert [entry['id'] for entry in entries] == [f'Pkg{i}' for i in range(20)]
+        assert server.connections <= 3
+
+
+def test_async_backend_uses_disk_cache(make_visualizer, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    with MockNuGetServer(FEED) as server:
+        warm = make_visualizer(server, http_cache_dir=cache_dir)
+        warm.get_dependencies()
+        warm.http_cache.save()
+        visualizer = make_visualizer(server, http_backend='async', http_cache_dir=cache_dir)
+        visualizer.get_dependencies()
+
+        stats = visualizer.http_cache.stats()
+        # Листы регистрации и каталога неизменяемы и берутся из кэша без запросов
+        assert stats['hits'] >= 2
+        assert stats['misses'] == 0
+
+
+def test_service_index_is_loaded_once(make_visualizer):
+    with MockNuGetServer(FEED, latency=0.05) as server:
+        visualizer = make_visualizer(server, http_backend='async')
+
+        async def scenario():
+            async with AsyncNuGetClient(visualizer) as client:
+                return await asyncio.gather(*(client.get_cached_service_index() for _ in range(8)))
+
+        indexes = asyncio.run(scenario())
+        assert all(index is indexes[0] for index in indexes)
+        assert server.paths.count('/v3/index.json') == 1
+
+
+def test_timeout_is_reported(make_visualizer):
+    with MockNuGetServer(FEED, latency=0.5) as server:
+        visualizer = make_visualizer(server, http_backend='async', http_retries=0)
+
+        async def scenario():
+            async with AsyncNuGetClient(visualizer, timeout=0.05) as client:
+                return await client.get_json_from_url(server.url('/v3/index.json'))
+
+        with pytest.raises(NuGetError, match="Превышено время ожидания"):
+            asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('response', [
+    b'HTTP/1.1 abc OK\r\nContent-Length: 0\r\n\r\n',
+    b'HTTP/1.1 200 OK\r\nContent-Length: many\r\n\r\n',
+    b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n',
+])
+def test_malformed_response_is_reported(make_visualizer, response):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, http_backend='async', http_retries=1, http_retry_base_delay=0.01)
+
+        async def scenario():
+            requests = []
+
+            async def handle(reader, writer):
+                await reader.readuntil(b'\r\n\r\n')
+                requests.append(1)
+                writer.write(response)
+                await writer.drain()
+                writer.close()
+
+            broken = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = broken.sockets[0].getsockname()[1]
+            try:
+                async with AsyncNuGetClient(visualizer) as client:
+                    with pytest.raises(NuGetError, match="Некорректный HTTP ответ"):
+                        await client.get_json_from_url(f'http://127.0.0.1:{port}/v3/index.json')
+            finally:
+                broken.close()
+            return len(requests)
+
+        # Ошибка протокола повторяется по RetryPolicy, как сетевая
+        assert asyncio.run(scenario()) == 2
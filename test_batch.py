@@ -0,0 +1,87 @@
+"""
+Тесты пакетного режима: общий граф для нескольких корневых пакетов
+"""
+
+import json
+
+import pytest
+
+from mock_nuget import MockNuGetServer, simple_feed
+
+FEED = simple_feed({
+    'App.A': {'1.0.0': [('Shared', '[1.0.0, )'), ('OnlyA', '[1.0.0, )')]},
+    'App.B': {'1.0.0': [('Shared', '[1.0.0, )')]},
+    'App.C': {'1.0.0': [('App.A', '[1.0.0, )')]},
+    'Shared': {'1.0.0': [('Core', '[1.0.0, )')]},
+    'OnlyA': {'1.0.0': []},
+    'Core': {'1.0.0': []},
+})
+
+ROOTS = [('App.A', '1.0.0'), ('App.B', '1.0.0'), ('App.C', '1.0.0'), ('Missing', '1.0.0')]
+
+
+@pytest.mark.parametrize('http_backend', ['threaded', 'async'])
+def test_roots_share_one_traversal(make_visualizer, http_backend):
+    with MockNuGetServer(FEED) as server:
+        single_requests = 0
+        for package_name, version in ROOTS[:3]:
+            visualizer = make_visualizer(server, package_name=package_name, package_version=version,
+                                         http_backend=http_backend)
+            before = server.requests
+            visualizer.resolve_graph()
+            single_requests += server.requests - before
+
+        visualizer = make_visualizer(server, http_backend=http_backend)
+        before = server.requests
+        graph = visualizer.resolve_roots(ROOTS)
+        batch_requests = server.requests - before
+
+    # Shared, Core и App.A запрашиваются один раз на весь пакетный запуск
+    assert batch_requests < single_requests
+    assert graph.node_count == 7
+    results = {result['package_name']: result for result in visualizer.batch_results(graph)}
+    assert sorted(map(tuple, results['App.A']['packages'])) == [('Core', '1.0.0'), ('OnlyA', '1.0.0'),
+                                                              ('Shared', '1.0.0')]
+    assert sorted(map(tuple, results['App.B']['packages'])) == [('Core', '1.0.0'), ('Shared', '1.0.0')]
+    assert len(results['App.C']['packages']) == 4
+    assert [dep['version'] for dep in results['App.C']['dependencies']] == ['1.0.0']
+    # Ошибка одного корня не мешает остальным
+    assert results['Missing']['error']
+    assert not any(results[name]['error'] for name in ('App.A', 'App.B', 'App.C'))
+
+
+def test_run_batch_writes_results(make_visualizer, tmp_path):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps([{'package_name': name, 'package_version': version}
+                                    for name, version in ROOTS[:2]]), encoding='utf-8')
+    output = tmp_path / 'batch.json'
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, output_image='', batch_output=str(output))
+        visualizer.run_batch(str(manifest))
+
+    summary = json.loads(output.read_text(encoding='utf-8'))
+    assert [root['package_name'] for root in summary['roots']] == ['App.A', 'App.B']
+    assert summary['merged'] == {'packages': 5, 'edges': 4}
+
+
+def test_run_batch_reports_sources(make_visualizer, tmp_path, capsys):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps([{'package_name': name, 'package_version': version}
+                                    for name, version in ROOTS[:2]]), encoding='utf-8')
+    with MockNuGetServer(FEED) as primary, MockNuGetServer(FEED) as mirror:
+        visualizer = make_visualizer(primary, output_image='', batch_output=str(tmp_path / 'batch.json'),
+                                     repository_url=[primary.url('/v3/index.json'), mirror.url('/v3/index.json')])
+        visualizer.run_batch(str(manifest))
+
+    out = capsys.readouterr().out
+    assert 'Источники (race):' in out
+    assert primary.url('/v3/index.json') in out and mirror.url('/v3/index.json') in out
+
+
+def test_invalid_manifest(make_visualizer, tmp_path):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps([{'package_name': 'App.A'}]), encoding='utf-8')
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, output_image='')
+        with pytest.raises(SystemExit):
+            visualizer.run_batch(str(manifest))
@@ -0,0 +1,82 @@
+"""
+Тесты инкрементальной синхронизации с каталогом NuGet
+"""
+
+import json
+
+from catalog_sync import CatalogSync, timestamp_key
+from mock_nuget import MockNuGetServer, simple_feed
+
+
+def catalog_documents(pages):
+    """Индекс каталога и страницы: pages - список списков (commitTimeStamp, @type, id, версия)"""
+    documents = {}
+    items = []
+    for number, commits in enumerate(pages):
+        page_path = f'/v3/catalog0/page{number}.json'
+        documents[page_path] = {'items': [
+            {'@id': f'{{base}}/v3/catalog0/data/{package_id.lower()}.{version}.json', '@type': commit_type,
+             'commitTimeStamp': timestamp, 'nuget:id': package_id, 'nuget:version': version}
+            for timestamp, commit_type, package_id, version in commits
+        ]}
+        items.append({'@id': '{base}' + page_path, 'commitTimeStamp': commits[-1][0], 'count': len(commits)})
+    documents['/v3/catalog0/index.json'] = {'commitTimeStamp': items[-1]['commitTimeStamp'], 'items': items}
+    return documents
+
+
+def test_timestamp_key_normalizes_fraction():
+    assert timestamp_key('2023-01-01T00:00:00.5Z') == timestamp_key('2023-01-01T00:00:00.5000000Z')
+    assert timestamp_key('2023-01-01T00:00:00Z') < timestamp_key('2023-01-01T00:00:00.0000001Z')
+
+
+def test_sync_updates_only_changed_packages(make_visualizer, tmp_path):
+    feed = simple_feed({
+        'Root.Package': {'1.0.0': [('A', '[1.0.0, )')]},
+        'A': {'1.0.0': []},
+    })
+    feed['/v3/index.json']['resources'].append(
+        {'@id': '{base}/v3/catalog0/index.json', '@type': 'Catalog/3.0.0'})
+    first_page = [('2024-01-01T00:00:00Z', 'nuget:PackageDetails', 'A', '1.0.0')]
+    feed.update(catalog_documents([first_page]))
+
+    overrides = dict(transitive=True, metadata_store_path=str(tmp_path / 'metadata.db'),
+                     http_cache_dir=str(tmp_path / 'cache'), catalog_cursor_path=str(tmp_path / 'cursor.json'))
+    with MockNuGetServer(feed) as server:
+        visualizer = make_visualizer(server, **overrides)
+        visualizer.resolve_graph()
+        # Первая синхронизация только запоминает текущую позицию каталога
+        assert visualizer.sync_catalog()['pages'] == 0
+
+        # Публикация A 1.1.0 и удаление версии пакета, которого нет локально
+        server.update(simple_feed({'A': {'1.0.0': [], '1.1.0': []}}))
+        server.update(catalog_documents([first_page, [
+            ('2024-01-02T00:00:00.123Z', 'nuget:PackageDetails', 'A', '1.1.0'),
+            ('2024-01-02T00:00:01Z', 'nuget:PackageDelete', 'Other', '2.0.0'),
+        ]]))
+        requests_before = len(server.paths)
+
+        stats = visualizer.sync_catalog()
+        synced_paths = server.paths[requests_before:]
+
+        assert stats['pages'] == 1 and stats['changes'] == 2 and stats['packages'] == 1
+        assert visualizer.metadata_store.versions('A') == ['1.0.0', '1.1.0']
+        # Читаются индекс и новая страница каталога, документы пакетов не загружаются
+        assert sorted(synced_paths) == ['/v3/catalog0/index.json', '/v3/catalog0/page1.json']
+        assert visualizer.sync_catalog()['pages'] == 0
+
+
+def test_cursor_belongs_to_primary_source(make_visualizer, tmp_path):
+    feed = simple_feed({'A': {'1.0.0': []}})
+    feed['/v3/index.json']['resources'].append(
+        {'@id': '{base}/v3/catalog0/index.json', '@type': 'Catalog/3.0.0'})
+    feed.update(catalog_documents([[('2024-01-01T00:00:00Z', 'nuget:PackageDetails', 'A', '1.0.0')]]))
+    cursor_path = tmp_path / 'cursor.json'
+
+    with MockNuGetServer(feed) as primary, MockNuGetServer(simple_feed({'B': {'1.0.0': []}})) as mirror:
+        visualizer = make_visualizer(primary, repository_url=[primary.url('/v3/index.json'),
+                                                              mirror.url('/v3/index.json')],
+                                     http_cache_dir=str(tmp_path / 'cache'), catalog_cursor_path=str(cursor_path))
+        visualizer.sync_catalog()
+        assert json.loads(cursor_path.read_text())['repository_url'] == primary.url('/v3/index.json')
+        # Со списком источников курсор находится, и следующая синхронизация продолжает с него
+        assert CatalogSync(visualizer, str(cursor_path)).load_cursor() == timestamp_key('2024-01-01T00:00:00Z')
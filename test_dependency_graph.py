@@ -0,0 +1,51 @@
+import pytest
+
+from csr_graph import CSRGraph
+from dependency_graph import DependencyEdge, DependencyGraph
+
+
+def test_dependency_edge_reads_like_dict_and_interns_strings():
+    first = DependencyEdge(''.join(['Newtonsoft', '.Json']), '[13.0.1, )', 'net6.0')
+    second = DependencyEdge(''.join(['Newtonsoft', '.Json']), '[13.0.1, )', ''.join(['net', '6.0']))
+
+    assert first['id'] == 'Newtonsoft.Json'
+    assert first.get('target_framework') == 'net6.0'
+    assert first.get('missing', '-') == '-'
+    with pytest.raises(KeyError):
+        first['missing']
+    assert first == {'id': 'Newtonsoft.Json', 'version_range': '[13.0.1, )', 'target_framework': 'net6.0'}
+    assert first.id is second.id and first.target_framework is second.target_framework
+    assert not hasattr(first, '__dict__')
+
+
+def test_graph_returns_edge_records():
+    graph = DependencyGraph('Root', '1.0.0')
+    child = graph.add_node('Child', '2.0.0')
+    edge = DependencyEdge('Child', '2.0.0', 'net45')
+    graph.add_edge(graph.root, child, edge)
+
+    assert graph.dependencies_of(graph.root) == [edge]
+    assert graph.children(graph.root) == [child]
+
+
+def test_csr_graph_forward_and_reverse_adjacency():
+    # Root -> A, B; A -> C; B -> C; C -> A (ромб и цикл)
+    graph = DependencyGraph('Root', '1.0.0')
+    nodes = {name: graph.add_node(name, '1.0.0') for name in ('A', 'B', 'C')}
+    for parent, child in (('Root', 'A'), ('Root', 'B'), ('A', 'C'), ('B', 'C'), ('C', 'A')):
+        parent_key = graph.root if parent == 'Root' else nodes[parent]
+        graph.add_edge(parent_key, nodes[child], DependencyEdge(child, '[1.0.0, )', 'net45'))
+    graph.add_node('Orphan', '1.0.0')
+
+    csr = CSRGraph.from_graph(graph)
+    index = {name: csr.index_of(name, '1.0.0') for name in ('Root', 'A', 'B', 'C', 'Orphan')}
+
+    assert csr.node_count == 5 and csr.edge_count == 5
+    assert index['Root'] == csr.root == 0
+    assert csr.index_of('c', '1.0.0') == index['C']
+    assert sorted(csr.successors(index['Root'])) == sorted([index['A'], index['B']])
+    assert [dep['id'] for dep in csr.dependencies_of(index['A'])] == ['C']
+    assert sorted(csr.predecessors(index['C'])) == sorted([index['A'], index['B']])
+    assert csr.in_degree(index['A']) == 2 and csr.out_degree(index['Orphan']) == 0
+    assert csr.reachable_from(index['A']) == [index['C']]
+    assert set(csr.dependents_of(index['C'])) == {index['Root'], index['A'], index['B']}
@@ -1,46 +1,68 @@
 """
-Скрипт для демонстрации обработки ошибок
+Тесты обработки ошибок при запуске из командной строки
 """
 
+import json
+import os
 import subprocess
 import sys
 
+import pytest
 
-def test_configurations():
-    """Тестирование различных конфигураций"""
-
-    print("=== Тест 1: Корректная конфигурация ===")
-    result = subprocess.run([sys.executable, "dependency_visualizer.py", "config.json"],
-                            capture_output=True, text=True)
-    print("STDOUT:", result.stdout)
-    if result.stderr:
-        print("STDERR:", result.stderr)
-    print("Return code:", result.returncode)
-
-    print("\n=== Тест 2: Неполная конфигурация ===")
-    result = subprocess.run([sys.executable, "dependency_visualizer.py", "config_invalid.json"],
-                            capture_output=True, text=True)
-    print("STDOUT:", result.stdout)
-    if result.stderr:
-        print("STDERR:", result.stderr)
-    print("Return code:", result.returncode)
-
-    print("\n=== Тест 3: Невалидный JSON ===")
-    result = subprocess.run([sys.executable, "dependency_visualizer.py", "config_broken.json"],
-                            capture_output=True, text=True)
-    print("STDOUT:", result.stdout)
-    if result.stderr:
-        print("STDERR:", result.stderr)
-    print("Return code:", result.returncode)
-
-    print("\n=== Тест 4: Несуществующий файл ===")
-    result = subprocess.run([sys.executable, "dependency_visualizer.py", "nonexistent.json"],
-                            capture_output=True, text=True)
-    print("STDOUT:", result.stdout)
-    if result.stderr:
-        print("STDERR:", result.stderr)
-    print("Return code:", result.returncode)
-
-
-if __name__ == "__main__":
-    test_configurations()
\ No newline at end of file
+from mock_nuget import MockNuGetServer, simple_feed
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('A', '[1.0.0, )')]},
+    'A': {'1.0.0': []},
+})
+
+
+def run_main(workdir, config_text: str) -> subprocess.CompletedProcess:
+    """Запуск main.py с конфигом config_text; рабочий каталог - workdir, чтобы файлы запуска не попали в репозиторий"""
+    (workdir / 'config.json').write_text(config_text, encoding='utf-8')
+    return subprocess.run([sys.executable, MAIN, 'config.json'], cwd=workdir, capture_output=True, text=True,
+                          encoding='utf-8', timeout=60)
+
+
+def test_valid_config(tmp_path):
+    with MockNuGetServer(FEED) as server:
+        result = run_main(tmp_path, json.dumps({
+            'package_name': 'Root.Package',
+            'repository_url': server.url('/v3/index.json'),
+            'package_version': '1.0.0',
+            'output_image': '',
+            'http_cache_dir': '',
+        }))
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'A' in result.stdout
+    assert 'Этап 2 завершен успешно' in result.stdout
+
+
+@pytest.mark.parametrize('config_text, message', [
+    (json.dumps({'package_name': 'Root.Package'}), 'Обязательные поля отсутствуют'),
+    ('{"package_name": "Root.Package",', 'Ошибка парсинга JSON'),
+])
+def test_invalid_config(tmp_path, config_text, message):
+    result = run_main(tmp_path, config_text)
+
+    assert result.returncode == 1
+    assert 'Ошибка конфигурации' in result.stdout
+    assert message in result.stdout
+    assert 'Traceback' not in result.stderr
+
+
+def test_missing_snapshot(tmp_path):
+    # Офлайн-запуск в CI: test_mode без файла снимка
+    result = run_main(tmp_path, json.dumps({
+        'package_name': 'Root.Package',
+        'repository_url': 'http://127.0.0.1:9/v3/index.json',
+        'package_version': '1.0.0',
+        'test_mode': True,
+    }))
+
+    assert result.returncode == 1
+    assert 'nuget_snapshot.bin' in result.stdout
+    assert 'Traceback' not in result.stderr
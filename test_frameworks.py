@@ -0,0 +1,78 @@
+"""
+Тесты выбора группы зависимостей по целевой платформе
+"""
+
+import pytest
+
+import synthetic_feed
+from errors import ConfigError
+from frameworks import NET_CORE, NET_FRAMEWORK, NET_STANDARD, Framework, is_compatible, nearest_group, parse_framework
+from mock_nuget import MockNuGetServer
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('net462', Framework(NET_FRAMEWORK, (4, 6, 2))),
+    ('net48', Framework(NET_FRAMEWORK, (4, 8))),
+    ('.NETFramework4.6.2', Framework(NET_FRAMEWORK, (4, 6, 2))),
+    ('.NETFramework,Version=v4.6', Framework(NET_FRAMEWORK, (4, 6))),
+    ('netstandard2.0', Framework(NET_STANDARD, (2, 0))),
+    ('.NETStandard2.1', Framework(NET_STANDARD, (2, 1))),
+    ('netcoreapp3.1', Framework(NET_CORE, (3, 1))),
+    ('net8.0', Framework(NET_CORE, (8, 0))),
+    ('net8.0-windows10.0.19041', Framework(NET_CORE, (8, 0), 'windows')),
+    ('portable-net45+win8', None),
+    ('', None),
+])
+def test_parse_framework(text, expected):
+    assert parse_framework(text) == expected
+
+
+def test_compatibility():
+    net8, net472 = parse_framework('net8.0'), parse_framework('net472')
+    assert is_compatible(net8, parse_framework('netcoreapp3.1'))
+    assert is_compatible(net8, parse_framework('netstandard2.1'))
+    assert not is_compatible(net8, parse_framework('net462'))
+    assert not is_compatible(net8, parse_framework('net9.0'))
+    assert not is_compatible(net8, parse_framework('net8.0-windows'))
+    assert is_compatible(net472, parse_framework('netstandard2.0'))
+    assert not is_compatible(net472, parse_framework('netstandard2.1'))
+    assert not is_compatible(parse_framework('net45'), parse_framework('netstandard2.0'))
+
+
+def groups(*frameworks):
+    return [{'targetFramework': framework, 'dependencies': []} for framework in frameworks]
+
+
+@pytest.mark.parametrize('project, frameworks, expected', [
+    ('net8.0', ['net462', 'netstandard2.0', 'net6.0'], 'net6.0'),
+    ('net8.0', ['net462', 'netstandard2.0', 'netstandard2.1'], 'netstandard2.1'),
+    ('net48', ['net462', 'netstandard2.0', 'net8.0'], 'net462'),
+    ('net461', ['net472', 'netstandard2.0'], 'netstandard2.0'),
+    ('net8.0-windows', ['net8.0', 'net8.0-windows7.0'], 'net8.0-windows7.0'),
+    ('net8.0', ['net9.0', ''], ''),
+    ('net40', ['net462', 'netstandard1.0'], None),
+])
+def test_nearest_group(project, frameworks, expected):
+    group = nearest_group(parse_framework(project), groups(*frameworks))
+    assert (group['targetFramework'] if group is not None else None) == expected
+
+
+@pytest.mark.parametrize('http_backend', ['threaded', 'async'])
+def test_resolution_follows_one_group(make_visualizer, http_backend):
+    with MockNuGetServer(synthetic_feed.shape_feed('multi_framework')) as server:
+        all_groups = make_visualizer(server, transitive=True, http_backend=http_backend).resolve_graph()
+        requests = server.requests
+        graph = make_visualizer(server, transitive=True, http_backend=http_backend,
+                                target_framework='net8.0').resolve_graph()
+        assert server.requests - requests < requests / 2
+
+    assert all_groups.node_count == 61
+    assert graph.node_count == 21
+    assert {node['id'][:4] for node in graph.nodes.values()} == {'Root', 'Core'}
+    assert {dep['target_framework'] for deps in graph.edges.values() for _, dep in deps} == {'net8.0'}
+
+
+def test_unknown_target_framework(make_visualizer):
+    with MockNuGetServer(synthetic_feed.shape_feed('chain')) as server:
+        with pytest.raises(ConfigError):
+            make_visualizer(server, target_framework='net-latest')
@@ -0,0 +1,121 @@
+"""
+Тесты дискового кэша HTTP ответов
+"""
+
+import pytest
+
+from http_cache import HTTPCache, is_immutable
+from mock_nuget import MockNuGetServer, simple_feed
+
+
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('Dep.A', '[1.0.0, )')]},
+    'Dep.A': {'1.0.0': []},
+})
+
+
+def test_is_immutable():
+    assert is_immutable('https://api.nuget.org/v3/registration5-gz-semver2/newtonsoft.json/13.0.3.json')
+    assert not is_immutable('https://api.nuget.org/v3/registration5-gz-semver2/newtonsoft.json/index.json')
+    assert not is_immutable('https://api.nuget.org/v3/registration5/newtonsoft.json/page/1.0.0/9.0.0.json')
+    assert not is_immutable('https://api.nuget.org/v3/index.json')
+    assert not is_immutable('https://api.nuget.org/v3/catalog0/page12345.json')
+    assert is_immutable('https://api.nuget.org/v3/catalog0/data/2015.02.01.06.22.45/newtonsoft.json.6.0.8.json')
+
+
+def test_second_run_is_served_from_cache(make_visualizer, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    with MockNuGetServer(FEED) as server:
+        first = make_visualizer(server, http_cache_dir=cache_dir)
+        first.get_dependencies()
+        first.http_cache.save()
+        cold_requests = server.requests
+
+        second = make_visualizer(server, http_cache_dir=cache_dir)
+        dependencies = second.get_dependencies()
+        stats = second.http_cache.stats()
+
+        assert [dep['id'] for dep in dependencies] == ['Dep.A']
+        # Лист регистрации и лист каталога отданы без сети, индексы подтверждены условным запросом
+        assert not leaf_requests(server.paths[cold_requests:])
+        assert server.not_modified == server.requests - cold_requests
+        assert stats['misses'] == 0
+        assert stats['hits'] == stats['revalidated'] + 2
+
+
+def leaf_requests(paths):
+    return [path for path in paths if path.startswith('/v3/catalog/') or
+            (path.startswith('/v3/registration/') and not path.endswith('/index.json'))]
+
+
+@pytest.mark.parametrize('http_backend', ['threaded', 'async'])
+def test_second_transitive_run_skips_leaf_documents(make_visualizer, tmp_path, http_backend):
+    cache_dir = str(tmp_path / 'cache')
+    with MockNuGetServer(FEED) as server:
+        first = make_visualizer(server, http_cache_dir=cache_dir, transitive=True, http_backend=http_backend)
+        first.resolve_graph()
+        first.http_cache.save()
+        cold_paths = server.paths
+        # Каждый пакет - один лист регистрации и один лист каталога, без обращения к index.json
+        assert len(leaf_requests(cold_paths)) == 4
+        assert '/v3/registration/dep.a/index.json' not in cold_paths
+
+        second = make_visualizer(server, http_cache_dir=cache_dir, transitive=True, http_backend=http_backend)
+        graph = second.resolve_graph()
+
+        assert graph.children(graph.root) == [('dep.a', '1.0.0')]
+        assert leaf_requests(server.paths[len(cold_paths):]) == []
+
+
+def test_lru_eviction(tmp_path):
+    cache = HTTPCache(str(tmp_path), max_bytes=250)
+    cache.store('http://feed/a/1.0.0.json', b'a' * 100)
+    cache.store('http://feed/b/1.0.0.json', b'b' * 100)
+    assert cache.get_fresh('http://feed/a/1.0.0.json') == b'a' * 100
+    cache.store('http://feed/c/1.0.0.json', b'c' * 100)
+
+    assert cache.lookup('http://feed/b/1.0.0.json') is None
+    assert cache.lookup('http://feed/a/1.0.0.json') is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.total_bytes <= 250
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    cache.store('http://feed/a/1.0.0.json', b'{}')
+    cache.store('http://feed/b/1.0.0.json', b'{}')
+    cache.save()
+
+    reloaded = HTTPCache(str(tmp_path))
+    assert reloaded.stats()['entries'] == 2
+    assert reloaded.total_bytes == 2
+
+
+def test_not_modified_without_cached_body(tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    cache.store('http://feed/a/index.json', b'{"versions": []}', etag='"1"')
+    entry = cache.lookup('http://feed/a/index.json')
+    cache.read_body = lambda entry: None
+
+    assert cache.handle_response('http://feed/a/index.json', entry, 304, {}, b'') is None
+    assert cache.lookup('http://feed/a/index.json') is None
+
+
+@pytest.mark.parametrize('http_backend', ['threaded', 'async'])
+def test_evicted_body_is_fetched_again(make_visualizer, tmp_path, http_backend):
+    cache_dir = str(tmp_path / 'cache')
+    with MockNuGetServer(FEED) as server:
+        first = make_visualizer(server, http_cache_dir=cache_dir)
+        first.get_dependencies()
+        first.http_cache.save()
+
+        second = make_visualizer(server, http_cache_dir=cache_dir, http_backend=http_backend)
+        # Тела удалены между отправкой валидаторов и ответом 304
+        second.http_cache.read_body = lambda entry: None
+        not_modified = server.not_modified
+        dependencies = second.get_dependencies()
+
+        assert [dep['id'] for dep in dependencies] == ['Dep.A']
+        assert server.not_modified > not_modified
+        # Документы получены заново, пустые тела ответов 304 не сохранены
+        assert second.http_cache.stats()['misses'] == server.not_modified - not_modified
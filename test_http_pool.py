@@ -0,0 +1,110 @@
+"""
+Тесты пула keep-alive соединений на локальном HTTP сервере
+"""
+
+import gzip
+import time
+import zlib
+
+import pytest
+
+import http_pool
+from http_pool import ConnectionPool, ContentDecoder, HTTPStatusError, default_ssl_context
+from main import NuGetError
+from mock_nuget import MockNuGetServer, simple_feed
+
+
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('Dep.A', '[1.0.0, )')]},
+    'Dep.A': {'1.0.0': []},
+})
+
+
+def test_connection_is_reused_between_requests():
+    with MockNuGetServer(FEED) as server:
+        pool = ConnectionPool(max_per_host=2)
+        for _ in range(5):
+            pool.request(server.url('/v3/index.json'))
+        pool.close()
+
+        assert server.requests == 5
+        assert server.connections == 1
+        assert pool.stats()['reused'] == 4
+
+
+def test_idle_connections_are_evicted():
+    with MockNuGetServer(FEED) as server:
+        pool = ConnectionPool(idle_timeout=0.05)
+        pool.request(server.url('/v3/index.json'))
+        time.sleep(0.1)
+        pool.request(server.url('/v3/index.json'))
+        pool.close()
+
+        assert server.connections == 2
+        assert pool.stats()['evicted'] == 1
+
+
+def test_http_error_status():
+    with MockNuGetServer(FEED) as server:
+        pool = ConnectionPool()
+        with pytest.raises(HTTPStatusError) as info:
+            pool.request(server.url('/missing.json'))
+        assert info.value.code == 404
+        # После ошибки соединение остается пригодным
+        pool.request(server.url('/v3/index.json'))
+        assert server.connections == 1
+
+
+def test_get_dependencies_uses_single_connection(make_visualizer):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, http_pool_size=1)
+        dependencies = visualizer.get_dependencies()
+
+        assert [dep['id'] for dep in dependencies] == ['Dep.A']
+        assert server.requests >= 3
+        assert server.connections == 1
+
+
+def test_http_error_becomes_nuget_error(make_visualizer):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server)
+        with pytest.raises(NuGetError):
+            visualizer._make_http_request(server.url('/nope'))
+
+
+def test_gzip_and_deflate_are_decoded():
+    payload = b'{"items": []}' * 1000
+    for encoding, compressed in (('gzip', gzip.compress(payload)),
+                                 ('deflate', zlib.compress(payload)),
+                                 ('deflate', zlib.compress(payload)[2:-4])):
+        decoder = ContentDecoder(encoding)
+        for i in range(0, len(compressed), 7):
+            decoder.feed(compressed[i:i + 7])
+        assert decoder.finish() == payload
+        assert decoder.wire_bytes == len(compressed)
+
+
+def test_compressed_transfer_is_counted():
+    big_feed = dict(FEED)
+    big_feed['/big.json'] = {'items': [{'catalogEntry': {'id': 'Pkg', 'version': f'1.0.{i}'}} for i in range(500)]}
+    with MockNuGetServer(big_feed) as server:
+        pool = ConnectionPool()
+        body = pool.request(server.url('/big.json')).body
+        plain = ConnectionPool(accept_encoding=None)
+        assert plain.request(server.url('/big.json')).body == body
+
+        stats = pool.transfer_stats
+        assert stats.decoded_bytes == len(body)
+        assert stats.wire_bytes * 5 < stats.decoded_bytes
+        assert plain.transfer_stats.wire_bytes == len(body)
+
+
+def test_tls_context_is_lazy_and_shared(monkeypatch):
+    monkeypatch.setattr(http_pool, '_ssl_context', None)
+    with MockNuGetServer(FEED) as server:
+        pool = ConnectionPool()
+        pool.request(server.url('/v3/index.json'))
+        pool.close()
+    # Для http соединений сертификаты не загружаются
+    assert http_pool._ssl_context is None
+    assert default_ssl_context() is default_ssl_context()
@@ -0,0 +1,76 @@
+"""
+Тесты замеров этапов запуска
+"""
+
+import json
+
+import pytest
+
+from instrumentation import Histogram, Instrumentation
+from mock_nuget import MockNuGetServer, simple_feed
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.add(value / 1000, nbytes=10)
+    summary = histogram.summary()
+
+    assert summary['count'] == 100
+    assert summary['bytes'] == 1000
+    assert summary['p50'] == pytest.approx(0.050)
+    assert summary['p95'] == pytest.approx(0.095)
+    assert summary['p99'] == pytest.approx(0.099)
+    assert summary['max'] == pytest.approx(0.100)
+
+
+def test_span_records_errors_and_bytes():
+    instrumentation = Instrumentation()
+    with instrumentation.span('parse') as span:
+        span.bytes = 128
+    with pytest.raises(ValueError):
+        with instrumentation.span('parse'):
+            raise ValueError('bad')
+
+    summary = instrumentation.to_dict()['spans']['parse']
+    assert summary['count'] == 2
+    assert summary['errors'] == 1
+    assert summary['bytes'] == 128
+
+
+def test_disabled_instrumentation_records_nothing():
+    instrumentation = Instrumentation(enabled=False)
+    first = instrumentation.span('a')
+    with first as span:
+        span.bytes = 1
+    instrumentation.record('b', 1.0)
+
+    assert instrumentation.span('c') is first
+    assert instrumentation.to_dict()['spans'] == {}
+
+
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('A', '[1.0.0, )'), ('B', '[1.0.0, )')]},
+    'A': {'1.0.0': []},
+    'B': {'1.0.0': []},
+})
+
+
+@pytest.mark.parametrize('http_backend, connect_spans', [
+    ('threaded', {'http.dns', 'http.tcp'}),
+    ('async', {'http.connect'}),
+])
+def test_run_spans(make_visualizer, tmp_path, http_backend, connect_spans):
+    with MockNuGetServer(FEED) as server:
+        path = tmp_path / 'instrumentation.json'
+        visualizer = make_visualizer(server, transitive=True, http_backend=http_backend, filter_mode='prune',
+                                     filter_substring='a', instrumentation=True, instrumentation_path=str(path))
+        visualizer.resolve_graph()
+        visualizer.report_instrumentation()
+
+        spans = json.loads(path.read_text(encoding='utf-8'))['spans']
+        assert connect_spans | {'http.request', 'http.ttfb', 'http.body', 'json.fetch', 'json.parse',
+                                'extract', 'filter'} <= set(spans)
+        assert spans['extract']['count'] == 2
+        assert spans['http.body']['bytes'] > 0
+        assert spans['json.parse']['count'] == spans['http.request']['count']
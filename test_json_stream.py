@@ -0,0 +1,49 @@
+"""
+Тесты потокового разбора индекса регистрации
+"""
+
+import json
+
+import pytest
+
+from json_stream import iter_registration_leaves
+from mock_nuget import MockNuGetServer, registration_documents, simple_feed
+
+
+def split(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_leaves_match_full_parse_for_any_chunking():
+    document = registration_documents('Пакет.Ü', [f'1.0.{i}' for i in range(20)], page_size=7)[
+        '/v3/registration/пакет.ü/index.json']
+    document['items'].insert(1, {'@id': 'https://feed/page/stub.json', 'count': 3, 'lower': '0.1', 'upper': '0.3'})
+    document['commitTimeStamp'] = 12345
+    data = json.dumps(document, ensure_ascii=False, indent=1).encode('utf-8')
+    expected = [leaf for page in document['items'] for leaf in page.get('items', [])]
+
+    for size in (1, 3, 64, len(data)):
+        assert list(iter_registration_leaves(split(data, size))) == expected
+
+
+def test_truncated_document_raises():
+    data = json.dumps(registration_documents('A', ['1.0.0', '2.0.0'])['/v3/registration/a/index.json']).encode()
+    with pytest.raises(ValueError):
+        list(iter_registration_leaves(split(data[:-40], 16)))
+
+
+def test_alternative_lookup_stops_reading_after_match(make_visualizer):
+    versions = [f'1.0.{i}' for i in range(3000)]
+    feed = simple_feed({'Root.Package': {'1.0.0': []}})
+    feed.update(registration_documents('Big', versions))
+    with MockNuGetServer(feed, compress=False) as server:
+        visualizer = make_visualizer(server)
+        base = visualizer._get_registration_base_url()
+        document_size = len(json.dumps(feed['/v3/registration/big/index.json']))
+
+        entry = visualizer._try_alternative_registration_url(base, 'Big', '1.0.5')
+        assert entry['version'] == '1.0.5'
+        assert visualizer.http_pool.transfer_stats.decoded_bytes < document_size / 4
+
+        # Отсутствующая версия: как и раньше, берется первая доступная
+        assert visualizer._try_alternative_registration_url(base, 'Big', '9.9.9')['version'] == '1.0.0'
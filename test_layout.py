@@ -0,0 +1,56 @@
+"""
+Тесты послойной раскладки графа
+"""
+
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+
+from csr_graph import CSRGraph
+from layout import NODE_WIDTH, LayeredLayout, crossings
+
+NAMES = [('Root', '1.0'), ('A', '1.0'), ('B', '1.0'), ('C', '1.0'), ('D', '1.0'), ('E', '1.0')]
+
+
+def build(edges):
+    return CSRGraph.from_edges(NAMES, [((parent, '1.0'), (child, '1.0'), None) for parent, child in edges])
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_layers_and_crossing_reduction(use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    # Root -> A, B; A -> D; B -> C; C, D стоят в исходном порядке "накрест"; Root -> E -> D (длинный путь)
+    graph = build([('Root', 'A'), ('Root', 'B'), ('A', 'D'), ('B', 'C'), ('Root', 'E'), ('E', 'D'),
+                   ('D', 'Root')])
+    layout = LayeredLayout(graph, use_numpy=use_numpy)
+    index = {name: graph.index_of(name, '1.0') for name, _ in NAMES}
+
+    assert [layout.layer[index[name]] for name in ('Root', 'A', 'B', 'C', 'D', 'E')] == [0, 1, 1, 2, 2, 1]
+    # Ребро D -> Root замыкает цикл и не участвует в раскладке
+    assert sum(layout.back) == 1
+    assert crossings(layout) == 0
+    for nodes in layout.layers:
+        xs = [layout.x[node] for node in nodes]
+        assert all(right - left >= NODE_WIDTH for left, right in zip(xs, xs[1:]))
+
+
+def test_python_and_numpy_orders_match():
+    pytest.importorskip('numpy')
+    edges = [('Root', 'A'), ('Root', 'B'), ('Root', 'C'), ('A', 'E'), ('B', 'D'), ('C', 'D'), ('A', 'D')]
+    python_layout = LayeredLayout(build(edges), use_numpy=False)
+    numpy_layout = LayeredLayout(build(edges), use_numpy=True)
+    assert python_layout.layers == numpy_layout.layers
+    assert python_layout.x == pytest.approx(numpy_layout.x)
+
+
+def test_write_svg(tmp_path):
+    graph = build([('Root', 'A'), ('A', 'B')])
+    path = str(tmp_path / 'graph.svg')
+    LayeredLayout(graph).write_svg(path, errors=[('b', '1.0')])
+
+    root = ElementTree.parse(path).getroot()
+    rects = root.findall('.//{http://www.w3.org/2000/svg}rect')
+    assert len(rects) == len(NAMES)
+    assert len(root.findall('.//{http://www.w3.org/2000/svg}path')) == 3  # 2 ребра + стрелка в defs
+    assert [rect.get('stroke') for rect in rects].count('red') == 1
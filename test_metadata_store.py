@@ -0,0 +1,72 @@
+"""
+Тесты хранилища метаданных пакетов в SQLite
+"""
+
+from metadata_store import MetadataStore
+from mock_nuget import MockNuGetServer, simple_feed
+
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('A', '[1.0.0, )'), ('B', '1.0.0')]},
+    'A': {'1.0.0': [('C', '[2.0.0, )')]},
+    'B': {'1.0.0': [('C', '[2.0.0, )')]},
+    'C': {'2.0.0': []},
+})
+
+
+def test_store_round_trip_and_reverse_lookup(tmp_path):
+    path = str(tmp_path / 'metadata.db')
+    store = MetadataStore(path)
+    store.put_many([
+        {'id': 'App', 'version': '1.0', 'dependencyGroups': [
+            {'targetFramework': 'net6.0', 'dependencies': [{'id': 'Lib', 'range': '[1.0.0, )'}]},
+            {'targetFramework': 'net45'},
+        ]},
+        {'id': 'Tool', 'version': '2.0.0', 'dependencyGroups': [
+            {'dependencies': [{'id': 'lib', 'range': '2.0.0'}]},
+        ]},
+    ])
+    store.put_versions('App', ['1.0', '1.1'])
+    store.close()
+
+    store = MetadataStore(path)
+    assert store.package_data('app', '1.0.0') == {'id': 'App', 'version': '1.0', 'dependencyGroups': [
+        {'targetFramework': 'net6.0', 'dependencies': [{'id': 'Lib', 'range': '[1.0.0, )'}]},
+        {'targetFramework': 'net45', 'dependencies': []},
+    ]}
+    assert store.package_data('App', '2.0.0') is None
+    assert store.versions('APP') == ['1.0', '1.1']
+    assert [(dep['id'], dep['version']) for dep in store.dependents('LIB')] == [('App', '1.0'), ('Tool', '2.0.0')]
+    store.close()
+
+
+def test_store_is_consulted_before_http(make_visualizer, tmp_path):
+    store_path = str(tmp_path / 'metadata.db')
+    with MockNuGetServer(FEED) as server:
+        first = make_visualizer(server, transitive=True, metadata_store_path=store_path)
+        first.resolve_graph()
+        first.metadata_store.close()
+        first.metadata_store = None
+        requests_before = server.requests
+
+        second = make_visualizer(server, transitive=True, metadata_store_path=store_path)
+        second.resolve_graph()
+
+        assert server.requests == requests_before
+        assert set(second.graph.nodes) == set(first.graph.nodes)
+        assert second.metadata_store.stats()['misses'] == 0
+
+
+def test_refresh_uses_catalog_commit_times(tmp_path):
+    store = MetadataStore(str(tmp_path / 'metadata.db'))
+    # Список, сохраненный до первой синхронизации, мог пропустить коммиты каталога
+    store.put_versions('Old', ['1.0.0'])
+    store.mark_catalog_commit('2024-01-01T00:00:00.0000000')
+    store.put_versions('New', ['1.0.0'])
+
+    assert store.refresh_versions('2024-01-01T00:00:00.0000000', '2024-01-02T00:00:00.0000000') == 1
+    assert store.refresh_versions('2024-01-02T00:00:00.0000000', '2024-01-03T00:00:00.0000000') == 1
+    store.close()
+
+    reopened = MetadataStore(str(tmp_path / 'metadata.db'))
+    assert reopened.catalog_commit == '2024-01-03T00:00:00.0000000'
+    reopened.close()
@@ -0,0 +1,56 @@
+"""
+Тесты версий NuGet
+"""
+
+import pytest
+
+from nuget_version import parse_range, parse_version, sort_versions, versions_equal
+
+
+def test_ordering():
+    ordered = ['0.9', '1.0.0-alpha', '1.0.0-alpha.1', '1.0.0-alpha.beta', '1.0.0-BETA', '1.0.0-beta.2',
+               '1.0.0-beta.11', '1.0.0-rc.1', '1.0.0', '1.0.0.1', '1.0.1', '1.10.0', '2.0.0']
+    versions = [parse_version(text) for text in ordered]
+    assert sorted(reversed(versions)) == versions
+
+
+def test_normalization_and_metadata():
+    assert parse_version('1.0') == parse_version('1.0.0.0')
+    assert parse_version('1.0.0+build.5') == parse_version('1.0.0')
+    assert parse_version('1.0.0-Beta') == parse_version('1.0.0-beta')
+    assert parse_version('4.3.0.0').normalized == '4.3.0'
+    assert parse_version('1.2.3.4-rc+sha').normalized == '1.2.3.4-rc'
+    assert str(parse_version('1.0')) == '1.0'
+    assert versions_equal('13.0', '13.0.0')
+    assert not versions_equal('13.0.1', '13.0.0')
+
+
+def test_invalid_version():
+    with pytest.raises(ValueError):
+        parse_version('not-a-version')
+
+
+def test_range_parsing():
+    assert parse_range('[4.3.0, )').satisfies(parse_version('4.3.0'))
+    assert not parse_range('(4.3.0, )').satisfies(parse_version('4.3.0'))
+    assert parse_range('4.3.0').satisfies(parse_version('99.0'))
+    assert parse_range('[1.0, 2.0)').satisfies(parse_version('1.9.9'))
+    assert not parse_range('[1.0, 2.0)').satisfies(parse_version('2.0'))
+    assert parse_range('(, 2.0]').satisfies(parse_version('0.1'))
+    assert parse_range('[1.2.3]').satisfies(parse_version('1.2.3.0'))
+    assert not parse_range('[1.2.3]').satisfies(parse_version('1.2.4'))
+    assert parse_range('[1.0, 2.0)') is parse_range('[1.0, 2.0)')
+
+    for invalid in ('[2.0, 1.0]', '(1.0)', '[1.0', 'abc'):
+        with pytest.raises(ValueError):
+            parse_range(invalid)
+
+
+def test_best_match_picks_lowest_applicable():
+    versions = sort_versions(['2.0.0', '1.0.0', '1.5.0-beta', '1.5.0', '3.0.0', 'garbage'])
+
+    assert str(parse_range('[1.1, )').best_match(versions)) == '1.5.0'
+    assert str(parse_range('(1.5.0, 3.0.0)').best_match(versions)) == '2.0.0'
+    assert str(parse_range('[1.5.0-alpha, )').best_match(versions)) == '1.5.0-beta'
+    assert str(parse_range('(, 1.0.0]').best_match(versions)) == '1.0.0'
+    assert parse_range('[3.1, 4.0)').best_match(versions) is None
@@ -0,0 +1,80 @@
+"""
+Тесты фильтра пакетов и отсечения поддеревьев при обходе
+"""
+
+import pytest
+
+from errors import ConfigError
+from mock_nuget import MockNuGetServer, simple_feed
+from package_filter import PackageFilter
+
+
+def test_substring_glob_and_regex_patterns():
+    package_filter = PackageFilter(['logging', 'Microsoft.*', r're:^System\.(IO|Net)\b'])
+
+    assert package_filter.matches('Serilog.Extensions.Logging')
+    assert package_filter.matches('microsoft.extensions.primitives')
+    assert not package_filter.matches('My.Microsoft.Tools')  # glob сравнивается со всем id
+    assert package_filter.matches('System.IO.Pipelines')
+    assert package_filter.matches('System.Net.Http')
+    assert not package_filter.matches('System.IOx')
+    assert not package_filter.matches('Newtonsoft.Json')
+
+
+def test_empty_filter_matches_everything():
+    for patterns in ('', [], ['']):
+        package_filter = PackageFilter(patterns)
+        assert not package_filter
+        assert package_filter.matches('Anything')
+
+
+def test_invalid_regex_is_config_error():
+    with pytest.raises(ConfigError):
+        PackageFilter(['re:(unclosed'])
+
+
+# Root -> Keep.A, Drop.B; Drop.B -> Keep.C, Deep.D; Keep.A -> Keep.E
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('Keep.A', '1.0.0'), ('Drop.B', '1.0.0')]},
+    'Keep.A': {'1.0.0': [('Keep.E', '1.0.0')]},
+    'Drop.B': {'1.0.0': [('Keep.C', '1.0.0'), ('Deep.D', '1.0.0')]},
+    'Keep.C': {'1.0.0': []},
+    'Deep.D': {'1.0.0': []},
+    'Keep.E': {'1.0.0': []},
+})
+
+
+@pytest.mark.parametrize('http_backend', ['threaded', 'async'])
+def test_prune_mode_skips_excluded_subtrees(make_visualizer, http_backend, capsys):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, transitive=True, filter_substring=['keep.*'],
+                                     filter_mode='prune', http_backend=http_backend)
+        graph = visualizer.resolve_graph()
+
+        assert {node['id'] for node in graph.nodes.values()} == {'Root.Package', 'Keep.A', 'Keep.E'}
+        assert not any('/drop.b/' in path or '/deep.d/' in path or '/keep.c/' in path for path in server.paths)
+        assert visualizer.package_filter.pruned_packages == 1
+        assert visualizer.package_filter.pruned_ids == {'drop.b'}
+        assert visualizer.package_filter.pruned_edges == 1
+        executed = visualizer.single_flight.stats.as_dict()['executed']
+    assert (f"связей 1, пакетов 1, из них не загружалось 1; запросов JSON выполнено: {executed}"
+            in capsys.readouterr().out)
+
+
+def test_display_mode_walks_whole_graph(make_visualizer):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, transitive=True, filter_substring='keep')
+        graph = visualizer.resolve_graph()
+
+        assert graph.node_count == 6
+        assert [dep['id'] for dep in visualizer.dependencies] == ['Keep.A']
+
+
+def test_regex_with_groups_or_flags_is_checked_separately():
+    package_filter = PackageFilter([r're:^(\w)\w*\.\1', 're:(?i)^SYSTEM\\.', 'logging'])
+
+    assert package_filter.matches('Abc.Axe')  # обратная ссылка на свою группу
+    assert not package_filter.matches('Abc.Bxe')
+    assert package_filter.matches('system.io')
+    assert package_filter.matches('Serilog.Logging')
+    assert not package_filter.matches('Newtonsoft.Json')
@@ -0,0 +1,105 @@
+"""
+Тесты ограничения частоты запросов и повторов с экспоненциальной паузой
+"""
+
+import email.utils
+import random
+
+import pytest
+
+from http_pool import ConnectionPool, HTTPStatusError
+from mock_nuget import MockNuGetServer, simple_feed
+from rate_limit import RateLimiter, RetryPolicy, TokenBucket, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(email.utils.formatdate(1000.0 + 5, usegmt=True), now=1000.0) == pytest.approx(5.0)
+    assert parse_retry_after('') is None
+    assert parse_retry_after('soon') is None
+
+
+def test_retry_policy_backoff_is_bounded_and_jittered():
+    policy = RetryPolicy(retries=3, base_delay=1.0, max_delay=3.0, rng=random.Random(7))
+    delays = [policy.delay(attempt) for attempt in range(3)]
+    assert all(0 <= delay <= limit for delay, limit in zip(delays, (1.0, 2.0, 3.0)))
+    assert len(set(delays)) == 3
+    assert policy.delay(3) is None
+    # Retry-After сервера важнее случайной паузы, но не больше max_delay
+    assert policy.delay(0, retry_after=2.5) == 2.5
+    assert policy.delay(0, retry_after=60) == 3.0
+
+
+def test_token_bucket_backs_off_and_ramps_up():
+    bucket = TokenBucket(rate=10.0, min_rate=1.0, max_rate=10.0, increase=2.0)
+    assert all(bucket.reserve(100.0) == 0 for _ in range(10))
+    assert bucket.reserve(100.0) == pytest.approx(0.1)
+
+    bucket.throttled(100.0, retry_after=2.0)
+    assert bucket.rate == 5.0
+    assert bucket.reserve(100.5) >= 1.5  # Retry-After приостанавливает запросы к хосту
+    # Ответы на уже отправленные запросы не снижают скорость повторно
+    bucket.throttled(100.2, retry_after=None)
+    assert bucket.rate == 5.0
+
+    for _ in range(100):
+        bucket.succeeded()
+    assert bucket.rate == 10.0
+
+
+def test_unlimited_bucket_starts_from_observed_rate():
+    bucket = TokenBucket(rate=None, min_rate=1.0, max_rate=None, increase=2.0)
+    for i in range(40):
+        assert bucket.reserve(50.0 + i * 0.01) == 0
+    bucket.throttled(50.5, retry_after=None)
+    assert bucket.rate == 20.0
+
+
+def test_pool_retries_throttled_requests():
+    feed = simple_feed({'A': {'1.0.0': []}})
+    with MockNuGetServer(feed) as server:
+        # Высокий нижний предел скорости: после отказов тест не ждет по секунде на запрос
+        limiter = RateLimiter(min_rate=100)
+        pool = ConnectionPool(rate_limiter=limiter, retry_policy=RetryPolicy(retries=2, base_delay=0.01))
+        server.inject_failures(2, status=503, retry_after='0')
+        assert pool.request(server.url('/v3/index.json')).status == 200
+        assert server.requests == 3
+        assert limiter.stats()['throttled'] == 2
+
+        # Повторы исчерпаны - ошибка доходит до вызывающего
+        server.inject_failures(3)
+        with pytest.raises(HTTPStatusError) as error:
+            pool.request(server.url('/v3/index.json'))
+        assert error.value.code == 429
+
+        # 404 не повторяется
+        with pytest.raises(HTTPStatusError):
+            pool.request(server.url('/missing'))
+        assert server.requests == 7
+        pool.close()
+
+
+def test_pool_retries_connection_errors():
+    policy = RetryPolicy(retries=2, base_delay=0.001)
+    with pytest.raises(OSError):
+        ConnectionPool(retry_policy=policy, timeout=1).request('http://127.0.0.1:1/')
+    assert policy.retried == 2
+
+
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [(f'Lib{i}', '[1.0.0, )') for i in range(20)]},
+    **{f'Lib{i}': {'1.0.0': []} for i in range(20)},
+})
+
+
+@pytest.mark.parametrize('http_backend', ['threaded', 'async'])
+def test_transitive_resolution_survives_throttling(make_visualizer, http_backend):
+    with MockNuGetServer(FEED, max_rps=40, retry_after='0') as server:
+        visualizer = make_visualizer(server, transitive=True, http_backend=http_backend,
+                                     http_retries=8, http_retry_base_delay=0.02)
+        graph = visualizer.resolve_graph()
+
+        assert graph.node_count == 21
+        assert not any(node['error'] for node in graph.nodes.values())
+        assert server.throttled > 0
+        assert visualizer.http_pool.rate_limiter.stats()['throttled'] == server.throttled
@@ -0,0 +1,61 @@
+"""
+Тесты поиска версии по страницам индекса регистрации
+"""
+
+import asyncio
+
+from async_client import AsyncNuGetClient
+from mock_nuget import MockNuGetServer, registration_documents, simple_feed
+
+
+VERSIONS = ['0.9.0', '1.0.0-beta', '1.0.0', '1.2.0'] + [f'2.{i}.0' for i in range(40)]
+
+
+def paged_feed():
+    feed = simple_feed({'Root.Package': {'1.0.0': []}})
+    feed.update(registration_documents('Big', VERSIONS, page_size=10, inline=False))
+    return feed
+
+
+def page_requests(server):
+    return [path for path in server.paths if '/page/' in path]
+
+
+def test_only_matching_page_is_fetched(make_visualizer):
+    for streaming in (True, False):
+        with MockNuGetServer(paged_feed()) as server:
+            visualizer = make_visualizer(server, stream_registration_index=streaming)
+            base = visualizer._get_registration_base_url()
+
+            entry = visualizer._try_alternative_registration_url(base, 'Big', '2.15.0')
+            assert entry['version'] == '2.15.0'
+            assert page_requests(server) == ['/v3/registration/big/page/2.6.0/2.15.0.json']
+
+            # Пререлиз младше релиза и попадает на первую страницу
+            assert visualizer._try_alternative_registration_url(base, 'Big', '1.0.0-beta')['version'] == '1.0.0-beta'
+            assert page_requests(server)[-1] == '/v3/registration/big/page/0.9.0/2.5.0.json'
+
+
+def test_locate_page_uses_semver_order(make_visualizer):
+    with MockNuGetServer(paged_feed()) as server:
+        visualizer = make_visualizer(server)
+        pages = registration_documents('Big', VERSIONS, page_size=10, inline=False)[
+            '/v3/registration/big/index.json']['items']
+
+        assert visualizer._locate_page(pages, '2.10.0')['lower'] == '2.6.0'
+        assert visualizer._locate_page(pages, '2.9.0')['lower'] == '2.6.0'
+        assert visualizer._locate_page(pages, '0.1.0') is None
+        assert visualizer._locate_page(pages, '9.0.0') is None
+
+
+def test_async_client_fetches_single_page(make_visualizer):
+    with MockNuGetServer(paged_feed()) as server:
+        visualizer = make_visualizer(server)
+
+        async def lookup():
+            async with AsyncNuGetClient(visualizer) as client:
+                base = await client.get_registration_base_url()
+                return await client.try_alternative_registration_url(base, 'Big', '2.33.0')
+
+        assert asyncio.run(lookup())['version'] == '2.33.0'
+        assert page_requests(server) == ['/v3/registration/big/page/2.26.0/2.35.0.json']
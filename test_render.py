@@ -0,0 +1,55 @@
+"""
+Тесты потокового вывода DOT и встроенного SVG движка
+"""
+
+import xml.etree.ElementTree as ElementTree
+
+from mock_nuget import MockNuGetServer, simple_feed
+from render import DotWriter, SvgBackend, read_dot, render_image
+
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('A', '[1.0.0, )'), ('B', '1.0.0')]},
+    'A': {'1.0.0': [('C', '[2.0.0, )')]},
+    'B': {'1.0.0': [('C', '[2.0.0, )'), ('Missing', '1.0.0')]},
+    'C': {'2.0.0': []},
+})
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+def test_dot_is_written_during_resolution(make_visualizer, tmp_path):
+    dot_path = str(tmp_path / 'graph.dot')
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, transitive=True)
+        with DotWriter(dot_path) as writer:
+            visualizer.resolve_graph(observer=writer)
+
+    records = list(read_dot(dot_path))
+    depths = {data[0]: data[2] for kind, data in records if kind == 'node'}
+    edges = [data for kind, data in records if kind == 'edge']
+    errors = [data[0] for kind, data in records if kind == 'error']
+
+    assert depths == {'root.package/1.0.0': 0, 'a/1.0.0': 1, 'b/1.0.0': 1, 'c/2.0.0': 2, 'missing/1.0.0': 2}
+    assert ('b/1.0.0', 'c/2.0.0') in edges and len(edges) == 5
+    assert errors == ['missing/1.0.0']
+    assert writer.node_count == 5 and writer.edge_count == 5
+
+
+def test_svg_fallback_renders_layers(tmp_path):
+    dot_path = str(tmp_path / 'graph.dot')
+    with DotWriter(dot_path) as writer:
+        writer.on_node(('root', '1.0'), 'Root', '1.0')
+        for name in ('A', 'B'):
+            writer.on_node((name.lower(), '1.0'), name, '1.0')
+            writer.on_edge(('root', '1.0'), (name.lower(), '1.0'), None)
+        writer.on_error(('b', '1.0'), 'не найден "B"')
+
+    output = render_image(dot_path, str(tmp_path / 'graph.png'), backend='svg')
+
+    assert output.endswith('graph.svg')
+    root = ElementTree.parse(output).getroot()
+    rects = root.findall(f'.//{SVG}rect')
+    assert len(rects) == 3 and len(root.findall(f'.//{SVG}line')) == 2
+    assert [rect.get('stroke') for rect in rects].count('red') == 1
+    # Потомки корня лежат на втором слое
+    assert {rect.get('y') for rect in rects[1:]} == {str(SvgBackend.MARGIN + SvgBackend.NODE_HEIGHT + SvgBackend.V_GAP)}
@@ -0,0 +1,75 @@
+"""
+Тесты транзитивного обхода графа зависимостей
+"""
+
+from collections import Counter
+
+from mock_nuget import MockNuGetServer, simple_feed
+from resolver import TransitiveResolver, lowest_version_from_range
+
+
+# Root -> A, B; A -> C; B -> C (ромб); C -> A (цикл)
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('A', '[1.0.0, )'), ('B', '1.0.0')]},
+    'A': {'1.0.0': [('C', '[2.0.0, 3.0.0)')]},
+    'B': {'1.0.0': [('C', '[2.0.0, )')]},
+    'C': {'2.0.0': [('A', '[1.0.0, )')]},
+})
+
+
+def test_lowest_version_from_range():
+    assert lowest_version_from_range('[4.3.0, )') == '4.3.0'
+    assert lowest_version_from_range('(1.0, 2.0]') == '1.0'
+    assert lowest_version_from_range('4.3.0') == '4.3.0'
+    assert lowest_version_from_range('[1.2.3]') == '1.2.3'
+    assert lowest_version_from_range('(, 2.0)') is None
+    assert lowest_version_from_range('') is None
+
+
+def test_resolve_transitive_closure(make_visualizer):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server)
+        graph = TransitiveResolver(visualizer, max_workers=4).resolve('Root.Package', '1.0.0')
+
+        assert set(graph.nodes) == {('root.package', '1.0.0'), ('a', '1.0.0'), ('b', '1.0.0'), ('c', '2.0.0')}
+        assert graph.edge_count == 5
+        assert sorted(graph.children(('c', '2.0.0'))) == [('a', '1.0.0')]
+        assert [depth for _, depth in graph.walk()] == [0, 1, 1, 2]
+
+        # Каждый пакет запрашивается ровно один раз несмотря на ромб и цикл
+        requests = Counter(server.paths)
+        assert requests['/v3/catalog/c.2.0.0.json'] == 1
+        assert requests['/v3/catalog/a.1.0.0.json'] == 1
+        assert requests['/v3/flatcontainer/a/index.json'] == 1
+
+
+def test_missing_package_is_marked_as_error(make_visualizer):
+    feed = simple_feed({'Root.Package': {'1.0.0': [('Missing', '[1.0.0, )')]}})
+    with MockNuGetServer(feed) as server:
+        visualizer = make_visualizer(server)
+        graph = TransitiveResolver(visualizer).resolve('Root.Package', '1.0.0')
+
+        assert graph.nodes[('missing', '1.0.0')]['error']
+        assert graph.nodes[graph.root]['error'] is None
+
+
+def test_visualizer_resolve_graph(make_visualizer):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, transitive=True, filter_substring='a')
+        visualizer.resolve_graph()
+
+        assert visualizer.graph.node_count == 4
+        assert [dep['id'] for dep in visualizer.dependencies] == ['A']
+
+
+def test_lowest_applicable_version_is_selected(make_visualizer):
+    feed = simple_feed({
+        'Root.Package': {'1.0.0': [('Lib', '[2.0.1, 3.0.0)'), ('Pre', '[1.0.0, )')]},
+        'Lib': {'1.0.0': [], '2.0.0': [], '2.5.0': [], '2.7.0': [], '3.0.0': []},
+        'Pre': {'1.0.0-beta': [], '1.1.0': []},
+    })
+    with MockNuGetServer(feed) as server:
+        graph = TransitiveResolver(make_visualizer(server)).resolve('Root.Package', '1.0.0')
+
+        assert sorted(graph.children(graph.root)) == [('lib', '2.5.0'), ('pre', '1.1.0')]
+        assert graph.nodes[('lib', '2.5.0')]['error'] is None
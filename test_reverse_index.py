@@ -0,0 +1,82 @@
+"""
+Тесты индекса обратных зависимостей
+"""
+
+import pytest
+
+from csr_graph import CSRGraph
+from dependency_graph import DependencyEdge
+from errors import NuGetError
+from mock_nuget import MockNuGetServer, simple_feed
+from reverse_index import ReverseIndex, write_reverse_index
+
+
+def edge(parent, child):
+    return parent, child, DependencyEdge(child[0], f'[{child[1]}, )', 'net8.0')
+
+
+def test_paths_from_every_root(tmp_path):
+    #  App.A -> Web 1.0 -> Json 12.0.1
+    #  App.B -> Json 13.0.1;  App.B -> Web 1.0
+    #  Tool  -> Other
+    names = [('App.A', '1.0.0'), ('App.B', '1.0.0'), ('Tool', '1.0.0')]
+    edges = [
+        edge(('App.A', '1.0.0'), ('Web', '1.0.0')),
+        edge(('Web', '1.0.0'), ('Newtonsoft.Json', '12.0.1')),
+        edge(('App.B', '1.0.0'), ('Newtonsoft.Json', '13.0.1')),
+        edge(('App.B', '1.0.0'), ('Web', '1.0.0')),
+        edge(('Tool', '1.0.0'), ('Other', '2.0.0')),
+    ]
+    graph = CSRGraph.from_edges(names, edges)
+    path = str(tmp_path / 'reverse.bin')
+    write_reverse_index(path, graph, [0, 1, 2])
+
+    with ReverseIndex(path) as index:
+        results = index.dependents('newtonsoft.json')
+        assert sorted((result['root'][0], result['package'][1]) for result in results) == [
+            ('App.A', '12.0.1'), ('App.B', '12.0.1'), ('App.B', '13.0.1')]
+        vulnerable = index.dependents('Newtonsoft.Json', '(, 13.0.0)')
+        assert sorted(result['root'][0] for result in vulnerable) == ['App.A', 'App.B']
+        assert next(r for r in vulnerable if r['root'][0] == 'App.A')['path'] == [
+            ('App.A', '1.0.0'), ('Web', '1.0.0'), ('Newtonsoft.Json', '12.0.1')]
+        assert index.dependents('Newtonsoft.Json', '[14.0.0, )') == []
+        assert index.dependents('Missing') == []
+        # Корень сам по себе - путь из одного узла
+        assert index.dependents('Tool')[0]['path'] == [('Tool', '1.0.0')]
+
+
+def test_not_an_index(tmp_path):
+    path = tmp_path / 'broken.bin'
+    path.write_bytes(b'not an index at all')
+    with pytest.raises(NuGetError):
+        ReverseIndex(str(path))
+
+
+FEED = simple_feed({
+    'App.A': {'1.0.0': [('Shared', '[1.0.0, )')]},
+    'App.B': {'1.0.0': [('Other', '[1.0.0, )')]},
+    'Shared': {'1.0.0': [('Core', '[1.0.0, )')]},
+    'Other': {'1.0.0': []},
+    'Core': {'1.0.0': []},
+})
+
+
+def test_index_written_during_resolution(make_visualizer, tmp_path):
+    with MockNuGetServer(FEED) as server:
+        visualizer = make_visualizer(server, reverse_index_path=str(tmp_path / 'reverse.bin'))
+        visualizer.resolve_roots([('App.A', '1.0.0'), ('App.B', '1.0.0')])
+
+    results = visualizer.find_dependents('Core', '[1.0.0]')
+    assert [result['root'] for result in results] == [('App.A', '1.0.0')]
+    assert [name for name, _ in results[0]['path']] == ['App.A', 'Shared', 'Core']
+
+
+def test_single_package_run_keeps_batch_index(make_visualizer, tmp_path):
+    index_path = str(tmp_path / 'reverse.bin')
+    with MockNuGetServer(FEED) as server:
+        make_visualizer(server, reverse_index_path=index_path).resolve_roots([('App.A', '1.0.0'), ('App.B', '1.0.0')])
+        visualizer = make_visualizer(server, package_name='App.B', reverse_index_path=index_path, transitive=True)
+        visualizer.resolve_graph()
+
+    assert [result['root'] for result in visualizer.find_dependents('Core')] == [('App.A', '1.0.0')]
+    assert [result['root'] for result in visualizer.find_dependents('Other')] == [('App.B', '1.0.0')]
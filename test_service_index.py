@@ -0,0 +1,47 @@
+"""
+Тесты кэша индекса сервисов
+"""
+
+import time
+
+from mock_nuget import MockNuGetServer, simple_feed
+from service_index import SERVICE_INDEX_CACHE, ServiceIndex, ServiceIndexCache
+
+
+FEED = simple_feed({'Root.Package': {'1.0.0': []}})
+
+
+def test_service_lookup_keeps_first_resource():
+    index = ServiceIndex({'resources': [
+        {'@id': 'https://a/', '@type': 'RegistrationsBaseUrl/3.6.0'},
+        {'@id': 'https://b/', '@type': 'RegistrationsBaseUrl/3.6.0'},
+        {'@id': 'https://c/', '@type': 'Catalog/3.0.0'},
+    ]})
+    assert index.find('RegistrationsBaseUrl/3.6.0') == 'https://a/'
+    assert index.find('Catalog/3.0.0') == 'https://c/'
+    assert index.find('SearchQueryService') is None
+
+
+def test_cache_expires_after_ttl():
+    cache = ServiceIndexCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {'resources': []}
+
+    cache.get('https://feed/index.json', loader, ttl=0.05)
+    cache.get('https://feed/index.json', loader, ttl=0.05)
+    assert len(calls) == 1
+    time.sleep(0.06)
+    cache.get('https://feed/index.json', loader, ttl=0.05)
+    assert len(calls) == 2
+
+
+def test_index_is_fetched_once_per_process(make_visualizer):
+    with MockNuGetServer(FEED) as server:
+        for _ in range(3):
+            make_visualizer(server).get_dependencies()
+
+        assert server.paths.count('/v3/index.json') == 1
+        assert SERVICE_INDEX_CACHE.fetches == 1
@@ -0,0 +1,108 @@
+"""
+Тесты объединения одновременных запросов (single-flight)
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mock_nuget import MockNuGetServer, simple_feed
+from resolver import TransitiveResolver
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return {'value': 42}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(flight.do, 'url', load) for _ in range(8)]
+        while flight.stats.as_dict()['collapsed'] < 7:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats.as_dict() == {'executed': 1, 'collapsed': 7}
+    # Завершенный вызов не кэшируется
+    flight.do('url', load)
+    assert len(calls) == 2
+
+
+def test_error_is_shared_and_key_released():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do('url', lambda: (_ for _ in ()).throw(ValueError('boom')))
+    assert flight.do('url', lambda: 'ok') == 'ok'
+
+
+def test_async_single_flight():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [1, 2]
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise KeyError('missing')
+
+        results = await asyncio.gather(*(flight.do('a', load) for _ in range(5)))
+        errors = await asyncio.gather(*(flight.do('b', failing) for _ in range(3)), return_exceptions=True)
+        return calls, results, errors, flight.stats.as_dict()
+
+    calls, results, errors, stats = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert all(isinstance(error, KeyError) for error in errors)
+    assert stats == {'executed': 2, 'collapsed': 6}
+
+
+def test_async_waiter_survives_leader_cancellation():
+    async def scenario():
+        flight = AsyncSingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.01)
+            return 'ok'
+
+        leader = asyncio.ensure_future(flight.do('a', load))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do('a', load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await waiter, leader.cancelled()
+
+    assert asyncio.run(scenario()) == ('ok', True)
+
+
+# Пять родителей одного уровня зависят от Shared: список его версий запрашивается одновременно
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [(f'P{i}', '1.0.0') for i in range(5)]},
+    **{f'P{i}': {'1.0.0': [('Shared', '[1.0.0, )')]} for i in range(5)},
+    'Shared': {'1.0.0': [], '1.1.0': []},
+})
+
+
+def test_diamond_fetches_shared_versions_once(make_visualizer):
+    with MockNuGetServer(FEED, latency=0.05) as server:
+        visualizer = make_visualizer(server, http_pool_size=8)
+        graph = TransitiveResolver(visualizer, max_workers=8).resolve('Root.Package', '1.0.0')
+
+        assert graph.node_count == 7
+        assert Counter(server.paths)['/v3/flatcontainer/shared/index.json'] == 1
+        assert visualizer.single_flight.stats.as_dict()['collapsed'] > 0
@@ -0,0 +1,56 @@
+"""
+Тесты офлайн-снимка данных регистрации
+"""
+
+import pytest
+
+from errors import NuGetError
+from mock_nuget import MockNuGetServer, simple_feed
+from snapshot import SnapshotRepository, write_snapshot
+
+FEED = simple_feed({
+    'Root.Package': {'1.0.0': [('A', '[1.0.0, )'), ('B', '1.0')]},
+    'A': {'1.0.0': [('C', '[2.0.0, 3.0.0)')], '1.1.0': []},
+    'B': {'1.0.0': [('C', '[2.0.0, )')]},
+    'C': {'2.0.0': [], '2.5.0': []},
+})
+
+
+def test_snapshot_lookup_by_id_and_normalized_version(tmp_path):
+    path = str(tmp_path / 'snapshot.bin')
+    write_snapshot(path, [
+        {'id': f'Package.{i}', 'versions': ['1.0.0'],
+         'entries': {'1.0.0': {'id': f'Package.{i}', 'version': '1.0.0', 'dependencyGroups': []}}}
+        for i in range(100)
+    ])
+
+    with SnapshotRepository(path) as snapshot:
+        assert len(snapshot) == 100
+        assert snapshot.package_data('package.42', '1.0')['id'] == 'Package.42'
+        assert snapshot.versions('PACKAGE.7') == ['1.0.0']
+        with pytest.raises(NuGetError):
+            snapshot.package_data('Missing', '1.0.0')
+        with pytest.raises(NuGetError):
+            snapshot.package_data('Package.1', '2.0.0')
+
+
+def test_snapshot_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text('{"package_name": "x"}', encoding='utf-8')
+    with pytest.raises(NuGetError):
+        SnapshotRepository(str(path))
+
+
+def test_export_then_resolve_offline(make_visualizer, tmp_path):
+    path = str(tmp_path / 'snapshot.bin')
+    with MockNuGetServer(FEED) as server:
+        online = make_visualizer(server, transitive=True)
+        assert online.export_snapshot(path) == 4
+        online_nodes = set(online.graph.nodes)
+
+    # Сервер остановлен: все данные должны прийти из снимка
+    offline = make_visualizer(server, transitive=True, test_mode=True, snapshot_path=path)
+    offline.resolve_graph()
+    assert set(offline.graph.nodes) == online_nodes == {
+        ('root.package', '1.0.0'), ('a', '1.0.0'), ('b', '1.0.0'), ('c', '2.0.0')}
+    assert [dep['id'] for dep in offline.dependencies] == ['A', 'B']
@@ -0,0 +1,77 @@
+"""
+Тесты нескольких источников пакетов: приоритет, гонка и статистика по источникам
+"""
+
+import pytest
+
+from errors import ConfigError, NuGetError
+from mock_nuget import MockNuGetServer, simple_feed
+from sources import PackageSource, SourceSet
+
+FEED = simple_feed({
+    'App': {'1.0.0': [('Lib', '[1.0.0, )')]},
+    'Lib': {'1.0.0': [], '2.0.0': []},
+})
+
+# Внутренний фид знает только свои пакеты, публичный - только открытые
+INTERNAL = simple_feed({'App': {'1.0.0': [('Lib', '[1.0.0, )')]}})
+PUBLIC = simple_feed({'Lib': {'1.0.0': []}})
+
+
+def urls(*servers):
+    return [server.url('/v3/index.json') for server in servers]
+
+
+@pytest.mark.parametrize('http_backend', ['threaded', 'async'])
+def test_race_fastest_source_wins(make_visualizer, http_backend):
+    with MockNuGetServer(FEED, latency=0.3) as slow, MockNuGetServer(FEED) as fast:
+        visualizer = make_visualizer(slow, package_name='App', repository_url=urls(slow, fast),
+                                     source_strategy='race',
+                                     http_backend=http_backend, transitive=True)
+        graph = visualizer.resolve_graph()
+
+    assert graph.children(graph.root) == [('lib', '1.0.0')]
+    slow_stats, fast_stats = visualizer.sources.stats()
+    assert fast_stats['wins'] > 0 and fast_stats['failures'] == 0
+    assert slow_stats['wins'] == 0
+
+
+@pytest.mark.parametrize('http_backend', ['threaded', 'async'])
+def test_priority_falls_back_to_next_source(make_visualizer, http_backend):
+    with MockNuGetServer(INTERNAL) as internal, MockNuGetServer(PUBLIC) as public:
+        visualizer = make_visualizer(internal, package_name='App', repository_url=urls(internal, public),
+                                     source_strategy='priority',
+                                     http_backend=http_backend, transitive=True)
+        graph = visualizer.resolve_graph()
+        public_requests = public.requests
+
+    assert graph.children(graph.root) == [('lib', '1.0.0')]
+    internal_stats, public_stats = visualizer.sources.stats()
+    # App найден во внутреннем фиде, Lib - после неудачи в нем - в публичном
+    assert internal_stats['wins'] >= 1 and internal_stats['failures'] >= 1
+    assert public_stats['wins'] >= 1 and public_stats['failures'] == 0
+    assert public_requests > 0
+
+
+def test_missing_everywhere_lists_every_source():
+    class Pool:
+        def close(self):
+            pass
+
+    sources = SourceSet([PackageSource('a', Pool()), PackageSource('b', Pool())], strategy='race')
+
+    def lookup(source):
+        raise NuGetError(f"нет в {source.url}")
+
+    with pytest.raises(NuGetError, match="ни в одном источнике"):
+        sources.first(lookup)
+    assert [stats['failures'] for stats in sources.stats()] == [1, 1]
+    sources.close()
+
+
+def test_invalid_source_config(make_visualizer):
+    with MockNuGetServer(FEED) as server:
+        with pytest.raises(ConfigError):
+            make_visualizer(server, repository_url=[])
+        with pytest.raises(ConfigError):
+            make_visualizer(server, source_strategy='fastest')
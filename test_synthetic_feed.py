@@ -0,0 +1,40 @@
+"""
+Тесты генератора синтетических фидов
+"""
+
+import pytest
+
+import synthetic_feed
+from mock_nuget import MockNuGetServer, simple_feed
+
+
+@pytest.mark.parametrize('shape, nodes, edges', [
+    ('chain', 51, 50),
+    ('fan_out', 301, 300),
+    ('diamonds', 49, 8 + 5 * 64),
+    ('cycle', 41, 41),
+])
+def test_shapes_resolve(make_visualizer, shape, nodes, edges):
+    with MockNuGetServer(synthetic_feed.shape_feed(shape)) as server:
+        graph = make_visualizer(server, transitive=True, http_cache_dir='').resolve_graph()
+
+    assert (graph.node_count, graph.edge_count) == (nodes, edges)
+    assert not any(node['error'] for node in graph.nodes.values())
+
+
+@pytest.mark.parametrize('http_backend', ['threaded', 'async'])
+def test_many_versions_use_external_pages(make_visualizer, http_backend):
+    feed = simple_feed(synthetic_feed.many_versions(2, 500), page_size=50, inline=False)
+    index = feed['/v3/registration/versioned0/index.json']
+    assert index['count'] == 10
+    assert 'items' not in index['items'][0]
+
+    with MockNuGetServer(feed) as server:
+        visualizer = make_visualizer(server, transitive=True, http_backend=http_backend, http_cache_dir='')
+        graph = visualizer.resolve_graph()
+        # Читается только страница с нужной версией, а не все десять
+        assert server.requests < 20
+
+    # Диапазон [1.250.0, ) - выбирается минимальная подходящая версия
+    assert {(node['id'], node['version']) for node in graph.nodes.values()} == {
+        ('Root.Package', '1.0.0'), ('Versioned0', '1.250.0'), ('Versioned1', '1.250.0')}